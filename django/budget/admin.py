@@ -1,7 +1,16 @@
-from django.contrib import admin
+import json
+
+from django import forms
+from django.contrib import admin, messages
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from . import bulk, jobs, referensi, registry
 from .models import (
     Provinsi, KabupatenKota, ProgramKegiatan,
-    JenisAnggaran, AnggaranDaerah, RealisasiBulanan
+    JenisAnggaran, AnggaranDaerah, RealisasiBulanan,
+    SnapshotTahun, AnalisisRealisasi, Job,
 )
 
 # Import django-superset-integration models
@@ -45,21 +54,134 @@ class JenisAnggaranAdmin(admin.ModelAdmin):
     search_fields = ['nama_jenis', 'kode_jenis']
 
 
-class RealisasiBulananInline(admin.TabularInline):
-    model = RealisasiBulanan
-    extra = 1
+def _bulan_field(label):
+    return forms.DecimalField(label=label, max_digits=15, decimal_places=2, min_value=0, required=False)
+
+
+class AnggaranDaerahForm(forms.ModelForm):
+    """
+    Form anggaran dengan grid realisasi 12 bulan. Semua bulan disimpan dengan
+    satu bulk upsert pada (anggaran, bulan, tahun), menggantikan inline
+    RealisasiBulanan yang menyimpan satu query per baris.
+    """
+    bulan_01 = _bulan_field('Januari')
+    bulan_02 = _bulan_field('Februari')
+    bulan_03 = _bulan_field('Maret')
+    bulan_04 = _bulan_field('April')
+    bulan_05 = _bulan_field('Mei')
+    bulan_06 = _bulan_field('Juni')
+    bulan_07 = _bulan_field('Juli')
+    bulan_08 = _bulan_field('Agustus')
+    bulan_09 = _bulan_field('September')
+    bulan_10 = _bulan_field('Oktober')
+    bulan_11 = _bulan_field('November')
+    bulan_12 = _bulan_field('Desember')
+
+    BULAN_FIELDS = {f'bulan_{bulan:02d}': bulan for bulan, _ in RealisasiBulanan.BULAN_CHOICES}
+
+    class Meta:
+        model = AnggaranDaerah
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            # Satu query untuk seluruh grid
+            existing = dict(
+                self.instance.realisasi_bulanan
+                .filter(tahun=self.instance.tahun_anggaran)
+                .values_list('bulan', 'jumlah_realisasi')
+            )
+            for name, bulan in self.BULAN_FIELDS.items():
+                self.initial.setdefault(name, existing.get(bulan))
+
+    def realisasi_per_bulan(self):
+        """{bulan: jumlah} untuk bulan yang diisi"""
+        return {
+            bulan: self.cleaned_data[name]
+            for name, bulan in self.BULAN_FIELDS.items()
+            if self.cleaned_data.get(name) is not None
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        pagu = cleaned_data.get('pagu_anggaran')
+        bulanan = self.realisasi_per_bulan()
+        if pagu is not None and bulanan and sum(bulanan.values()) > pagu:
+            raise forms.ValidationError('Total realisasi bulanan melebihi pagu anggaran')
+        return cleaned_data
+
+    def save_realisasi_bulanan(self, anggaran):
+        """
+        Upsert bulan yang diisi dan hapus bulan yang dikosongkan (atau milik
+        tahun anggaran lama), masing-masing satu query.
+        """
+        bulanan = self.realisasi_per_bulan()
+        now = timezone.now()
+        RealisasiBulanan.objects.bulk_create(
+            [
+                RealisasiBulanan(
+                    anggaran=anggaran, bulan=bulan, tahun=anggaran.tahun_anggaran,
+                    jumlah_realisasi=jumlah, created_at=now, updated_at=now,
+                )
+                for bulan, jumlah in bulanan.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['anggaran', 'bulan', 'tahun'],
+            update_fields=['jumlah_realisasi', 'updated_at'],
+        )
+        if self.instance.pk and (len(bulanan) < 12 or 'tahun_anggaran' in self.changed_data):
+            anggaran.realisasi_bulanan.filter(
+                ~Q(tahun=anggaran.tahun_anggaran) | ~Q(bulan__in=list(bulanan))
+            ).delete()
+
+
+class ProvinsiFilter(admin.SimpleListFilter):
+    """Filter provinsi dari cache referensi: filter kabupaten_kota_id, tanpa join"""
+    title = 'provinsi'
+    parameter_name = 'provinsi'
+
+    def lookups(self, request, model_admin):
+        return [(obj.id, obj.nama_provinsi) for obj in referensi.get_referensi().provinsi.values()]
+
+    def queryset(self, request, queryset):
+        if not (self.value() or '').isdigit():
+            return queryset
+        ids = referensi.get_referensi().kabupaten_kota_by_provinsi.get(int(self.value()), [])
+        return queryset.filter(kabupaten_kota_id__in=ids)
+
+
+class KategoriFilter(admin.SimpleListFilter):
+    """Filter kategori jenis anggaran dari cache referensi: filter jenis_anggaran_id, tanpa join"""
+    title = 'kategori'
+    parameter_name = 'kategori'
+
+    def lookups(self, request, model_admin):
+        return JenisAnggaran.KATEGORI_CHOICES
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        ids = [obj.id for obj in referensi.get_referensi().jenis_anggaran.values() if obj.kategori == self.value()]
+        return queryset.filter(jenis_anggaran_id__in=ids)
 
 
 @admin.register(AnggaranDaerah)
 class AnggaranDaerahAdmin(admin.ModelAdmin):
+    form = AnggaranDaerahForm
+    # Kolom referensi dibaca dari budget.referensi, sehingga changelist tidak
+    # perlu join kabupaten_kota/program
     list_display = [
-        'kabupaten_kota', 'program', 'tahun_anggaran',
+        'kabkota', 'nama_program', 'tahun_anggaran',
         'pagu_anggaran', 'realisasi_anggaran', 'persentase_realisasi', 'status'
     ]
-    list_filter = ['tahun_anggaran', 'status', 'kabupaten_kota__provinsi', 'jenis_anggaran__kategori']
+    list_filter = ['tahun_anggaran', 'status', ProvinsiFilter, KategoriFilter]
     search_fields = ['kabupaten_kota__nama_kabkota', 'program__nama_program']
     readonly_fields = ['persentase_realisasi', 'sisa_anggaran', 'created_at', 'updated_at']
-    inlines = [RealisasiBulananInline]
+    actions = [
+        'set_status_disetujui', 'set_status_direalisasi', 'set_status_selesai', 'set_status_rencana',
+        'recompute_derived', 'rollup_realisasi',
+    ]
 
     fieldsets = (
         ('Informasi Dasar', {
@@ -68,6 +190,14 @@ class AnggaranDaerahAdmin(admin.ModelAdmin):
         ('Anggaran', {
             'fields': ('pagu_anggaran', 'realisasi_anggaran', 'sisa_anggaran', 'persentase_realisasi')
         }),
+        ('Realisasi Bulanan', {
+            'fields': (
+                ('bulan_01', 'bulan_02', 'bulan_03', 'bulan_04'),
+                ('bulan_05', 'bulan_06', 'bulan_07', 'bulan_08'),
+                ('bulan_09', 'bulan_10', 'bulan_11', 'bulan_12'),
+            ),
+            'description': 'Bila ada bulan yang diisi, realisasi anggaran dihitung dari total realisasi bulanan.',
+        }),
         ('Periode', {
             'fields': ('tanggal_mulai', 'tanggal_selesai')
         }),
@@ -81,13 +211,170 @@ class AnggaranDaerahAdmin(admin.ModelAdmin):
     )
 
 
+    @admin.display(description='Kabupaten/Kota', ordering='kabupaten_kota__nama_kabkota')
+    def kabkota(self, obj):
+        return referensi.kabupaten_kota(obj.kabupaten_kota_id) or obj.kabupaten_kota
+
+    @admin.display(description='Program', ordering='program__nama_program')
+    def nama_program(self, obj):
+        return referensi.program(obj.program_id) or obj.program
+
+    def save_model(self, request, obj, form, change):
+        # Realisasi induk diambil dari grid sebelum disimpan, sehingga sisa dan
+        # persentase ikut dihitung di save() yang sama. changeform_view sudah
+        # membungkus semua ini dalam satu transaksi.
+        bulanan = form.realisasi_per_bulan()
+        if bulanan:
+            obj.realisasi_anggaran = sum(bulanan.values())
+        super().save_model(request, obj, form, change)
+        form.save_realisasi_bulanan(obj)
+
+    # Admin actions massal: UPDATE set-based per batch (lihat budget/bulk.py).
+    # Pilih "select all" di changelist untuk menerapkan ke seluruh hasil filter.
+
+    def _report(self, request, label, result):
+        self.message_user(request, f'{label}: {result}', messages.SUCCESS)
+
+    def _set_status(self, request, queryset, status):
+        sources = ', '.join(bulk.STATUS_TRANSITIONS[status])
+        self._report(request, f'Status {sources} -> {status}', bulk.set_status(queryset, status))
+
+    @admin.action(description='Setujui anggaran terpilih (RENCANA -> DISETUJUI)')
+    def set_status_disetujui(self, request, queryset):
+        self._set_status(request, queryset, 'DISETUJUI')
+
+    @admin.action(description='Tandai direalisasi (DISETUJUI -> DIREALISASI)')
+    def set_status_direalisasi(self, request, queryset):
+        self._set_status(request, queryset, 'DIREALISASI')
+
+    @admin.action(description='Tandai selesai (DIREALISASI -> SELESAI)')
+    def set_status_selesai(self, request, queryset):
+        self._set_status(request, queryset, 'SELESAI')
+
+    @admin.action(description='Kembalikan ke rencana (DISETUJUI -> RENCANA)')
+    def set_status_rencana(self, request, queryset):
+        self._set_status(request, queryset, 'RENCANA')
+
+    @admin.action(description='Hitung ulang sisa dan persentase realisasi')
+    def recompute_derived(self, request, queryset):
+        self._report(request, 'Hitung ulang', bulk.recompute_derived(queryset))
+
+    @admin.action(description='Rollup realisasi bulanan ke realisasi anggaran')
+    def rollup_realisasi(self, request, queryset):
+        self._report(request, 'Rollup realisasi', bulk.rollup_realisasi(queryset))
+
+
 @admin.register(RealisasiBulanan)
 class RealisasiBulananAdmin(admin.ModelAdmin):
     list_display = ['anggaran', 'bulan', 'tahun', 'jumlah_realisasi']
+    # str(anggaran) membaca nama dari cache referensi, cukup join anggaran
+    list_select_related = ['anggaran']
     list_filter = ['tahun', 'bulan']
     search_fields = ['anggaran__kabupaten_kota__nama_kabkota', 'anggaran__program__nama_program']
 
 
+@admin.register(SnapshotTahun)
+class SnapshotTahunAdmin(admin.ModelAdmin):
+    list_display = ['tahun', 'jumlah_anggaran', 'total_pagu', 'total_realisasi', 'archived', 'updated_at']
+    readonly_fields = ['tahun', 'jumlah_anggaran', 'total_pagu', 'total_realisasi', 'archived', 'created_at', 'updated_at']
+
+    # Snapshot dibuat lewat: python manage.py snapshot_tahun <tahun>
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(AnalisisRealisasi)
+class AnalisisRealisasiAdmin(admin.ModelAdmin):
+    list_display = [
+        'nama_kabkota', 'nama_program', 'tahun', 'bulan', 'pagu_anggaran',
+        'persentase_serapan', 'target_serapan', 'persentase_proyeksi', 'peringatan',
+    ]
+    list_filter = ['tahun', 'bulan', 'peringatan', 'nama_provinsi']
+    search_fields = ['nama_kabkota', 'nama_program']
+
+    # Dihitung oleh job analisis_realisasi (lihat budget/analisis.py)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class JobForm(forms.ModelForm):
+    task = forms.ChoiceField(choices=())
+
+    class Meta:
+        model = Job
+        fields = ['task', 'params']
+        help_texts = {
+            'params': 'Argumen task dalam JSON, mis. {"tahun": 2024} atau {"scale": 2}',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'task' in self.fields:
+            self.fields['task'].choices = jobs.task_choices()
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    form = JobForm
+    change_form_template = 'admin/budget/job/change_form.html'
+    list_display = ['id', 'task', 'status', 'progress_bar', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    actions = ['cancel_jobs', 'retry_jobs']
+    readonly_fields = [
+        'status', 'progress', 'progress_message', 'result_display', 'error',
+        'attempts', 'max_attempts', 'run_after', 'worker', 'heartbeat_at',
+        'started_at', 'finished_at', 'created_by', 'created_at',
+    ]
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return ['task', 'params']
+        return ['task', 'params', *self.readonly_fields]
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return []
+        return ['task', 'params', *self.readonly_fields]
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return
+        # max_attempts mengikuti definisi task, sama seperti jobs.enqueue
+        obj.max_attempts = jobs.registered_tasks()[obj.task].max_attempts
+        obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.display(description='Progress')
+    def progress_bar(self, obj):
+        return format_html(
+            '<progress value="{}" max="100" title="{}"></progress> {}%',
+            obj.progress, obj.progress_message, obj.progress,
+        )
+
+    @admin.display(description='Result')
+    def result_display(self, obj):
+        if obj.result is None:
+            return '-'
+        text = json.dumps(obj.result, indent=2, ensure_ascii=False)
+        if obj.status == 'SELESAI' and isinstance(obj.result, dict) and obj.result.get('file'):
+            url = reverse('budget:job-download', args=[obj.pk])
+            return format_html('<a href="{}">Download {}</a><pre>{}</pre>', url, obj.result['file'], text)
+        return format_html('<pre>{}</pre>', text)
+
+    @admin.action(description='Batalkan job yang masih antri')
+    def cancel_jobs(self, request, queryset):
+        count = jobs.cancel(queryset)
+        self.message_user(request, f'{count} job dibatalkan', messages.SUCCESS)
+
+    @admin.action(description='Jalankan ulang job yang gagal/dibatalkan')
+    def retry_jobs(self, request, queryset):
+        count = jobs.retry(queryset)
+        self.message_user(request, f'{count} job diantrikan ulang', messages.SUCCESS)
+
+
 # Custom Admin for Superset Integration (English labels)
 if SupersetInstance and SupersetDashboard:
 
@@ -121,7 +408,7 @@ if SupersetInstance and SupersetDashboard:
 
     @admin.register(SupersetDashboard)
     class SupersetDashboardAdmin(admin.ModelAdmin):
-        list_display = ['name', 'integration_id', 'domain', 'superset_link']
+        list_display = ['name', 'integration_id', 'domain', 'superset_link', 'embed_link']
         list_filter = ['domain']
         search_fields = ['name', 'integration_id']
 
@@ -154,3 +441,11 @@ if SupersetInstance and SupersetDashboard:
                 form.base_fields['superset_link'].label = 'Superset Dashboard Link'
                 form.base_fields['superset_link'].help_text = 'Direct link to dashboard in Superset (optional)'
             return form
+
+        @admin.display(description='Embedded Page')
+        def embed_link(self, obj):
+            dashboard = registry.get_dashboard_by_id(obj.id)
+            if dashboard is None:
+                return '-'
+            url = reverse('budget:dashboard-detail', args=[dashboard.slug])
+            return format_html('<a href="{}" target="_blank">{}</a>', url, url)
@@ -0,0 +1,228 @@
+"""
+Analisis realisasi per kabupaten/kota dan program (tabel analisis_realisasi)
+
+Untuk setiap (tahun, kabkota, program) dan setiap bulan sampai bulan
+realisasi terakhir:
+- kurva serapan: realisasi bulan, kumulatif dan persentase terhadap pagu
+- target serapan: pola musiman realisasi kumulatif tahun-tahun sebelumnya,
+  termasuk tahun yang sudah diarsipkan ke snapshot (linear m/12 bila belum
+  ada riwayat)
+- proyeksi akhir tahun: kumulatif dibagi target serapan bulan tersebut
+- peringatan under-spending bila proyeksi di bawah ANALISIS_PROYEKSI_WASPADA
+  atau ANALISIS_PROYEKSI_KRITIS persen pagu
+
+Satu tahun dihitung dalam beberapa pass: satu query memuat pagu dan 12
+kolom sen (realisasi_seri) semua anggaran ke buffer kolom, satu
+pengelompokan vektor (budget.kolom) menghasilkan matriks grup x 12 bulan,
+lalu kurva dan proyeksi dihitung per grup dengan aritmetika integer sen.
+Refresh incremental: hanya baris yang berubah (mis. bulan baru) yang
+di-upsert, baris yang tidak berlaku lagi dihapus. Tahun yang sudah
+diarsipkan (SnapshotTahun.archived) tidak punya baris live lagi, sehingga
+analisisnya dibekukan: refresh melewati tahun tersebut.
+"""
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import kolom, referensi, routers
+from .models import AnalisisRealisasi, AnggaranDaerah, RealisasiSeri, SnapshotAnggaran, SnapshotTahun
+from .transaksi import on_commit_once
+
+
+BULAN = range(1, 13)
+
+# Target serapan dalam ppm (1_000_000 = 100%)
+PPM = 1_000_000
+
+# Batas bawah target (1%), agar bulan yang historisnya hampir nol tidak
+# menghasilkan proyeksi yang meledak
+MIN_TARGET_PPM = 10_000
+
+COLUMNS = {
+    'kabkota': F('kabupaten_kota_id'),
+    'program': F('program_id'),
+    'pagu': kolom.sen('pagu_anggaran'),
+    **{name: Coalesce(F(f'realisasi_seri__{name}'), 0) for name in RealisasiSeri.KOLOM_BULAN},
+}
+
+VALUE_FIELDS = [
+    'kode_provinsi', 'nama_provinsi', 'kode_kabkota', 'nama_kabkota', 'kode_program', 'nama_program',
+    'jumlah_anggaran', 'pagu_anggaran', 'realisasi_bulan', 'realisasi_kumulatif',
+    'persentase_serapan', 'target_serapan', 'proyeksi_akhir_tahun', 'persentase_proyeksi', 'peringatan',
+]
+
+# Batas kolom DecimalField(7, 2)
+MAX_PERSEN = Decimal('99999.99')
+
+_pending = threading.local()
+
+
+def _arsip(tahun_list):
+    """Tahun-tahun dalam tahun_list yang sudah diarsipkan ke snapshot"""
+    return set(
+        SnapshotTahun.objects.filter(tahun__in=tahun_list, archived=True).values_list('tahun', flat=True)
+    )
+
+
+def target_serapan(tahun):
+    """
+    Target serapan kumulatif per bulan (12 nilai ppm) dari realisasi
+    tahun-tahun sebelumnya. Dua query agregat: realisasi_seri untuk tahun
+    yang masih live, anggaran_snapshot (realisasi_01..12 dalam sen) untuk
+    tahun yang sudah diarsipkan. Linear bila belum ada riwayat.
+    """
+    arsip = SnapshotTahun.objects.filter(tahun__lt=tahun, archived=True).values('tahun')
+    live = RealisasiSeri.objects.filter(tahun__lt=tahun).exclude(tahun__in=arsip).total_bulanan()
+    snapshot = SnapshotAnggaran.objects.filter(snapshot__archived=True, tahun_anggaran__lt=tahun).aggregate(
+        **{f'realisasi_{bulan:02d}': Sum(kolom.sen(f'realisasi_{bulan:02d}')) for bulan in BULAN}
+    )
+    kumulatif = list(accumulate(
+        nilai + (snapshot[f'realisasi_{bulan:02d}'] or 0) for bulan, nilai in zip(BULAN, live)
+    ))
+    if kumulatif[-1] <= 0:
+        return [bulan * PPM // 12 for bulan in BULAN]
+    return [max(nilai * PPM // kumulatif[-1], MIN_TARGET_PPM) for nilai in kumulatif]
+
+
+def _peringatan(persen_proyeksi, bulan):
+    if bulan < settings.ANALISIS_BULAN_MIN_PERINGATAN:
+        return ''
+    if persen_proyeksi < settings.ANALISIS_PROYEKSI_KRITIS:
+        return 'KRITIS'
+    if persen_proyeksi < settings.ANALISIS_PROYEKSI_WASPADA:
+        return 'WASPADA'
+    return ''
+
+
+def _persen(bagian, total):
+    return min(kolom.persen(bagian, total), MAX_PERSEN)
+
+
+def hitung(tahun):
+    """
+    Hitung baris analisis satu tahun.
+    Return {(kabkota_id, program_id, bulan): {field: nilai}}.
+    """
+    buffers = kolom.load(AnggaranDaerah.objects.filter(tahun_anggaran=tahun), COLUMNS)
+    if not len(buffers):
+        return {}
+    groups = buffers.group_sum(['kabkota', 'program'], ['pagu', *RealisasiSeri.KOLOM_BULAN])
+
+    # Bulan realisasi terakhir tahun ini (kolom sen terakhir yang terisi)
+    totals = [buffers.total(name) for name in RealisasiSeri.KOLOM_BULAN]
+    terakhir = max((bulan for bulan, total in zip(BULAN, totals) if total), default=0)
+    if not terakhir:
+        return {}
+
+    target = target_serapan(tahun)
+    data_referensi = referensi.get_referensi()
+    if any(
+        key[0] not in data_referensi.kabupaten_kota or key[1] not in data_referensi.program
+        for key in groups
+    ):
+        # Ada referensi baru yang belum terlihat oleh proses ini
+        data_referensi = referensi.reload()
+
+    rows = {}
+    for (kabkota_id, program_id), (jumlah, (pagu, *bulanan)) in groups.items():
+        kabkota = data_referensi.kabupaten_kota[kabkota_id]
+        program = data_referensi.program[program_id]
+        names = {
+            'kode_provinsi': kabkota.provinsi.kode_provinsi,
+            'nama_provinsi': kabkota.provinsi.nama_provinsi,
+            'kode_kabkota': kabkota.kode_kabkota,
+            'nama_kabkota': kabkota.nama_kabkota,
+            'kode_program': program.kode_program,
+            'nama_program': program.nama_program,
+        }
+        for bulan, nilai, kumulatif, target_ppm in zip(BULAN, bulanan, accumulate(bulanan), target):
+            if bulan > terakhir:
+                break
+            # Pembulatan setengah ke atas, tetap dalam integer sen
+            proyeksi = (kumulatif * PPM * 2 + target_ppm) // (target_ppm * 2)
+            persen_proyeksi = _persen(proyeksi, pagu)
+            rows[(kabkota_id, program_id, bulan)] = {
+                **names,
+                'jumlah_anggaran': jumlah,
+                'pagu_anggaran': kolom.rupiah(pagu),
+                'realisasi_bulan': kolom.rupiah(nilai),
+                'realisasi_kumulatif': kolom.rupiah(kumulatif),
+                'persentase_serapan': _persen(kumulatif, pagu),
+                'target_serapan': kolom.persen(target_ppm, PPM),
+                'proyeksi_akhir_tahun': kolom.rupiah(proyeksi),
+                'persentase_proyeksi': persen_proyeksi,
+                'peringatan': _peringatan(persen_proyeksi, bulan) if pagu > 0 else '',
+            }
+    return rows
+
+
+def refresh(tahun, batch_size=2000):
+    """
+    Perbarui analisis_realisasi satu tahun: upsert baris baru/berubah dan
+    hapus baris yang tidak berlaku lagi. Return {'upserted': n, 'deleted': n}
+    (plus 'archived': True bila tahun sudah diarsipkan dan dilewati).
+    """
+    existing = {}
+    stale = []
+    # Dijalankan tepat setelah perubahan: baca dari primary, bukan replica
+    with routers.use_primary():
+        if _arsip([tahun]):
+            # Baris live sudah dihapus saat diarsipkan; hitung() akan kosong
+            # dan menghapus seluruh analisis tahun ini
+            return {'upserted': 0, 'deleted': 0, 'archived': True}
+        rows = hitung(tahun)
+        for pk, kabkota_id, program_id, bulan, *values in AnalisisRealisasi.objects.filter(tahun=tahun).values_list(
+            'pk', 'kabupaten_kota_id', 'program_id', 'bulan', *VALUE_FIELDS
+        ):
+            key = (kabkota_id, program_id, bulan)
+            if key in rows:
+                existing[key] = values
+            else:
+                stale.append(pk)
+
+    now = timezone.now()
+    changed = [
+        AnalisisRealisasi(
+            tahun=tahun, bulan=key[2], kabupaten_kota_id=key[0], program_id=key[1], updated_at=now, **values
+        )
+        for key, values in rows.items()
+        if existing.get(key) != [values[field] for field in VALUE_FIELDS]
+    ]
+
+    with transaction.atomic():
+        for i in range(0, len(stale), batch_size):
+            AnalisisRealisasi.objects.filter(pk__in=stale[i:i + batch_size]).delete()
+        AnalisisRealisasi.objects.bulk_create(
+            changed,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['tahun', 'kabupaten_kota', 'program', 'bulan'],
+            update_fields=[*VALUE_FIELDS, 'updated_at'],
+        )
+    return {'upserted': len(changed), 'deleted': len(stale)}
+
+
+def schedule(tahun_list):
+    """Jadwalkan refresh analisis tahun-tahun ini setelah transaksi commit"""
+    pending = getattr(_pending, 'tahun', None)
+    if pending is None:
+        pending = _pending.tahun = set()
+    pending.update(tahun_list)
+
+    on_commit_once(_flush)
+
+
+def _flush():
+    from . import jobs
+    tahun_list = getattr(_pending, 'tahun', None) or set()
+    _pending.tahun = None
+    run_after = timezone.now() + timedelta(seconds=settings.ANALISIS_REFRESH_DELAY_SECONDS)
+    for tahun in sorted(set(tahun_list) - _arsip(tahun_list)):
+        jobs.enqueue_unique('analisis_realisasi', {'tahun': tahun}, run_after=run_after)
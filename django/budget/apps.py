@@ -5,3 +5,6 @@ class BudgetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'budget'
     verbose_name = 'Anggaran Daerah'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,573 @@
+"""
+Harness benchmark untuk hot path integrasi Django-Superset
+
+Dipakai oleh management command `benchmark`. Setiap skenario didaftarkan
+dengan decorator @scenario, menerima BenchContext, dan men-yield pasangan
+(nama, callable, iterasi) - satu callable mengeksekusi satu request.
+Harness mengukur latency (p50/p95/p99), throughput dan jumlah query SQL
+per request.
+"""
+import io
+import json
+import random
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import override_settings
+
+from .models import (
+    Provinsi, KabupatenKota, ProgramKegiatan,
+    JenisAnggaran, AnggaranDaerah, RealisasiBulanan, RealisasiSeri,
+)
+from . import columnar, kolom, realisasi_seri, tokens
+
+
+SCENARIOS = {}
+
+
+def scenario(name, group='default'):
+    """Daftarkan fungsi setup skenario benchmark"""
+    def decorator(func):
+        SCENARIOS[name] = {'setup': func, 'group': group}
+        return func
+    return decorator
+
+
+@dataclass
+class BenchResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    throughput_rps: float
+    queries_per_request: float
+    extra: dict = field(default_factory=dict)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class BenchContext:
+    client: object
+    options: dict
+    stub: object = None
+
+
+def percentiles(samples):
+    """p50/p95/p99 dari daftar sampel (detik), hasil dalam milidetik"""
+    if len(samples) == 1:
+        value = samples[0] * 1000
+        return value, value, value
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+
+class QueryCounter:
+    """execute_wrapper yang menghitung query tanpa batas panjang query log"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run(name, func, iterations, warmup=3, extra=None):
+    """Jalankan func sebanyak iterations kali dan kumpulkan statistiknya"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = percentiles(samples)
+    return BenchResult(
+        name=name,
+        iterations=iterations,
+        p50_ms=round(p50, 3),
+        p95_ms=round(p95, 3),
+        p99_ms=round(p99, 3),
+        mean_ms=round(statistics.fmean(samples) * 1000, 3),
+        throughput_rps=round(iterations / elapsed, 1) if elapsed else 0.0,
+        queries_per_request=round(counter.count / iterations, 2),
+        extra=extra or {},
+    )
+
+
+def compare(results, baseline, tolerance):
+    """
+    Bandingkan hasil dengan baseline.
+    Return daftar (name, metric, baseline, current) yang melewati toleransi.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        if result.p95_ms > base['p95_ms'] * (1 + tolerance):
+            regressions.append((result.name, 'p95_ms', base['p95_ms'], result.p95_ms))
+        if result.queries_per_request > base['queries_per_request']:
+            regressions.append((
+                result.name, 'queries_per_request',
+                base['queries_per_request'], result.queries_per_request,
+            ))
+    return regressions
+
+
+def load_baseline(path):
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({r.name: r.as_dict() for r in results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def http_load(name, url, concurrency, duration, timeout=10):
+    """
+    Load test HTTP sederhana terhadap server yang sedang berjalan:
+    `concurrency` thread dengan koneksi keep-alive selama `duration` detik.
+    """
+    import requests
+
+    samples = []
+    errors = []
+    shed = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local_samples = []
+        local_errors = 0
+        local_shed = 0
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    status = session.get(url, timeout=timeout).status_code
+                except requests.RequestException:
+                    status = 0
+                local_samples.append(time.perf_counter() - t0)
+                # 429: ditolak rate limit/admission control (budget/ratelimit.py)
+                local_shed += status == 429
+                local_errors += not 0 < status < 400 and status != 429
+        with lock:
+            samples.extend(local_samples)
+            errors.append(local_errors)
+            shed.append(local_shed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if not samples:
+        samples = [float(duration)]
+    p50, p95, p99 = percentiles(samples)
+    return BenchResult(
+        name=name,
+        iterations=len(samples),
+        p50_ms=round(p50, 3),
+        p95_ms=round(p95, 3),
+        p99_ms=round(p99, 3),
+        mean_ms=round(statistics.fmean(samples) * 1000, 3),
+        throughput_rps=round(len(samples) / elapsed, 1),
+        queries_per_request=0.0,
+        extra={'errors': sum(errors), 'shed': sum(shed), 'concurrency': concurrency, 'url': url},
+    )
+
+
+class SupersetStubHandler(BaseHTTPRequestHandler):
+    """Stub minimal untuk endpoint security API Superset"""
+
+    def _send_json(self, payload):
+        latency = self.server.latency
+        if latency:
+            time.sleep(latency)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.calls += 1
+        if self.path.startswith('/api/v1/security/csrf_token/'):
+            return self._send_json({'result': 'stub-csrf-token'})
+        if self.path.startswith('/health'):
+            return self._send_json({'status': 'OK'})
+        self.send_error(404)
+
+    def do_POST(self):
+        self.server.calls += 1
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if self.path.startswith('/api/v1/security/login'):
+            return self._send_json({'access_token': 'stub-access-token'})
+        if self.path.startswith('/api/v1/security/guest_token/'):
+            return self._send_json({'token': 'stub-guest-token'})
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SupersetStub:
+    """Server stub Superset di thread terpisah, listen di 127.0.0.1"""
+
+    def __init__(self, latency_ms=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), SupersetStubHandler)
+        self.server.latency = latency_ms / 1000
+        self.server.calls = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def address(self):
+        host, port = self.server.server_address
+        return f"{host}:{port}"
+
+    @property
+    def calls(self):
+        return self.server.calls
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Data seeding
+# ---------------------------------------------------------------------------
+
+def ensure_reference_data():
+    """Data referensi minimal untuk seeding anggaran dalam jumlah besar"""
+    provinsi, _ = Provinsi.objects.get_or_create(kode_provinsi='99', defaults={'nama_provinsi': 'Provinsi Benchmark'})
+    kabkota = [
+        KabupatenKota.objects.get_or_create(
+            kode_kabkota=f'99{i:02d}',
+            defaults={'provinsi': provinsi, 'nama_kabkota': f'Benchmark {i}', 'jenis': 'KABUPATEN'},
+        )[0]
+        for i in range(20)
+    ]
+    programs = [
+        ProgramKegiatan.objects.get_or_create(kode_program=f'9.99.{i:02d}', defaults={'nama_program': f'Program Benchmark {i}'})[0]
+        for i in range(10)
+    ]
+    jenis = [
+        JenisAnggaran.objects.get_or_create(
+            kode_jenis=f'9.9.{i}',
+            defaults={'nama_jenis': f'Jenis Benchmark {i}', 'kategori': kategori},
+        )[0]
+        for i, (kategori, _) in enumerate(JenisAnggaran.KATEGORI_CHOICES)
+    ]
+    return kabkota, programs, jenis
+
+
+def seed_anggaran(rows, batch_size=5000):
+    """Top-up tabel anggaran_daerah sampai berisi minimal `rows` baris"""
+    existing = AnggaranDaerah.objects.count()
+    if existing >= rows:
+        return existing
+
+    kabkota, programs, jenis = ensure_reference_data()
+    rng = random.Random(rows)
+    statuses = [choice for choice, _ in AnggaranDaerah.STATUS_CHOICES]
+
+    remaining = rows - existing
+    while remaining > 0:
+        batch = []
+        for _ in range(min(batch_size, remaining)):
+            tahun = rng.choice([2023, 2024, 2025])
+            pagu = Decimal(rng.randint(100_000_000, 10_000_000_000))
+            realisasi = (pagu * Decimal(rng.randint(0, 100)) / 100).quantize(Decimal('0.01'))
+            batch.append(AnggaranDaerah(
+                kabupaten_kota=rng.choice(kabkota),
+                program=rng.choice(programs),
+                jenis_anggaran=rng.choice(jenis),
+                tahun_anggaran=tahun,
+                pagu_anggaran=pagu,
+                realisasi_anggaran=realisasi,
+                sisa_anggaran=pagu - realisasi,
+                persentase_realisasi=(realisasi / pagu * 100).quantize(Decimal('0.01')),
+                status=rng.choice(statuses),
+                tanggal_mulai=date(tahun, 1, 1),
+                tanggal_selesai=date(tahun, 12, 31),
+            ))
+        AnggaranDaerah.objects.bulk_create(batch, batch_size=batch_size)
+        remaining -= len(batch)
+    return rows
+
+
+def seed_realisasi(rows, batch_size=5000):
+    """Realisasi 12 bulan untuk setiap anggaran yang belum punya, plus baris seri-nya"""
+    seed_anggaran(rows)
+    missing = AnggaranDaerah.objects.filter(realisasi_bulanan__isnull=True).values_list(
+        'id', 'tahun_anggaran', 'realisasi_anggaran'
+    )
+    batch = []
+    for anggaran_id, tahun, realisasi in missing.iterator(chunk_size=batch_size):
+        per_bulan = (realisasi / 12).quantize(Decimal('0.01'))
+        batch.extend(
+            RealisasiBulanan(anggaran_id=anggaran_id, bulan=bulan, tahun=tahun, jumlah_realisasi=per_bulan)
+            for bulan in range(1, 13)
+        )
+        if len(batch) >= batch_size:
+            RealisasiBulanan.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    if batch:
+        RealisasiBulanan.objects.bulk_create(batch, batch_size=batch_size)
+    realisasi_seri.rebuild()
+
+
+# ---------------------------------------------------------------------------
+# Skenario
+# ---------------------------------------------------------------------------
+
+@scenario('index', group='web')
+def index_scenario(ctx):
+    seed_anggaran(ctx.options['rows'])
+    yield 'index', lambda: ctx.client.get('/'), ctx.options['iterations']
+
+
+@scenario('guest-token-direct', group='web')
+def guest_token_direct_scenario(ctx):
+    yield (
+        'guest-token-direct',
+        lambda: ctx.client.get('/guest-token/bd3a437e-a613-4fe2-ac77-937ae03e5e94/'),
+        ctx.options['iterations'],
+    )
+
+
+@scenario('guest-token-superset', group='web')
+def guest_token_superset_scenario(ctx):
+    from django_superset_integration.models import SupersetInstance, SupersetDashboard
+
+    instance, _ = SupersetInstance.objects.get_or_create(address=ctx.stub.address, defaults={'username': 'admin'})
+    instance.set_password('admin')
+    instance.save()
+    dashboard, _ = SupersetDashboard.objects.get_or_create(
+        name='Benchmark Dashboard',
+        defaults={'integration_id': 'benchmark-dashboard', 'domain': instance},
+    )
+    url = f'/superset_integration/guest_token/{dashboard.id}'
+    yield 'guest-token-superset', lambda: ctx.client.get(url), ctx.options['iterations']
+
+
+@scenario('token', group='web')
+def token_scenario(ctx):
+    """
+    Sign/verify guest token per algoritma tanpa HTTP (throughput = token/detik),
+    PyJWT dari nol sebagai pembanding, dan endpoint introspect
+    """
+    import jwt
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    def pem(private_key):
+        # PyJWT dari nol menerima PEM, seperti kunci dari settings/file
+        return private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+
+    dashboard_id = 'bd3a437e-a613-4fe2-ac77-937ae03e5e94'
+    iterations = ctx.options['iterations'] * 20
+    claims = tokens.guest_claims(dashboard_id, int(time.time()))
+    keys = [
+        ('hs256', settings.SUPERSET_SECRET_KEY, 'HS256'),
+        ('rs256', pem(rsa.generate_private_key(public_exponent=65537, key_size=2048)), 'RS256'),
+        ('eddsa', pem(ed25519.Ed25519PrivateKey.generate()), 'EdDSA'),
+    ]
+    for name, spec, algorithm in keys:
+        keyring = tokens.KeyRing(tokens.load_key(spec, algorithm))
+        token = tokens.sign(claims, keyring)
+        yield f'token-sign-{name}', lambda keyring=keyring: tokens.sign(claims, keyring), iterations
+        yield f'token-verify-{name}', lambda keyring=keyring, token=token: tokens.verify(token, keyring), iterations
+        yield (
+            f'token-sign-pyjwt-{name}',
+            lambda spec=spec, algorithm=algorithm: jwt.encode(claims, spec, algorithm=algorithm),
+            iterations,
+        )
+        yield (
+            f'token-issue-{name}',
+            lambda keyring=keyring: tokens.issue(dashboard_id, keyring),
+            iterations,
+        )
+
+    token, _ = tokens.issue(dashboard_id)
+    yield (
+        'token-introspect',
+        lambda: ctx.client.post('/api/token/introspect/', {'token': token}),
+        ctx.options['iterations'],
+    )
+
+
+@scenario('ratelimit', group='web')
+def ratelimit_scenario(ctx):
+    """Overhead rate limit + admission control pada guest token (bucket tidak pernah habis)"""
+    url = '/guest-token/bd3a437e-a613-4fe2-ac77-937ae03e5e94/'
+    limits = {
+        'RATE_LIMIT_ENABLED': True,
+        'RATE_LIMIT_IP': '1000000:1000000',
+        'RATE_LIMIT_DASHBOARD': '1000000:1000000',
+        'RATE_LIMIT_GLOBAL': '1000000:1000000',
+    }
+    with override_settings(**limits):
+        yield 'ratelimit-guest-token', lambda: ctx.client.get(url), ctx.options['iterations']
+    with override_settings(**{**limits, 'RATE_LIMIT_IP': '1:1'}):
+        yield 'ratelimit-guest-token-429', lambda: ctx.client.get(url), ctx.options['iterations']
+
+
+@scenario('dashboard', group='web')
+def dashboard_scenario(ctx):
+    yield 'dashboard', lambda: ctx.client.get('/dashboard/'), ctx.options['iterations']
+
+
+@scenario('admin-changelist', group='admin')
+def admin_changelist_scenario(ctx):
+    User = get_user_model()
+    user, created = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True, 'is_superuser': True})
+    if created:
+        user.set_password('benchmark')
+        user.save()
+    ctx.client.force_login(user)
+
+    for rows in ctx.options['admin_rows']:
+        seed_anggaran(rows)
+        iterations = max(ctx.options['iterations'] // 10, 5)
+        yield (
+            f'admin-changelist-{rows}',
+            lambda: ctx.client.get('/admin/budget/anggarandaerah/'),
+            iterations,
+        )
+        yield (
+            f'admin-changelist-filtered-{rows}',
+            lambda: ctx.client.get('/admin/budget/anggarandaerah/?tahun_anggaran=2024&status__exact=DIREALISASI'),
+            iterations,
+        )
+
+
+@scenario('load-dummy-data', group='load')
+def load_dummy_data_scenario(ctx):
+    def load(scale):
+        # Seed tetap agar jumlah baris (dan query) sebanding antar run
+        random.seed(scale)
+        call_command('load_dummy_data', scale=scale, stdout=io.StringIO())
+
+    for scale in ctx.options['scales']:
+        yield f'load-dummy-data-x{scale}', lambda scale=scale: load(scale), 1
+
+
+@scenario('aggregate', group='aggregate')
+def aggregate_scenario(ctx):
+    seed_anggaran(ctx.options['rows'])
+
+    def per_tahun_provinsi():
+        return list(
+            AnggaranDaerah.objects
+            .values('tahun_anggaran', 'kabupaten_kota__provinsi__nama_provinsi')
+            .annotate(pagu=Sum('pagu_anggaran'), realisasi=Sum('realisasi_anggaran'))
+        )
+
+    def per_kategori():
+        return list(
+            AnggaranDaerah.objects
+            .values('jenis_anggaran__kategori')
+            .annotate(pagu=Sum('pagu_anggaran'), realisasi=Sum('realisasi_anggaran'))
+        )
+
+    yield 'aggregate-tahun-provinsi', per_tahun_provinsi, ctx.options['iterations']
+    yield 'aggregate-kategori', per_kategori, ctx.options['iterations']
+
+
+@scenario('aggregate-columnar', group='aggregate')
+def aggregate_columnar_scenario(ctx):
+    """Agregasi yang sama dengan skenario aggregate, dibaca dari salinan DuckDB/Parquet"""
+    if not columnar.available():
+        return
+    seed_anggaran(ctx.options['rows'])
+    with tempfile.TemporaryDirectory() as directory, override_settings(COLUMNAR_DIR=directory):
+        columnar.sync(full=True)
+        yield (
+            'aggregate-columnar-tahun-provinsi',
+            lambda: columnar.aggregate('tahun', 'provinsi'),
+            ctx.options['iterations'],
+        )
+        yield 'aggregate-columnar-kategori', lambda: columnar.aggregate('kategori'), ctx.options['iterations']
+
+
+@scenario('aggregate-kolom', group='aggregate')
+def aggregate_kolom_scenario(ctx):
+    """Agregasi yang sama atas buffer int64 sen (budget.kolom), setelah dimuat sekali"""
+    seed_anggaran(ctx.options['rows'])
+    yield 'aggregate-kolom-load', kolom.load_anggaran, max(ctx.options['iterations'] // 10, 3)
+
+    buffers = kolom.load_anggaran()
+    yield (
+        'aggregate-kolom-tahun-provinsi',
+        lambda: kolom.ringkasan(buffers, 'tahun', 'provinsi'),
+        ctx.options['iterations'],
+    )
+    yield 'aggregate-kolom-jenis', lambda: kolom.ringkasan(buffers, 'jenis'), ctx.options['iterations']
+    yield 'aggregate-kolom-sebaran', lambda: kolom.sebaran_persentase(buffers), ctx.options['iterations']
+
+
+@scenario('realisasi-series', group='aggregate')
+def realisasi_series_scenario(ctx):
+    seed_realisasi(ctx.options['rows'])
+
+    def kumulatif_bulanan():
+        # Cara lama: agregasi per bulan atas realisasi_bulanan lalu akumulasi
+        rows = (
+            RealisasiBulanan.objects
+            .filter(tahun=2024)
+            .values('bulan')
+            .annotate(total=Sum('jumlah_realisasi'))
+            .order_by('bulan')
+        )
+        total = Decimal(0)
+        return [total := total + row['total'] for row in rows]
+
+    def kumulatif_seri():
+        return RealisasiSeri.objects.tahun(2024).kumulatif()
+
+    def series_seri():
+        return list(RealisasiSeri.objects.tahun(2024).series())
+
+    yield 'realisasi-kumulatif-bulanan', kumulatif_bulanan, ctx.options['iterations']
+    yield 'realisasi-kumulatif-seri', kumulatif_seri, ctx.options['iterations']
+    yield 'realisasi-series-seri', series_seri, ctx.options['iterations']
@@ -0,0 +1,146 @@
+"""
+Operasi massal set-based untuk AnggaranDaerah (dipakai admin actions)
+
+Setiap operasi berjalan per batch primary key: satu UPDATE per batch dalam
+transaksi pendek, sehingga lock baris tidak ditahan lama. QuerySet.update()
+tidak memanggil save() maupun signal, jadi purge edge cache, notifikasi SSE
+dan refresh mv_laporan_anggaran dijalankan di sini secara eksplisit.
+"""
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from . import columnar, edge_cache, events, jobs
+from .models import AnggaranDaerah, RealisasiBulanan
+
+
+# Status tujuan -> status asal yang diizinkan
+STATUS_TRANSITIONS = {
+    'DISETUJUI': ['RENCANA'],
+    'DIREALISASI': ['DISETUJUI'],
+    'SELESAI': ['DIREALISASI'],
+    'RENCANA': ['DISETUJUI'],
+}
+
+
+@dataclass
+class BulkResult:
+    selected: int = 0
+    updated: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def skipped(self):
+        return self.selected - self.updated
+
+    def __str__(self):
+        text = f'{self.updated} dari {self.selected} anggaran diperbarui'
+        if self.skipped:
+            text += f' ({self.skipped} dilewati)'
+        return f'{text} dalam {self.seconds:.2f}s, {self.batches} batch'
+
+
+def _batched(queryset, update, batch_size=None):
+    """Jalankan update(pk_list) -> jumlah baris, per batch dalam transaksi terpisah"""
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    start = time.perf_counter()
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    result = BulkResult(selected=len(pks))
+
+    for i in range(0, len(pks), batch_size):
+        chunk = pks[i:i + batch_size]
+        with transaction.atomic():
+            updated = update(chunk)
+            if updated:
+                _after_update(chunk)
+        result.updated += updated
+        result.batches += 1
+
+    if result.updated:
+        jobs.enqueue_unique('refresh_laporan')
+        columnar.schedule()
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _after_update(pks):
+    """Pengganti signal post_save untuk baris yang di-update massal"""
+    edge_cache.purge('anggaran')
+    changed = (
+        AnggaranDaerah.objects
+        .filter(pk__in=pks)
+        .values_list('tahun_anggaran', 'kabupaten_kota_id')
+        .order_by()
+        .distinct()
+    )
+    for tahun, kabkota_id in changed:
+        events.notify(tahun, kabkota_id)
+
+
+def _derived_fields():
+    """sisa_anggaran dan persentase_realisasi, sama dengan AnggaranDaerah.save()"""
+    return {
+        'sisa_anggaran': F('pagu_anggaran') - F('realisasi_anggaran'),
+        'persentase_realisasi': Case(
+            When(
+                pagu_anggaran__gt=0,
+                then=Round(F('realisasi_anggaran') * 100 / F('pagu_anggaran'), 2),
+            ),
+            default=F('persentase_realisasi'),
+            output_field=DecimalField(max_digits=5, decimal_places=2),
+        ),
+        'updated_at': timezone.now(),
+    }
+
+
+def set_status(queryset, status, batch_size=None):
+    """Ubah status; hanya baris dengan status asal yang valid yang diperbarui"""
+    sources = STATUS_TRANSITIONS[status]
+
+    def update(pks):
+        return AnggaranDaerah.objects.filter(pk__in=pks, status__in=sources).update(
+            status=status, updated_at=timezone.now()
+        )
+    return _batched(queryset, update, batch_size)
+
+
+def recompute_derived(queryset, batch_size=None):
+    """Hitung ulang sisa_anggaran dan persentase_realisasi dari pagu dan realisasi"""
+    def update(pks):
+        return AnggaranDaerah.objects.filter(pk__in=pks).update(**_derived_fields())
+    return _batched(queryset, update, batch_size)
+
+
+def rollup_realisasi(queryset, batch_size=None):
+    """
+    realisasi_anggaran = total realisasi bulanan, lalu hitung ulang field
+    turunannya. Dua UPDATE dalam satu transaksi per batch, karena SET pada
+    satu UPDATE membaca nilai realisasi_anggaran yang lama.
+    """
+    total_bulanan = (
+        RealisasiBulanan.objects
+        .filter(anggaran=OuterRef('pk'))
+        .order_by()
+        .values('anggaran')
+        .annotate(total=Sum('jumlah_realisasi'))
+        .values('total')
+    )
+
+    def update(pks):
+        rows = AnggaranDaerah.objects.filter(pk__in=pks)
+        updated = rows.update(
+            realisasi_anggaran=Coalesce(
+                Subquery(total_bulanan),
+                Value(0),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )
+        )
+        rows.update(**_derived_fields())
+        return updated
+    return _batched(queryset, update, batch_size)
@@ -0,0 +1,62 @@
+"""
+Cache in-process yang divalidasi lewat nomor versi di shared cache
+
+Dipakai budget.registry dan budget.referensi: data kecil yang jarang berubah
+dimuat sekali per proses, lalu dibaca tanpa query di hot path.
+- invalidate() mengosongkan salinan lokal dan menaikkan versi di cache
+  default (Redis bila REDIS_URL diset); panggil setelah transaksi commit
+- proses lain membandingkan versi tersebut paling sering sekali per
+  interval detik, dan memuat ulang bila berbeda
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from . import metrics
+
+
+class VersionedCache:
+    def __init__(self, version_key, load, interval):
+        self.version_key = version_key
+        self.load = load
+        self.interval = interval
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _shared_version(self):
+        return cache.get(self.version_key, 0)
+
+    def get(self):
+        """Nilai saat ini; dimuat ulang bila kosong atau versinya berubah"""
+        now = time.monotonic()
+        value = self._value
+        if value is not None and now - self._checked_at < self.interval:
+            metrics.record_cache(hit=True)
+            return value
+
+        with self._lock:
+            version = self._shared_version()
+            self._checked_at = now
+            if self._value is None or version != self._version:
+                metrics.record_cache(hit=False)
+                self._value = self.load()
+                self._version = version
+            else:
+                metrics.record_cache(hit=True)
+            return self._value
+
+    def clear(self):
+        """Kosongkan salinan lokal saja; dimuat ulang pada get() berikutnya"""
+        with self._lock:
+            self._value = None
+
+    def invalidate(self):
+        """Kosongkan salinan lokal dan beri tahu proses lain lewat shared cache"""
+        self.clear()
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, 1, None)
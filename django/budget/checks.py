@@ -0,0 +1,32 @@
+"""
+System check konfigurasi yang tidak bisa dideteksi dari kode
+
+Versi registry/referensi, state circuit breaker dan token bucket rate limit
+dibagi antar proses lewat cache default. Dengan LocMemCache/DummyCache
+(REDIS_URL kosong) invalidation dari satu worker tidak pernah sampai ke
+worker lain: perubahan admin baru terlihat setelah restart.
+"""
+from django.conf import settings
+from django.core import checks
+
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [checks.Warning(
+        'Cache default tidak dibagi antar proses (%s)' % backend.rsplit('.', 1)[-1],
+        hint=(
+            'Set REDIS_URL bila Django berjalan dengan lebih dari satu proses '
+            '(gunicorn worker, jobworker): tanpa itu invalidation registry/referensi, '
+            'circuit breaker dan rate limit hanya berlaku di proses yang mengubahnya.'
+        ),
+        id='budget.W001',
+    )]
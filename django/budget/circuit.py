@@ -0,0 +1,219 @@
+"""
+Circuit breaker per SupersetInstance untuk call Superset di jalur request
+
+Tanpa breaker, Superset yang lambat atau mati membuat setiap request guest
+token menunggu timeout sambil menahan thread worker. Setelah
+SUPERSET_BREAKER_FAILURES kegagalan berturut-turut (timeout, error koneksi,
+HTTP 5xx) breaker terbuka: call berikutnya ditolak tanpa I/O dan view
+melayani mode degraded (token terakhir yang masih valid, atau ringkasan
+data anggaran, lihat views_superset dan views.dashboard). Setelah
+SUPERSET_BREAKER_RESET_SECONDS satu request dibiarkan lewat sebagai probe
+(half-open); bila berhasil breaker tertutup lagi, bila gagal terbuka lagi.
+
+Halaman dashboard sendiri tidak memanggil Superset (guest token ditandatangani
+lokal), jadi probe_health() memanggil /health instance dengan timeout pendek
+bila breaker belum mendapat sinyal apa pun selama SUPERSET_HEALTH_INTERVAL
+detik (lebih sering selama ada kegagalan yang belum membuka breaker). Hanya
+satu thread per proses yang melakukan probe; request lain memakai state saat ini.
+
+State disimpan per proses. Saat terbuka, waktu buka juga ditulis ke shared
+cache sehingga worker lain ikut terbuka tanpa harus mengalami timeout
+sendiri; proses membaca key tersebut paling sering sekali per
+SUPERSET_BREAKER_SYNC_INTERVAL detik (seperti versi registry).
+
+Setiap perubahan state yang dicatat proses ini mem-purge surrogate key
+'dashboard' di edge cache: halaman embed yang tersimpan tidak disajikan
+selama Superset mati, dan embed kembali segera setelah breaker tertutup.
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import edge_cache, metrics
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'budget:superset_breaker'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=None, reset_seconds=None):
+        self.name = str(name)
+        self.failure_threshold = failure_threshold or settings.SUPERSET_BREAKER_FAILURES
+        self.reset_seconds = reset_seconds or settings.SUPERSET_BREAKER_RESET_SECONDS
+        self.state = CLOSED
+        self.failures = 0
+        # time.time(), bukan monotonic: dibandingkan dengan nilai dari proses lain
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        # time.monotonic() sinyal terakhir (call sungguhan atau probe /health)
+        self.checked_at = 0.0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        return f'{KEY_PREFIX}:{self.name}'
+
+    def _sync(self):
+        """Ikut terbuka bila proses lain membuka breaker sejak terakhir dicek"""
+        now = time.monotonic()
+        if now - self._synced_at < settings.SUPERSET_BREAKER_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        try:
+            opened_at = cache.get(self.key)
+        except Exception:
+            logger.warning('State circuit breaker %s tidak bisa dibaca dari shared cache', self.name, exc_info=True)
+            return
+        with self._lock:
+            if self.state == CLOSED and opened_at and opened_at > self.opened_at:
+                self.state = OPEN
+                self.opened_at = opened_at
+                self.failures = 0
+
+    def allow(self):
+        """
+        True bila call ke Superset boleh dilakukan. Setelah masa reset hanya
+        satu probe yang dilewatkan sekaligus; call lain tetap ditolak.
+        """
+        self._sync()
+        with self._lock:
+            if self.state == CLOSED or self._take_probe():
+                return True
+        metrics.inc('budget_superset_breaker_total', instance=self.name, event='rejected')
+        return False
+
+    def _take_probe(self):
+        """Slot probe half-open setelah masa reset (dipanggil di bawah lock)"""
+        now = time.time()
+        if self.state == OPEN and now - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            self.probe_started = 0.0
+        # Probe yang tidak pernah melapor (mis. exception lain) dianggap
+        # hilang setelah reset_seconds
+        if self.state == HALF_OPEN and now - self.probe_started >= self.reset_seconds:
+            self.probe_started = now
+            return True
+        return False
+
+    def claim_health_check(self):
+        """
+        True bila thread ini yang harus probe /health sekarang: breaker
+        tertutup dan belum ada sinyal selama interval, atau masa reset
+        breaker terbuka sudah lewat (mengambil slot probe half-open)
+        """
+        self._sync()
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                interval = settings.SUPERSET_HEALTH_INTERVAL
+                if self.failures:
+                    interval = min(interval, settings.SUPERSET_HEALTH_RETRY_INTERVAL)
+                if now - self.checked_at < interval:
+                    return False
+                self.checked_at = now
+                return True
+            return self._take_probe()
+
+    def record_success(self):
+        with self._lock:
+            self.checked_at = time.monotonic()
+            self.failures = 0
+            if self.state == CLOSED:
+                return
+            self.state = CLOSED
+            self.probe_started = 0.0
+        logger.info('Circuit breaker Superset %s tertutup kembali', self.name)
+        metrics.inc('budget_superset_breaker_total', instance=self.name, event='closed')
+        edge_cache.purge('dashboard')
+        try:
+            cache.delete(self.key)
+        except Exception:
+            logger.warning('State circuit breaker %s tidak bisa dihapus dari shared cache', self.name, exc_info=True)
+
+    def record_failure(self):
+        with self._lock:
+            self.checked_at = time.monotonic()
+            self.failures += 1
+            if self.state == OPEN or (self.state == CLOSED and self.failures < self.failure_threshold):
+                return
+            self.state = OPEN
+            self.opened_at = time.time()
+            self.failures = 0
+            opened_at = self.opened_at
+        logger.warning('Circuit breaker Superset %s terbuka selama %ss', self.name, self.reset_seconds)
+        metrics.inc('budget_superset_breaker_total', instance=self.name, event='opened')
+        edge_cache.purge('dashboard')
+        try:
+            cache.set(self.key, opened_at, timeout=self.reset_seconds)
+        except Exception:
+            logger.warning('State circuit breaker %s tidak bisa disimpan ke shared cache', self.name, exc_info=True)
+
+    def degraded(self):
+        """
+        True selama masa terbuka (tanpa mengambil slot probe). Setelah masa
+        reset halaman kembali mencoba embed walau belum ada probe.
+        """
+        self._sync()
+        return self.state != CLOSED and time.time() - self.opened_at < self.reset_seconds
+
+    def retry_after(self):
+        """Detik sampai probe berikutnya (minimal 1)"""
+        if self.state == CLOSED:
+            return 1
+        return max(math.ceil(self.opened_at + self.reset_seconds - time.time()), 1)
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_breaker(instance):
+    """Breaker untuk registry.InstanceInfo (instance default dari settings: per address)"""
+    name = instance.id if instance.id is not None else instance.address
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def probe_health(instance, breaker=None):
+    """
+    Probe GET /health instance bila sudah waktunya (lihat claim_health_check),
+    hasilnya dicatat ke breaker. Instance default dari settings (tanpa id,
+    alamat untuk browser) tidak di-probe.
+    """
+    if instance.id is None:
+        return
+    breaker = breaker or get_breaker(instance)
+    if not breaker.claim_health_check():
+        return
+    timeout = settings.SUPERSET_HEALTH_TIMEOUT
+    try:
+        with metrics.Session() as session:
+            response = session.get(f'{instance.url}/health', timeout=(timeout, timeout))
+        healthy = response.status_code < 500
+    except OSError as e:
+        logger.warning('Probe /health Superset %s gagal: %s', instance.address, e)
+        healthy = False
+    if healthy:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+
+def reset():
+    """Lupakan state semua breaker di proses ini"""
+    with _lock:
+        _breakers.clear()
@@ -0,0 +1,338 @@
+"""
+Salinan kolumnar opsional (DuckDB + Parquet) untuk agregasi anggaran
+
+Tabel anggaran dan referensi disalin ke store DuckDB lokal di
+COLUMNAR_DIR, lalu diterbitkan sebagai file Parquet per tabel. Agregasi
+(endpoint /ringkasan/, benchmark) dan Superset membaca Parquet tersebut
+lewat DuckDB in-memory, sehingga scan besar tidak menyentuh PostgreSQL.
+
+- Sinkronisasi incremental berdasarkan updated_at (dengan jendela overlap
+  COLUMNAR_SYNC_OVERLAP_SECONDS untuk transaksi yang commit terlambat);
+  tabel referensi kecil selalu disalin penuh. Baris yang dihapus di
+  PostgreSQL terdeteksi dari checksum primary key (jumlah, sum dan max id),
+  lalu dicari lewat selisih himpunan id.
+- Hanya job `columnar_sync` yang membuka store DuckDB (satu penulis);
+  pembaca hanya membuka Parquet yang diganti secara atomik.
+- Perubahan data menjadwalkan job sync setelah commit (lihat schedule()).
+
+Butuh paket `duckdb` (opsional). Tanpa paket itu, atau bila
+COLUMNAR_ENABLED=False, semua agregasi tetap memakai PostgreSQL.
+"""
+import csv
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import (
+    Provinsi, KabupatenKota, ProgramKegiatan,
+    JenisAnggaran, AnggaranDaerah, RealisasiBulanan, SnapshotTahun,
+)
+from .transaksi import on_commit_once
+
+
+# (model, incremental berdasarkan updated_at)
+TABLES = [
+    (Provinsi, False),
+    (KabupatenKota, False),
+    (ProgramKegiatan, False),
+    (JenisAnggaran, False),
+    (AnggaranDaerah, True),
+    (RealisasiBulanan, True),
+]
+
+NULL = r'\N'
+
+CHUNK_SIZE = 50000
+
+_local = threading.local()
+
+
+@cache
+def available():
+    # Cek tanpa import: duckdb baru dimuat saat sync/query pertama
+    return importlib.util.find_spec('duckdb') is not None
+
+
+def enabled():
+    """Agregasi dibaca dari Parquet: duckdb terpasang, diaktifkan, dan sudah pernah sync"""
+    return (
+        settings.COLUMNAR_ENABLED
+        and available()
+        and all(parquet_path(model).exists() for model, _ in TABLES)
+    )
+
+
+def store_path():
+    return Path(settings.COLUMNAR_DIR) / 'budget.duckdb'
+
+
+def parquet_path(model):
+    return Path(settings.COLUMNAR_DIR) / 'parquet' / f'{model._meta.db_table}.parquet'
+
+
+def _column_type(field):
+    kind = field.get_internal_type()
+    if kind == 'DecimalField':
+        return f'DECIMAL({min(field.max_digits, 38)}, {field.decimal_places})'
+    return {
+        'AutoField': 'INTEGER',
+        'BigAutoField': 'BIGINT',
+        'ForeignKey': 'BIGINT',
+        'IntegerField': 'INTEGER',
+        'BigIntegerField': 'BIGINT',
+        'BooleanField': 'BOOLEAN',
+        'DateField': 'DATE',
+        'DateTimeField': 'TIMESTAMPTZ',
+    }.get(kind, 'VARCHAR')
+
+
+def _columns(model):
+    return [(field.attname, _column_type(field)) for field in model._meta.concrete_fields]
+
+
+# ---------------------------------------------------------------------------
+# Sinkronisasi (hanya dari job columnar_sync)
+# ---------------------------------------------------------------------------
+
+def _ensure_table(con, model):
+    table = model._meta.db_table
+    columns = ', '.join(f'{name} {kind}' for name, kind in _columns(model))
+    con.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns}, PRIMARY KEY (id))')
+
+
+def _stage(rows, directory):
+    """Tulis rows ke CSV sementara (ingest DuckDB tercepat tanpa pandas/pyarrow)"""
+    handle = tempfile.NamedTemporaryFile('w', suffix='.csv', dir=directory, delete=False, newline='')
+    count = 0
+    with handle:
+        writer = csv.writer(handle, lineterminator='\n')
+        for row in rows:
+            writer.writerow([
+                NULL if value is None else value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in row
+            ])
+            count += 1
+    return handle.name, count
+
+
+def _read_csv(path, model):
+    columns = ', '.join(f"'{name}': '{kind}'" for name, kind in _columns(model))
+    return (
+        f"read_csv('{path}', auto_detect=false, header=false, delim=',', quote='\"', escape='\"', "
+        f"nullstr='{NULL}', columns={{{columns}}})"
+    )
+
+
+def _load(con, model, queryset, directory):
+    """INSERT OR REPLACE rows queryset ke tabel DuckDB per chunk. Return jumlah baris."""
+    names = [name for name, _ in _columns(model)]
+    rows = queryset.values_list(*names).order_by().iterator(chunk_size=CHUNK_SIZE)
+    total = 0
+    while True:
+        chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+        if not chunk:
+            return total
+        path, count = _stage(chunk, directory)
+        try:
+            con.execute(f'INSERT OR REPLACE INTO {model._meta.db_table} SELECT * FROM {_read_csv(path, model)}')
+        finally:
+            os.unlink(path)
+        total += count
+
+
+def _id_checksum(con, model):
+    """
+    (jumlah, sum id, max id) di DuckDB dan PostgreSQL. Jumlah saja tidak
+    cukup: satu baris dihapus dan satu baris lain tidak ikut tersalin
+    (mis. di luar jendela watermark) menghasilkan jumlah yang sama. Id baru
+    dari sequence selalu di atas max lama, sehingga pertukaran seperti itu
+    mengubah sum atau max.
+    """
+    local = con.execute(f'SELECT count(*), coalesce(sum(id), 0), coalesce(max(id), 0) FROM {model._meta.db_table}').fetchone()
+    live = model.objects.aggregate(jumlah=Count('id'), total=Sum('id', default=0), top=Max('id', default=0))
+    return tuple(int(value) for value in local), (live['jumlah'], int(live['total']), int(live['top']))
+
+
+def _delete_missing(con, model, directory):
+    """Hapus baris yang sudah tidak ada di PostgreSQL (selisih himpunan id)"""
+    table = model._meta.db_table
+    local, live = _id_checksum(con, model)
+    if local == live:
+        return 0
+    path, _ = _stage(((pk,) for pk in model.objects.values_list('id', flat=True).iterator()), directory)
+    try:
+        con.execute(f"CREATE TEMP TABLE live_ids AS SELECT * FROM read_csv('{path}', auto_detect=false, header=false, columns={{'id': 'BIGINT'}})")
+        (deleted,) = con.execute(
+            f'DELETE FROM {table} WHERE id NOT IN (SELECT id FROM live_ids)'
+        ).fetchone()
+        con.execute('DROP TABLE live_ids')
+    finally:
+        os.unlink(path)
+    return deleted
+
+
+def _publish(con, model):
+    """Tulis ulang Parquet tabel ini lalu ganti file lama secara atomik"""
+    target = parquet_path(model)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix('.parquet.tmp')
+    con.execute(f"COPY {model._meta.db_table} TO '{tmp}' (FORMAT parquet, COMPRESSION zstd)")
+    os.replace(tmp, target)
+
+
+def sync(full=False, progress=None):
+    """
+    Salin perubahan sejak sync terakhir ke store DuckDB dan terbitkan Parquet
+    tabel yang berubah. Return {tabel: {'upserted': n, 'deleted': n}, 'seconds': s}.
+    """
+    if not available():
+        raise RuntimeError('Paket duckdb belum terpasang (pip install duckdb)')
+    import duckdb
+    directory = Path(settings.COLUMNAR_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    overlap = timedelta(seconds=settings.COLUMNAR_SYNC_OVERLAP_SECONDS)
+
+    start = time.perf_counter()
+    result = {}
+    with duckdb.connect(str(store_path())) as con:
+        for i, (model, incremental) in enumerate(TABLES):
+            table = model._meta.db_table
+            if progress:
+                progress(i * 100 / len(TABLES), table)
+            _ensure_table(con, model)
+            queryset = model.objects.all()
+
+            con.execute('BEGIN')
+            watermark = None
+            if incremental and not full:
+                # Epoch agar tidak butuh pytz untuk konversi TIMESTAMPTZ
+                (micros,) = con.execute(f'SELECT epoch_us(max(updated_at)) FROM {table}').fetchone()
+                if micros is not None:
+                    watermark = datetime.fromtimestamp(micros / 1e6, tz=dt_timezone.utc)
+            if watermark is None:
+                # Salin penuh: buat ulang tabel (DuckDB menolak insert ulang
+                # primary key yang dihapus dalam transaksi yang sama)
+                con.execute(f'DROP TABLE {table}')
+                _ensure_table(con, model)
+            else:
+                queryset = queryset.filter(updated_at__gte=watermark - overlap)
+            upserted = _load(con, model, queryset, directory)
+            deleted = _delete_missing(con, model, directory) if watermark is not None else 0
+            con.execute('COMMIT')
+
+            changed = watermark is None or upserted or deleted
+            if changed or not parquet_path(model).exists():
+                _publish(con, model)
+            result[table] = {'upserted': upserted, 'deleted': deleted}
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def schedule():
+    """Antrikan job columnar_sync sekali per transaksi, setelah commit"""
+    if not settings.COLUMNAR_ENABLED:
+        return
+    on_commit_once(_flush)
+
+
+def _flush():
+    from . import jobs
+    delay = timedelta(seconds=settings.COLUMNAR_SYNC_DELAY_SECONDS)
+    jobs.enqueue_unique('columnar_sync', run_after=timezone.now() + delay)
+
+
+# ---------------------------------------------------------------------------
+# Query (proses web/worker mana pun)
+# ---------------------------------------------------------------------------
+
+def connect():
+    """Koneksi DuckDB in-memory per thread dengan view ke file Parquet"""
+    con = getattr(_local, 'con', None)
+    if con is None:
+        import duckdb
+        con = duckdb.connect()
+        for model, _ in TABLES:
+            con.execute(
+                f"CREATE VIEW {model._meta.db_table} AS SELECT * FROM read_parquet('{parquet_path(model)}')"
+            )
+        _local.con = con
+    return con
+
+
+def query(sql, params=None):
+    """Jalankan SELECT, return list of dict"""
+    cursor = connect().cursor()
+    try:
+        cursor.execute(sql, params or [])
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def ringkasan_per_tahun():
+    """Sama dengan snapshot.ringkasan_per_tahun(), tahun live diagregasi dari Parquet"""
+    snapshots = list(SnapshotTahun.objects.all())
+    rows = [
+        {
+            'tahun': snapshot.tahun,
+            'jumlah_anggaran': snapshot.jumlah_anggaran,
+            'pagu_anggaran': snapshot.total_pagu,
+            'realisasi_anggaran': snapshot.total_realisasi,
+            'sumber': 'snapshot',
+        }
+        for snapshot in snapshots
+    ]
+    frozen = [snapshot.tahun for snapshot in snapshots]
+    rows.extend(
+        {**row, 'sumber': 'live'}
+        for row in query(
+            """
+            SELECT tahun_anggaran AS tahun,
+                   count(*) AS jumlah_anggaran,
+                   coalesce(sum(pagu_anggaran), 0) AS pagu_anggaran,
+                   coalesce(sum(realisasi_anggaran), 0) AS realisasi_anggaran
+            FROM anggaran_daerah
+            WHERE NOT list_contains(?::INTEGER[], tahun_anggaran)
+            GROUP BY tahun_anggaran
+            """,
+            [frozen],
+        )
+    )
+    return sorted(rows, key=lambda row: row['tahun'])
+
+
+# Dimensi yang boleh dipakai aggregate(); nilai = ekspresi SQL
+DIMENSIONS = {
+    'tahun': 'a.tahun_anggaran',
+    'provinsi': 'p.nama_provinsi',
+    'kabkota': 'k.nama_kabkota',
+    'program': 'g.nama_program',
+    'kategori': 'j.kategori',
+    'status': 'a.status',
+}
+
+
+def aggregate(*dimensions):
+    """Total pagu dan realisasi per kombinasi dimensi (lihat DIMENSIONS)"""
+    select = ', '.join(f'{DIMENSIONS[name]} AS {name}' for name in dimensions)
+    group = ', '.join(DIMENSIONS[name] for name in dimensions)
+    return query(f"""
+        SELECT {select}, sum(a.pagu_anggaran) AS pagu, sum(a.realisasi_anggaran) AS realisasi
+        FROM anggaran_daerah a
+        JOIN kabupaten_kota k ON k.id = a.kabupaten_kota_id
+        JOIN provinsi p ON p.id = k.provinsi_id
+        JOIN program_kegiatan g ON g.id = a.program_id
+        JOIN jenis_anggaran j ON j.id = a.jenis_anggaran_id
+        GROUP BY {group}
+        ORDER BY {group}
+    """)
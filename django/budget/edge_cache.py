@@ -0,0 +1,84 @@
+"""
+Integrasi dengan cache HTTP di Caddy (cache-handler/Souin)
+
+- `cache_public` memberi header Cache-Control/Surrogate-Key pada view
+  publik sehingga respons anonim bisa disimpan di edge
+- `purge` menghapus respons dengan surrogate key tertentu; dipanggil dari
+  signal saat data anggaran berubah, sekali per transaksi
+"""
+import logging
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import metrics
+from .transaksi import on_commit_once
+
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def cache_public(max_age=0, s_maxage=60, stale_while_revalidate=300, keys=()):
+    """
+    Decorator view: respons untuk user anonim boleh disimpan shared cache
+    selama s_maxage detik (browser max_age detik), dan disajikan stale selama
+    revalidasi di background. User yang login selalu mendapat respons private.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+                return response
+
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=max_age,
+                    s_maxage=s_maxage,
+                    stale_while_revalidate=stale_while_revalidate,
+                )
+                if keys:
+                    response['Surrogate-Key'] = ' '.join(keys)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
+
+
+def purge(*keys):
+    """
+    Jadwalkan purge surrogate key di edge cache setelah transaksi commit.
+    Beberapa perubahan dalam satu transaksi hanya menghasilkan satu request.
+    """
+    if not getattr(settings, 'EDGE_CACHE_PURGE_URL', ''):
+        return
+
+    pending = getattr(_pending, 'keys', None)
+    if pending is None:
+        pending = _pending.keys = set()
+    pending.update(keys)
+
+    on_commit_once(_flush)
+
+
+def _flush():
+    keys = getattr(_pending, 'keys', None) or set()
+    _pending.keys = None
+    if not keys:
+        return
+
+    url = f"{settings.EDGE_CACHE_PURGE_URL.rstrip('/')}/souin-api/souin"
+    try:
+        with metrics.Session() as session:
+            session.request('PURGE', url, headers={'Surrogate-Key': ', '.join(sorted(keys))}, timeout=2)
+    except Exception as e:
+        # Edge cache tetap kedaluwarsa sendiri lewat s-maxage
+        logger.warning('Edge cache purge gagal untuk %s: %s', sorted(keys), e)
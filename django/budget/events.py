@@ -0,0 +1,317 @@
+"""
+Notifikasi perubahan data anggaran lewat server-sent events (SSE)
+
+Alur:
+- Signal AnggaranDaerah/RealisasiBulanan memanggil `notify(tahun, kabkota_id)`.
+  Perubahan dikumpulkan per transaksi dan dikirim sekali setelah commit
+  lewat `pg_notify` (kanal CHANNEL).
+- Proses ASGI (config/asgi.py) menjalankan satu `Hub` per proses: satu
+  thread LISTEN ke PostgreSQL, lalu perubahan di-debounce per
+  (tahun, kabkota) selama EVENTS_DEBOUNCE_SECONDS sebelum dikirim ke
+  subscriber.
+- `sse_application` adalah ASGI app murni (tanpa middleware Django):
+  koneksi idle hanya berupa coroutine yang menunggu queue, sehingga satu
+  proses sanggup menahan ribuan koneksi.
+
+Tanpa PostgreSQL (mis. SQLite di development) notifikasi hanya sampai ke
+subscriber di proses yang sama.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import connection, connections
+
+from .transaksi import on_commit_once
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'budget_changes'
+
+# Payload NOTIFY dibatasi 8000 byte; satu perubahan ~16 byte dalam JSON
+NOTIFY_CHUNK = 200
+
+_pending = threading.local()
+
+
+# ---------------------------------------------------------------------------
+# Producer (dipanggil dari signal, di proses WSGI maupun ASGI)
+# ---------------------------------------------------------------------------
+
+def notify(tahun, kabkota_id):
+    """Jadwalkan notifikasi perubahan (tahun, kabkota) setelah transaksi commit"""
+    pending = getattr(_pending, 'changes', None)
+    if pending is None:
+        pending = _pending.changes = set()
+    pending.add((tahun, kabkota_id))
+
+    on_commit_once(_flush)
+
+
+def notify_anggaran(anggaran_id):
+    """
+    Seperti notify() untuk perubahan di bawah satu anggaran (mis. realisasi
+    bulanan): (tahun, kabkota) di-resolve saat flush, satu query untuk semua
+    anggaran dalam transaksi, bukan satu query per baris yang disimpan
+    """
+    pending = getattr(_pending, 'anggaran_ids', None)
+    if pending is None:
+        pending = _pending.anggaran_ids = set()
+    pending.add(anggaran_id)
+
+    on_commit_once(_flush)
+
+
+def _resolve(anggaran_ids):
+    from .models import AnggaranDaerah
+
+    # Anggaran yang ikut terhapus dilaporkan oleh signal AnggaranDaerah sendiri
+    return set(
+        AnggaranDaerah.objects
+        .filter(pk__in=anggaran_ids)
+        .values_list('tahun_anggaran', 'kabupaten_kota_id')
+        .order_by()
+        .distinct()
+    )
+
+
+def _flush():
+    changes = set(getattr(_pending, 'changes', None) or ())
+    anggaran_ids = getattr(_pending, 'anggaran_ids', None)
+    _pending.changes = _pending.anggaran_ids = None
+    if anggaran_ids:
+        try:
+            changes |= _resolve(anggaran_ids)
+        except Exception as e:
+            logger.warning('Perubahan realisasi untuk notifikasi tidak bisa di-resolve: %s', e)
+    changes = sorted(changes)
+    if not changes:
+        return
+
+    if connection.vendor != 'postgresql':
+        hub.publish_threadsafe(changes)
+        return
+
+    try:
+        with connection.cursor() as cursor:
+            for i in range(0, len(changes), NOTIFY_CHUNK):
+                payload = json.dumps({'changes': changes[i:i + NOTIFY_CHUNK]}, separators=(',', ':'))
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+    except Exception as e:
+        # Notifikasi bersifat best effort, jangan gagalkan request
+        logger.warning('pg_notify %s gagal: %s', CHANNEL, e)
+
+
+# ---------------------------------------------------------------------------
+# Hub (satu per proses ASGI)
+# ---------------------------------------------------------------------------
+
+class Subscriber:
+    def __init__(self, tahun=None, kabkota_id=None, maxsize=16):
+        self.tahun = tahun
+        self.kabkota_id = kabkota_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def matches(self, change):
+        tahun, kabkota_id = change
+        return (
+            (self.tahun is None or self.tahun == tahun)
+            and (self.kabkota_id is None or self.kabkota_id == kabkota_id)
+        )
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Client lambat: cukup dapat notice berikutnya, karena notice
+            # hanya berarti "ada yang berubah, silakan refresh"
+            pass
+
+
+class Hub:
+    def __init__(self, debounce=None):
+        self.debounce = debounce
+        self.subscribers = set()
+        self.loop = None
+        self._pending = set()
+        self._flush_handle = None
+        self._listener = None
+        self._stopped = threading.Event()
+        self.sequence = 0
+
+    # Lifecycle ------------------------------------------------------------
+
+    def start(self):
+        """Dipanggil dari event loop ASGI (lifespan startup atau request pertama)"""
+        if self.loop is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        if self.debounce is None:
+            self.debounce = settings.EVENTS_DEBOUNCE_SECONDS
+        if connections['default'].vendor == 'postgresql':
+            self._stopped.clear()
+            self._listener = threading.Thread(target=self._listen, name='budget-events-listen', daemon=True)
+            self._listener.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self.loop = None
+
+    # Subscriber -----------------------------------------------------------
+
+    def subscribe(self, tahun=None, kabkota_id=None):
+        subscriber = Subscriber(tahun, kabkota_id)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    # Publish --------------------------------------------------------------
+
+    def publish(self, changes):
+        """Harus dipanggil di thread event loop"""
+        self._pending.update(tuple(change) for change in changes)
+        if self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.debounce, self._dispatch)
+
+    def publish_threadsafe(self, changes):
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.publish, changes)
+
+    def _dispatch(self):
+        self._flush_handle = None
+        changes = sorted(self._pending)
+        self._pending.clear()
+        if not changes:
+            return
+
+        self.sequence += 1
+        for subscriber in list(self.subscribers):
+            matching = [change for change in changes if subscriber.matches(change)]
+            if matching:
+                subscriber.offer(format_event(self.sequence, matching))
+
+    # LISTEN ---------------------------------------------------------------
+
+    def _listen(self):
+        """Thread LISTEN PostgreSQL dengan reconnect + backoff"""
+        backoff = 1
+        while not self._stopped.is_set():
+            conn = connections['default']
+            try:
+                conn.ensure_connection()
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                raw = conn.connection
+                backoff = 1
+                while not self._stopped.is_set():
+                    if select.select([raw], [], [], 5) == ([], [], []):
+                        continue
+                    raw.poll()
+                    changes = []
+                    while raw.notifies:
+                        changes.extend(json.loads(raw.notifies.pop(0).payload)['changes'])
+                    if changes:
+                        self.publish_threadsafe(changes)
+            except Exception as e:
+                logger.warning('LISTEN %s terputus: %s (reconnect dalam %ss)', CHANNEL, e, backoff)
+                conn.close()
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+        connections['default'].close()
+
+
+hub = Hub()
+
+
+def format_event(sequence, changes):
+    data = json.dumps({
+        'changes': [{'tahun': tahun, 'kabkota_id': kabkota_id} for tahun, kabkota_id in changes],
+        'ts': int(time.time()),
+    }, separators=(',', ':'))
+    return f'id: {sequence}\nevent: anggaran\ndata: {data}\n\n'.encode()
+
+
+# ---------------------------------------------------------------------------
+# ASGI endpoint: GET /events/anggaran/?tahun=2025&kabkota=12
+# ---------------------------------------------------------------------------
+
+def _int_param(query, name):
+    try:
+        return int(query[name][0])
+    except (KeyError, ValueError):
+        return None
+
+
+async def _send_plain(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def sse_application(scope, receive, send):
+    if scope['method'] not in ('GET', 'HEAD'):
+        return await _send_plain(send, 405, b'Method not allowed')
+    if scope['path'].rstrip('/') != '/events/anggaran':
+        return await _send_plain(send, 404, b'Not found')
+    if len(hub.subscribers) >= settings.EVENTS_MAX_CONNECTIONS:
+        return await _send_plain(send, 503, b'Too many connections')
+
+    hub.start()
+    query = parse_qs(scope.get('query_string', b'').decode())
+    subscriber = hub.subscribe(_int_param(query, 'tahun'), _int_param(query, 'kabkota'))
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache, no-store'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    # Browser menunggu 5 detik sebelum reconnect otomatis
+    await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    heartbeat = settings.EVENTS_HEARTBEAT_SECONDS
+    try:
+        while True:
+            message = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnect}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                message.cancel()
+                break
+            if message in done:
+                body = message.result()
+            else:
+                # Komentar SSE sebagai heartbeat agar proxy tidak menutup koneksi idle
+                message.cancel()
+                body = b': ping\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    except OSError:
+        # Client sudah putus saat send
+        pass
+    finally:
+        hub.unsubscribe(subscriber)
+        disconnect.cancel()
@@ -0,0 +1,238 @@
+"""
+Antrian job latar belakang berbasis database
+
+Job disimpan di tabel job_queue (model Job) dan dijalankan oleh
+`manage.py jobworker`. Worker mengambil job dengan SELECT ... FOR UPDATE
+SKIP LOCKED, sehingga beberapa worker bisa berjalan bersamaan tanpa
+mengambil job yang sama. Task didaftarkan dengan decorator @task
+(lihat budget/tasks.py) beserta batas concurrency dan jumlah retry.
+
+Di dalam task, laporkan progress dengan job.set_progress(persen, pesan).
+"""
+import logging
+import threading
+import traceback
+import zlib
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# Kunci advisory lock PostgreSQL untuk menserialkan claim, agar batas
+# concurrency per task tidak terlewati oleh dua worker sekaligus
+CLAIM_LOCK_ID = 703701
+# Kunci pertama advisory lock enqueue_unique; kunci kedua crc32 nama task
+ENQUEUE_LOCK_ID = 703702
+
+
+class JobError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: object
+    label: str
+    concurrency: int
+    max_attempts: int
+    retry_delay: int
+
+
+def task(name, label='', concurrency=1, max_attempts=3, retry_delay=30):
+    """
+    Daftarkan fungsi task. Fungsi dipanggil sebagai func(job, **job.params)
+    dan nilai return-nya (harus JSON serializable) disimpan di job.result.
+    - concurrency: maksimum job task ini yang berjalan bersamaan
+    - retry_delay: jeda retry pertama (detik), berlipat dua setiap percobaan
+    """
+    def decorator(func):
+        TASKS[name] = Task(name, func, label or name, concurrency, max_attempts, retry_delay)
+        return func
+    return decorator
+
+
+def registered_tasks():
+    from . import tasks  # noqa: F401  (mendaftarkan task bawaan)
+    return TASKS
+
+
+def task_choices():
+    return [(spec.name, spec.label) for spec in registered_tasks().values()]
+
+
+def enqueue(name, params=None, user=None, run_after=None):
+    spec = registered_tasks().get(name)
+    if spec is None:
+        raise JobError(f"Task '{name}' tidak dikenal")
+    return Job.objects.create(
+        task=name,
+        params=params or {},
+        max_attempts=spec.max_attempts,
+        run_after=run_after or timezone.now(),
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def enqueue_unique(name, params=None, user=None, run_after=None):
+    """
+    Seperti enqueue, tapi tidak membuat job baru bila job yang sama masih antri.
+    Cek dan insert diserialkan per task dengan advisory lock (seperti claim),
+    sehingga dua proses yang bersamaan tidak sama-sama membuat job.
+    """
+    params = params or {}
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # crc32 dijadikan int4 bertanda untuk bentuk dua argumen
+            key = zlib.crc32(name.encode()) - (1 << 31)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ENQUEUE_LOCK_ID, key])
+        existing = Job.objects.filter(task=name, status='ANTRI', params=params).first()
+        return existing or enqueue(name, params, user=user, run_after=run_after)
+
+
+def claim(worker):
+    """Ambil satu job yang siap dijalankan dan tandai BERJALAN. Return Job atau None."""
+    specs = registered_tasks()
+    now = timezone.now()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CLAIM_LOCK_ID])
+
+        running = dict(
+            Job.objects.filter(status='BERJALAN')
+            .values('task')
+            .annotate(jumlah=Count('id'))
+            .values_list('task', 'jumlah')
+        )
+        available = [name for name, spec in specs.items() if running.get(name, 0) < spec.concurrency]
+        if not available:
+            return None
+
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='ANTRI', run_after__lte=now, task__in=available)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'BERJALAN'
+        job.worker = worker
+        job.attempts += 1
+        job.started_at = job.heartbeat_at = now
+        job.finished_at = None
+        job.save(update_fields=['status', 'worker', 'attempts', 'started_at', 'heartbeat_at', 'finished_at', 'updated_at'])
+        return job
+
+
+def execute(job):
+    """Jalankan job yang sudah di-claim, lalu catat hasil atau jadwalkan retry"""
+    spec = registered_tasks().get(job.task)
+    close_old_connections()
+    try:
+        if spec is None:
+            raise JobError(f"Task '{job.task}' tidak dikenal")
+        result = spec.func(job, **job.params)
+    except Exception:
+        _fail(job, spec, traceback.format_exc())
+    else:
+        Job.objects.filter(pk=job.pk, status='BERJALAN').update(
+            status='SELESAI',
+            progress=100,
+            result=result,
+            error='',
+            worker='',
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        logger.info('Job #%s %s selesai', job.pk, job.task)
+    finally:
+        close_old_connections()
+
+
+def _fail(job, spec, error):
+    now = timezone.now()
+    final = spec is None or job.attempts >= job.max_attempts
+    if final:
+        updates = {'status': 'GAGAL', 'finished_at': now}
+    else:
+        delay = spec.retry_delay * 2 ** (job.attempts - 1)
+        updates = {'status': 'ANTRI', 'run_after': now + timedelta(seconds=delay)}
+    Job.objects.filter(pk=job.pk, status='BERJALAN').update(
+        error=error, worker='', updated_at=now, **updates
+    )
+    logger.warning(
+        'Job #%s %s gagal (percobaan %s/%s)%s',
+        job.pk, job.task, job.attempts, job.max_attempts, '' if final else ', dijadwalkan ulang',
+    )
+
+
+def requeue_stale(stale_seconds=None):
+    """
+    Job BERJALAN yang heartbeat-nya berhenti (worker mati) dikembalikan ke
+    antrian, atau GAGAL bila percobaannya sudah habis. Return jumlah job.
+    """
+    stale_seconds = stale_seconds or settings.JOB_STALE_SECONDS
+    now = timezone.now()
+    stale = Job.objects.filter(status='BERJALAN', heartbeat_at__lt=now - timedelta(seconds=stale_seconds))
+    count = 0
+    for job in stale:
+        final = job.attempts >= job.max_attempts
+        count += Job.objects.filter(pk=job.pk, status='BERJALAN').update(
+            status='GAGAL' if final else 'ANTRI',
+            finished_at=now if final else None,
+            error=f'Worker {job.worker} berhenti tanpa menyelesaikan job',
+            worker='',
+            updated_at=now,
+        )
+    return count
+
+
+def cancel(queryset):
+    """Batalkan job yang masih ANTRI. Job yang sedang berjalan tidak disentuh."""
+    return queryset.filter(status='ANTRI').update(
+        status='DIBATALKAN', finished_at=timezone.now(), updated_at=timezone.now()
+    )
+
+
+def retry(queryset):
+    """Antrikan ulang job yang GAGAL/DIBATALKAN dengan jatah percobaan baru"""
+    return queryset.filter(status__in=['GAGAL', 'DIBATALKAN']).update(
+        status='ANTRI', attempts=0, progress=0, progress_message='', error='',
+        run_after=timezone.now(), finished_at=None, updated_at=timezone.now(),
+    )
+
+
+class Heartbeat(threading.Thread):
+    """Perbarui heartbeat_at semua job milik worker ini secara berkala"""
+
+    def __init__(self, worker, interval=None):
+        super().__init__(name='jobworker-heartbeat', daemon=True)
+        self.worker = worker
+        self.interval = interval or settings.JOB_HEARTBEAT_SECONDS
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                Job.objects.filter(status='BERJALAN', worker=self.worker).update(heartbeat_at=timezone.now())
+            except Exception as e:
+                logger.warning('Heartbeat job gagal: %s', e)
+        connection.close()
+
+    def stop(self):
+        self.stopped.set()
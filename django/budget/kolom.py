@@ -0,0 +1,336 @@
+"""
+Buffer kolom integer sen untuk jalur analitik
+
+Nilai uang (DecimalField 15,2) diambil langsung sebagai int64 sen
+(CAST(ROUND(x * 100) AS bigint) di database), dan foreign key/status sebagai
+kode integer, ke buffer array('q') per kolom - tanpa objek Decimal atau
+model per baris. Penjumlahan, pengelompokan dan rasio dijalankan atas
+buffer tersebut; bila NumPy terpasang (opsional) operasinya vektor, tanpa
+NumPy memakai loop Python atas array yang sama. Hasil Decimal yang eksak
+hanya dibuat di tepi, untuk total dan persentase yang dilaporkan.
+
+Buffer dimuat sekali per job/perhitungan (memuat jutaan baris tetap
+dibatasi kecepatan fetch database); analisis setelahnya hanya milidetik.
+"""
+from array import array
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+from functools import cache
+
+from django.db import connections
+from django.db.models import BigIntegerField, Case, F, IntegerField, Value, When
+from django.db.models.functions import Cast, Round
+
+from .models import AnggaranDaerah, RealisasiSeri
+
+
+CHUNK_SIZE = 10000
+
+INT64_MAX = 2 ** 63 - 1
+
+# Batas jumlah kombinasi kunci untuk pengelompokan dengan indeks langsung
+DENSE_GROUPS = 1 << 22
+
+SEN = Decimal('0.01')
+
+STATUS = tuple(choice for choice, _ in AnggaranDaerah.STATUS_CHOICES)
+
+
+@cache
+def _numpy():
+    """Modul numpy, atau None bila tidak terpasang (diimport saat pertama dipakai)"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def sen(field):
+    """Ekspresi kolom DecimalField sebagai int64 sen"""
+    return Cast(Round(F(field) * 100), BigIntegerField())
+
+
+def kode_status(field='status'):
+    """Ekspresi status sebagai indeks di STATUS"""
+    return Case(
+        *(When(**{field: status}, then=Value(i)) for i, status in enumerate(STATUS)),
+        default=Value(-1),
+        output_field=IntegerField(),
+    )
+
+
+def rupiah(nilai_sen):
+    """int sen -> Decimal rupiah (eksak)"""
+    return Decimal(int(nilai_sen)).scaleb(-2)
+
+
+def ke_sen(nilai):
+    """Decimal/int rupiah -> int sen (ROUND_HALF_UP), untuk total dari agregat database"""
+    return int(Decimal(nilai).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def teks_rupiah(nilai_sen):
+    """int sen -> teks '1234.50' (sama dengan str() DecimalField 2 desimal); None -> ''"""
+    if nilai_sen is None:
+        return ''
+    nilai_rupiah, sisa = divmod(abs(int(nilai_sen)), 100)
+    return f"{'-' if nilai_sen < 0 else ''}{nilai_rupiah}.{sisa:02d}"
+
+
+def persen(bagian, total):
+    """bagian/total * 100 sebagai Decimal 2 desimal (eksak, ROUND_HALF_UP)"""
+    if not total:
+        return Decimal('0.00')
+    return (Decimal(int(bagian)) * 100 / Decimal(int(total))).quantize(SEN, rounding=ROUND_HALF_UP)
+
+
+class Kolom:
+    """
+    Sekumpulan kolom int64 dengan panjang sama. kolom['nama'] mengembalikan
+    numpy.ndarray (view tanpa copy) bila NumPy tersedia, selain itu array('q').
+    Jangan menambah baris selagi view NumPy masih dipakai.
+    """
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self._data = {name: array('q') for name in self.names}
+
+    def __len__(self):
+        return len(self._data[self.names[0]]) if self.names else 0
+
+    def __getitem__(self, name):
+        data = self._data[name]
+        numpy = _numpy()
+        if numpy is not None:
+            return numpy.frombuffer(data, dtype=numpy.int64) if len(data) else numpy.zeros(0, numpy.int64)
+        return data
+
+    def extend(self, rows):
+        """Tambahkan rows (list of tuple, urutan sesuai names)"""
+        if not rows:
+            return
+        for name, values in zip(self.names, zip(*rows)):
+            self._data[name].extend(values)
+
+    @property
+    def nbytes(self):
+        return sum(data.itemsize * len(data) for data in self._data.values())
+
+    def total(self, name):
+        """Jumlah eksak satu kolom (int sen)"""
+        return _sum(self[name])
+
+    def group_sum(self, keys, values):
+        """
+        {kunci: (jumlah_baris, [total per kolom values])} dikelompokkan menurut
+        kolom keys. Kunci berupa tuple bila keys lebih dari satu kolom.
+        """
+        keys = tuple(keys)
+        if _numpy() is not None and len(self) and not _overflow(len(self), [self[name] for name in values]):
+            return _group_sum_numpy([self[name] for name in keys], [self[name] for name in values])
+
+        result = {}
+        key_columns = [self._data[name] for name in keys]
+        value_columns = [self._data[name] for name in values]
+        for i in range(len(self)):
+            key = key_columns[0][i] if len(keys) == 1 else tuple(column[i] for column in key_columns)
+            entry = result.get(key)
+            if entry is None:
+                entry = result[key] = [0, [0] * len(value_columns)]
+            entry[0] += 1
+            sums = entry[1]
+            for j, column in enumerate(value_columns):
+                sums[j] += column[i]
+        return {key: (count, sums) for key, (count, sums) in result.items()}
+
+    def rasio(self, bagian, total):
+        """bagian/total per baris (float, 0 bila total 0) - untuk sebaran, bukan laporan"""
+        numpy = _numpy()
+        if numpy is not None:
+            top, bottom = self[bagian], self[total]
+            out = numpy.zeros(len(self), dtype=numpy.float64)
+            numpy.divide(top, bottom, out=out, where=bottom != 0)
+            return out
+        return array('d', (
+            top / bottom if bottom else 0.0
+            for top, bottom in zip(self._data[bagian], self._data[total])
+        ))
+
+
+def _overflow(n, columns):
+    """True bila total n baris bisa melewati int64"""
+    for column in columns:
+        if len(column) and max(abs(int(column.max())), abs(int(column.min()))) * n > INT64_MAX:
+            return True
+    return False
+
+
+def _sum(column):
+    if _numpy() is None:
+        return sum(column)
+    if not len(column):
+        return 0
+    peak = max(abs(int(column.max())), abs(int(column.min())))
+    if peak * len(column) <= INT64_MAX:
+        return int(column.sum())
+    # Jumlahkan per potongan yang pasti muat di int64, gabungkan sebagai int Python
+    step = max(INT64_MAX // max(peak, 1), 1)
+    return sum(int(column[start:start + step].sum()) for start in range(0, len(column), step))
+
+
+def _group_sum_numpy(keys, values):
+    numpy = _numpy()
+    # Gabungkan kolom kunci menjadi satu kode mixed-radix; rentang kecil
+    # (tahun, id referensi, status) dikelompokkan dengan indeks langsung
+    lows = [int(column.min()) for column in keys]
+    spans = [int(column.max()) - low + 1 for column, low in zip(keys, lows)]
+    size = 1
+    for span in spans:
+        size *= span
+
+    if size <= INT64_MAX:
+        code = numpy.zeros(len(keys[0]), dtype=numpy.int64)
+        for column, low, span in zip(keys, lows, spans):
+            code *= span
+            code += column - low
+        if size <= DENSE_GROUPS:
+            counts = numpy.bincount(code, minlength=size)
+            index = numpy.flatnonzero(counts)
+            counts = counts[index]
+            groups = index
+        else:
+            groups, code, counts = numpy.unique(code, return_inverse=True, return_counts=True)
+            size = len(groups)
+            index = numpy.arange(size)
+        labels = numpy.stack(numpy.unravel_index(groups, spans), axis=1) + lows
+    else:
+        labels, code, counts = numpy.unique(
+            numpy.stack(keys, axis=1), axis=0, return_inverse=True, return_counts=True
+        )
+        size = len(labels)
+        index = numpy.arange(size)
+    code = code.reshape(-1)
+
+    sums = []
+    for column in values:
+        # add.at int64: eksak, tanpa konversi float seperti bincount(weights=)
+        total = numpy.zeros(size, dtype=numpy.int64)
+        numpy.add.at(total, code, column)
+        sums.append(total[index].tolist())
+    counts = counts.tolist()
+    if len(keys) == 1:
+        labels = labels[:, 0].tolist()
+    else:
+        labels = [tuple(label) for label in labels.tolist()]
+    return {
+        label: (counts[i], [total[i] for total in sums])
+        for i, label in enumerate(labels)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Loader
+# ---------------------------------------------------------------------------
+
+ANGGARAN_COLUMNS = {
+    'id': F('id'),
+    'tahun': F('tahun_anggaran'),
+    'provinsi': F('kabupaten_kota__provinsi_id'),
+    'kabkota': F('kabupaten_kota_id'),
+    'program': F('program_id'),
+    'jenis': F('jenis_anggaran_id'),
+    'status': kode_status(),
+    'pagu': sen('pagu_anggaran'),
+    'realisasi': sen('realisasi_anggaran'),
+    'sisa': sen('sisa_anggaran'),
+}
+
+SERI_COLUMNS = {
+    'anggaran': F('anggaran_id'),
+    'tahun': F('tahun'),
+    **{kolom: F(kolom) for kolom in RealisasiSeri.KOLOM_BULAN},
+}
+
+
+def load(queryset, columns, chunk_size=CHUNK_SIZE):
+    """
+    Jalankan queryset dengan ekspresi integer di columns ({nama: ekspresi})
+    dan isi Kolom per chunk lewat chunked cursor (server-side di PostgreSQL).
+    """
+    kolom = Kolom(columns)
+    queryset = queryset.order_by().values_list(*columns.values())
+    sql, params = queryset.query.sql_with_params()
+    connection = connections[queryset.db]
+    server_side = not connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS')
+    with (connection.chunked_cursor() if server_side else connection.cursor()) as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return kolom
+            kolom.extend(rows)
+
+
+def load_anggaran(queryset=None, columns=None):
+    """Kolom anggaran (default semua ANGGARAN_COLUMNS); uang dalam sen"""
+    queryset = AnggaranDaerah.objects.all() if queryset is None else queryset
+    names = columns or ANGGARAN_COLUMNS
+    return load(queryset, {name: ANGGARAN_COLUMNS[name] for name in names})
+
+
+def load_seri(queryset=None):
+    """Kolom realisasi_seri: anggaran, tahun, sen_01..sen_12"""
+    queryset = RealisasiSeri.objects.all() if queryset is None else queryset
+    return load(queryset, SERI_COLUMNS)
+
+
+# ---------------------------------------------------------------------------
+# Statistik
+# ---------------------------------------------------------------------------
+
+def ringkasan(kolom, *by):
+    """
+    Jumlah anggaran, total pagu/realisasi/sisa (Decimal) dan persentase
+    realisasi, per kombinasi kolom by (tanpa by: satu baris total).
+    Kolom 'status' dikembalikan sebagai kode status.
+    """
+    values = ('pagu', 'realisasi', 'sisa')
+    if by:
+        groups = kolom.group_sum(by, values)
+    else:
+        groups = {(): (len(kolom), [kolom.total(name) for name in values])}
+
+    rows = []
+    for key, (count, (pagu, realisasi, sisa)) in sorted(groups.items()):
+        parts = key if isinstance(key, tuple) else (key,)
+        row = dict(zip(by, parts))
+        if 'status' in row:
+            row['status'] = STATUS[row['status']] if 0 <= row['status'] < len(STATUS) else None
+        row.update({
+            'jumlah_anggaran': count,
+            'pagu_anggaran': rupiah(pagu),
+            'realisasi_anggaran': rupiah(realisasi),
+            'sisa_anggaran': rupiah(sisa),
+            'persentase_realisasi': persen(realisasi, pagu),
+        })
+        rows.append(row)
+    return rows
+
+
+def sebaran_persentase(kolom, batas=(25, 50, 75, 100)):
+    """
+    Jumlah anggaran per rentang persentase realisasi:
+    [<25, 25-<50, 50-<75, 75-<100, >=100] untuk batas default.
+    """
+    rasio = kolom.rasio('realisasi', 'pagu')
+    numpy = _numpy()
+    if numpy is not None:
+        bins = numpy.searchsorted(numpy.asarray(batas, dtype=numpy.float64) / 100, rasio, side='right')
+        return [int(count) for count in numpy.bincount(bins, minlength=len(batas) + 1)]
+
+    edges = [value / 100 for value in batas]
+    counts = [0] * (len(batas) + 1)
+    for value in rasio:
+        counts[bisect_right(edges, value)] += 1
+    return counts
@@ -0,0 +1,126 @@
+"""
+Benchmark hot path integrasi Django-Superset
+Berjalan di test database sementara, sehingga data produksi tidak tersentuh
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from budget import bench
+
+
+GROUP_ORDER = ['web', 'aggregate', 'admin', 'load']
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark latency (p50/p95/p99), throughput dan query count untuk hot path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group',
+            action='append',
+            choices=GROUP_ORDER,
+            help='Jalankan hanya grup skenario ini (bisa diulang)'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Jalankan hanya skenario ini (bisa diulang)'
+        )
+        parser.add_argument('--iterations', type=int, default=200, help='Iterasi per skenario (default: 200)')
+        parser.add_argument('--rows', type=int, default=10_000, help='Jumlah baris anggaran untuk skenario web/aggregate')
+        parser.add_argument(
+            '--admin-rows',
+            type=int_list,
+            default=[10_000, 100_000, 1_000_000],
+            help='Ukuran tabel untuk skenario admin changelist (default: 10000,100000,1000000)'
+        )
+        parser.add_argument(
+            '--scales',
+            type=int_list,
+            default=[1, 2, 4],
+            help='Faktor skala load_dummy_data (default: 1,2,4)'
+        )
+        parser.add_argument('--stub-latency-ms', type=float, default=0, help='Latency tambahan stub Superset')
+        parser.add_argument(
+            '--baseline',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'),
+            help='File baseline JSON'
+        )
+        parser.add_argument('--save-baseline', action='store_true', help='Simpan hasil sebagai baseline baru')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Toleransi regresi p95 relatif terhadap baseline (default: 0.25)'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Pakai ulang test database antar run')
+
+    def selected_scenarios(self, options):
+        names = options['scenario']
+        groups = options['group'] or GROUP_ORDER
+        if names:
+            unknown = set(names) - set(bench.SCENARIOS)
+            if unknown:
+                raise CommandError(f"Skenario tidak dikenal: {', '.join(sorted(unknown))}")
+
+        selected = [
+            (name, spec) for name, spec in bench.SCENARIOS.items()
+            if spec['group'] in groups and (not names or name in names)
+        ]
+        # load_dummy_data menghapus data, jadi selalu dijalankan terakhir
+        return sorted(selected, key=lambda item: GROUP_ORDER.index(item[1]['group']))
+
+    def handle(self, *args, **options):
+        scenarios = self.selected_scenarios(options)
+        baseline_path = Path(options['baseline'])
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        results = []
+        try:
+            # Skenario hot path mengukur view tanpa rate limit (semua request
+            # dari satu IP); overhead limiter diukur skenario ratelimit
+            with bench.SupersetStub(latency_ms=options['stub_latency_ms']) as stub, \
+                    override_settings(RATE_LIMIT_ENABLED=False):
+                ctx = bench.BenchContext(client=Client(), options=options, stub=stub)
+                for name, spec in scenarios:
+                    self.stdout.write(f'Menjalankan {name}...')
+                    for result_name, func, iterations in spec['setup'](ctx):
+                        warmup = 0 if iterations == 1 else 3
+                        result = bench.run(result_name, func, iterations, warmup=warmup)
+                        results.append(result)
+                        self.report(result)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['save_baseline']:
+            bench.save_baseline(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f'\nBaseline disimpan ke {baseline_path}'))
+            return
+
+        regressions = bench.compare(results, bench.load_baseline(baseline_path), options['tolerance'])
+        if regressions:
+            self.stdout.write(self.style.ERROR('\nRegresi terdeteksi:'))
+            for name, metric, base, current in regressions:
+                self.stdout.write(f'  - {name}: {metric} {base} -> {current}')
+            raise CommandError(f'{len(regressions)} regresi dibanding baseline')
+
+        self.stdout.write(self.style.SUCCESS('\nTidak ada regresi dibanding baseline'))
+
+    def report(self, result):
+        self.stdout.write(
+            f'  {result.name:<40} '
+            f'p50={result.p50_ms:>9.2f}ms p95={result.p95_ms:>9.2f}ms p99={result.p99_ms:>9.2f}ms '
+            f'{result.throughput_rps:>8.1f} req/s {result.queries_per_request:>6.1f} q/req'
+        )
@@ -0,0 +1,36 @@
+"""
+Buat/perbarui database connection Superset ke data anggaran
+
+Metadata Superset ada di service superset-db; data anggaran dibaca lewat
+koneksi ini dengan role budget_reader (statement_timeout, CONNECTION LIMIT,
+read-only; lihat init-db.sql). Aman dijalankan berulang kali.
+"""
+from django.core.management.base import BaseCommand
+
+from budget import metrics, provisioning
+
+
+class Command(provisioning.ProvisioningCommandMixin, metrics.TrackedCommandMixin, BaseCommand):
+    help = 'Create or update the Superset database connection to the budget data'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--database-uri',
+            help='SQLAlchemy URI data anggaran (default: SUPERSET_BUDGET_DATABASE_URI)'
+        )
+        parser.add_argument(
+            '--columnar',
+            action='store_true',
+            help='Buat koneksi DuckDB ke salinan Parquet (COLUMNAR_SUPERSET_DATABASE) alih-alih PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        if options['columnar']:
+            database = provisioning.columnar_database()
+        else:
+            database = provisioning.budget_database()
+        if options['database_uri']:
+            database['sqlalchemy_uri'] = options['database_uri']
+        self.stdout.write(f"Configuring Superset database '{database['name']}'...")
+        self.provision(options, database=database, permissions=False, dashboards=False)
@@ -0,0 +1,102 @@
+"""
+Worker antrian job latar belakang (lihat budget/jobs.py)
+"""
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from budget import jobs
+
+
+class Command(BaseCommand):
+    help = 'Jalankan worker yang mengeksekusi job dari tabel job_queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=settings.JOB_WORKER_THREADS,
+            help='Jumlah job yang dijalankan bersamaan oleh worker ini'
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.JOB_POLL_SECONDS,
+            help='Jeda (detik) saat antrian kosong'
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Berhenti saat antrian kosong (untuk cron/CI)'
+        )
+
+    def handle(self, *args, **options):
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f'{requeued} job tanpa heartbeat dikembalikan ke antrian')
+
+        heartbeat = jobs.Heartbeat(self.worker)
+        heartbeat.start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {self.worker}: {options['threads']} thread, task: {', '.join(jobs.registered_tasks())}"
+        ))
+
+        threads = [
+            threading.Thread(target=self._loop, args=(options['poll'], options['burst']), name=f'jobworker-{i}')
+            for i in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        finally:
+            self.stopping.set()
+            heartbeat.stop()
+        self.stdout.write('Worker berhenti')
+
+    def _stop(self, signum, frame):
+        # Job yang sedang berjalan diselesaikan dulu
+        self.stdout.write('Menghentikan worker setelah job yang berjalan selesai...')
+        self.stopping.set()
+
+    def _loop(self, poll, burst):
+        last_stale_check = time.monotonic()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    job = jobs.claim(self.worker)
+                except Exception as e:
+                    # Gangguan database sementara: coba lagi, jangan matikan thread
+                    self.stderr.write(f'Gagal mengambil job: {e}')
+                    connection.close()
+                    self.stopping.wait(poll)
+                    continue
+                if job is None:
+                    if burst:
+                        return
+                    self.stopping.wait(poll)
+                    if time.monotonic() - last_stale_check > settings.JOB_STALE_SECONDS:
+                        jobs.requeue_stale()
+                        last_stale_check = time.monotonic()
+                    continue
+
+                self.stdout.write(f'Job #{job.pk} {job.task} dimulai (percobaan {job.attempts}/{job.max_attempts})')
+                start = time.perf_counter()
+                jobs.execute(job)
+                job.refresh_from_db(fields=['status'])
+                self.stdout.write(f'Job #{job.pk} {job.task}: {job.status} ({time.perf_counter() - start:.1f}s)')
+        finally:
+            connection.close()
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
 from datetime import date, timedelta
@@ -6,18 +7,31 @@ import random
 
 from budget.models import (
     Provinsi, KabupatenKota, ProgramKegiatan,
-    JenisAnggaran, AnggaranDaerah, RealisasiBulanan
+    JenisAnggaran, AnggaranDaerah, RealisasiBulanan,
+    SnapshotTahun,
 )
+from budget import reporting
 
 
 class Command(BaseCommand):
     help = 'Load dummy data untuk anggaran pemerintah daerah'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Faktor skala: jumlah tahun anggaran = 3 x scale (default: 1, tahun 2023-2025)'
+        )
+
+    # Satu transaksi: lebih cepat, dan purge edge cache hanya sekali di akhir
+    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write('Memulai loading dummy data...')
 
         # Clear existing data
         self.stdout.write('Menghapus data lama...')
+        SnapshotTahun.objects.all().delete()
         RealisasiBulanan.objects.all().delete()
         AnggaranDaerah.objects.all().delete()
         JenisAnggaran.objects.all().delete()
@@ -133,7 +147,8 @@ class Command(BaseCommand):
 
         # Create Anggaran Daerah
         self.stdout.write('Membuat data anggaran daerah...')
-        tahun_list = [2023, 2024, 2025]
+        # Tahun sebelum 2024 diperlakukan sebagai tahun yang sudah selesai
+        tahun_list = list(range(2026 - 3 * options['scale'], 2026))
         status_list = ['RENCANA', 'DISETUJUI', 'DIREALISASI', 'SELESAI']
 
         anggaran_objects = []
@@ -152,7 +167,7 @@ class Command(BaseCommand):
                         pagu = Decimal(random.randint(100_000_000, 10_000_000_000))
 
                         # Tentukan status berdasarkan tahun
-                        if tahun == 2023:
+                        if tahun <= 2023:
                             status = 'SELESAI'
                             realisasi_persen = random.uniform(85, 98)
                         elif tahun == 2024:
@@ -195,7 +210,7 @@ class Command(BaseCommand):
         for anggaran in anggaran_objects:
             if anggaran.status in ['DIREALISASI', 'SELESAI']:
                 # Tentukan sampai bulan berapa
-                if anggaran.tahun_anggaran == 2023 or anggaran.status == 'SELESAI':
+                if anggaran.tahun_anggaran <= 2023 or anggaran.status == 'SELESAI':
                     max_bulan = 12
                 elif anggaran.tahun_anggaran == 2024:
                     max_bulan = 12
@@ -240,4 +255,7 @@ class Command(BaseCommand):
         self.stdout.write(f'  - Anggaran Daerah: {AnggaranDaerah.objects.count()}')
         self.stdout.write(f'  - Realisasi Bulanan: {RealisasiBulanan.objects.count()}')
 
+        # Seluruh data diganti, refresh biasa lebih murah daripada CONCURRENTLY
+        reporting.refresh(concurrently=False)
+
         self.stdout.write(self.style.SUCCESS('\nDummy data berhasil dimuat!'))
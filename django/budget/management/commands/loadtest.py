@@ -0,0 +1,81 @@
+"""
+Load test HTTP terhadap server Django yang sedang berjalan
+Dipakai untuk membandingkan profil app server (runserver vs gunicorn, dsb)
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from budget import bench
+
+
+DEFAULT_ENDPOINTS = [
+    '/dashboard/',
+    f'/guest-token/{settings.SUPERSET_DASHBOARD_ID}/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Load test endpoint dashboard dan guest token pada server yang sedang berjalan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='URL server (default: http://localhost:8000)')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            help='Path endpoint (bisa diulang, default: /dashboard/ dan /guest-token/<id>/)'
+        )
+        parser.add_argument('--concurrency', type=int, default=16, help='Jumlah client paralel (default: 16)')
+        parser.add_argument('--duration', type=float, default=10, help='Durasi per endpoint dalam detik (default: 10)')
+        parser.add_argument(
+            '--label',
+            required=True,
+            help='Nama profil server yang diuji, mis. runserver atau gunicorn-gthread'
+        )
+        parser.add_argument(
+            '--output',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'loadtest.json'),
+            help='File JSON hasil, dikelompokkan per label'
+        )
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        output = Path(options['output'])
+        all_results = bench.load_baseline(output)
+        label = options['label']
+
+        results = {}
+        for endpoint in options['endpoint'] or DEFAULT_ENDPOINTS:
+            self.stdout.write(f'Load test {endpoint} ({options["concurrency"]} client, {options["duration"]}s)...')
+            result = bench.http_load(
+                endpoint, base_url + endpoint,
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+            )
+            results[endpoint] = result.as_dict()
+            self.stdout.write(
+                f'  {result.throughput_rps:>8.1f} req/s  p50={result.p50_ms:.1f}ms '
+                f'p95={result.p95_ms:.1f}ms p99={result.p99_ms:.1f}ms errors={result.extra["errors"]} '
+                f'429={result.extra["shed"]}'
+            )
+
+        all_results[label] = results
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(all_results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+        self.report(all_results)
+
+    def report(self, all_results):
+        """Tabel throughput per label untuk setiap endpoint"""
+        self.stdout.write(self.style.SUCCESS('\nPerbandingan throughput (req/s, p95 ms):'))
+        endpoints = sorted({endpoint for results in all_results.values() for endpoint in results})
+        for endpoint in endpoints:
+            self.stdout.write(f'  {endpoint}')
+            for label, results in sorted(all_results.items()):
+                if endpoint in results:
+                    result = results[endpoint]
+                    self.stdout.write(f'    {label:<24} {result["throughput_rps"]:>8.1f} req/s  p95={result["p95_ms"]:.1f}ms')
@@ -0,0 +1,25 @@
+"""
+Hitung ulang tabel realisasi_seri dari realisasi_bulanan
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from budget import realisasi_seri
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang realisasi_seri (12 nilai realisasi per anggaran) dari realisasi_bulanan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tahun', type=int, nargs='*', help='Tahun anggaran (default: semua tahun)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for tahun in options['tahun'] or [None]:
+            start = time.perf_counter()
+            written = realisasi_seri.rebuild(tahun=tahun, batch_size=options['batch_size'])
+            label = f'tahun {tahun}' if tahun else 'semua tahun'
+            self.stdout.write(self.style.SUCCESS(
+                f'{written} baris realisasi_seri ({label}) dalam {time.perf_counter() - start:.2f}s'
+            ))
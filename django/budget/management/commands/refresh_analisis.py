@@ -0,0 +1,31 @@
+"""
+Hitung ulang tabel analisis_realisasi (serapan, proyeksi, peringatan)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from budget import analisis
+from budget.models import AnggaranDaerah
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang analisis_realisasi per kabkota/program dari realisasi_seri'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tahun', type=int, nargs='*', help='Tahun anggaran (default: semua tahun)')
+
+    def handle(self, *args, **options):
+        tahun_list = options['tahun'] or sorted(set(
+            AnggaranDaerah.objects.values_list('tahun_anggaran', flat=True).order_by()
+        ))
+        for tahun in tahun_list:
+            start = time.perf_counter()
+            result = analisis.refresh(tahun)
+            if result.get('archived'):
+                self.stdout.write(f"Tahun {tahun}: sudah diarsipkan, analisis tidak diubah")
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Tahun {tahun}: {result['upserted']} baris ditulis, {result['deleted']} dihapus "
+                f"dalam {time.perf_counter() - start:.2f}s"
+            ))
@@ -0,0 +1,52 @@
+"""
+Refresh materialized view mv_laporan_anggaran (dataset pelaporan Superset)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from budget import registry, reporting
+from budget.superset_api import SupersetAPIError, SupersetClient
+
+
+class Command(BaseCommand):
+    help = 'Refresh mv_laporan_anggaran secara concurrent (opsional: daftarkan sebagai dataset Superset)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-concurrently',
+            action='store_true',
+            help='Refresh biasa (mengunci pembaca); lebih cepat untuk data yang berubah total'
+        )
+        parser.add_argument(
+            '--register-superset',
+            action='store_true',
+            help='Daftarkan mv_laporan_anggaran sebagai dataset di Superset instance pertama'
+        )
+        parser.add_argument(
+            '--database-name',
+            help='Nama database connection di Superset (default: SUPERSET_REPORTING_DATABASE)'
+        )
+
+    def handle(self, *args, **options):
+        elapsed = reporting.refresh(concurrently=not options['no_concurrently'])
+        if elapsed is None:
+            self.stdout.write(f'{reporting.TABLE} adalah view biasa di database ini, refresh dilewati')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{reporting.TABLE} di-refresh dalam {elapsed:.2f}s'))
+
+        if options['register_superset']:
+            self._register(options['database_name'])
+
+    def _register(self, database_name):
+        instances = registry.get_registry().instances
+        if not instances:
+            raise CommandError('Belum ada Superset Instance di admin')
+        instance = next(iter(instances.values()))
+
+        try:
+            with SupersetClient.for_instance(instance) as client:
+                dataset_id, created = reporting.register_dataset(client.login(), database_name)
+        except SupersetAPIError as e:
+            raise CommandError(f'{e} ({e.status_code}): {e.response_text[:200]}')
+
+        status = 'dibuat' if created else 'sudah ada'
+        self.stdout.write(self.style.SUCCESS(f'Dataset {reporting.TABLE} {status} (id={dataset_id})'))
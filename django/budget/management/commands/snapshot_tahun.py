@@ -0,0 +1,41 @@
+"""
+Bekukan tahun anggaran yang sudah ditutup ke tabel snapshot
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from budget import reporting
+from budget.snapshot import SnapshotError, create_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Bekukan tahun anggaran yang sudah SELESAI ke tabel snapshot (opsional: arsipkan data live)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tahun', type=int, nargs='+', help='Tahun anggaran, mis. 2023')
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            help='Hapus baris live (anggaran_daerah, realisasi_bulanan) setelah snapshot dibuat'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Izinkan tahun yang masih punya anggaran dengan status selain SELESAI'
+        )
+
+    def handle(self, *args, **options):
+        for tahun in options['tahun']:
+            self.stdout.write(f'Membuat snapshot tahun {tahun}...')
+            try:
+                snapshot = create_snapshot(tahun, archive=options['archive'], force=options['force'])
+            except SnapshotError as e:
+                raise CommandError(str(e))
+
+            self.stdout.write(self.style.SUCCESS(
+                f'  - {snapshot.jumlah_anggaran} anggaran, pagu {snapshot.total_pagu:,.2f}, '
+                f'realisasi {snapshot.total_realisasi:,.2f}'
+                + (' (data live diarsipkan)' if snapshot.archived else '')
+            ))
+
+        # Baris tahun yang dibekukan kini berasal dari snapshot
+        reporting.refresh()
@@ -0,0 +1,100 @@
+"""
+Profil startup worker: waktu import per modul/paket (python -X importtime)
+dan cold start sampai request pertama, dengan dan tanpa preload
+"""
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from budget import startup
+
+
+class Command(BaseCommand):
+    help = 'Laporan waktu import (-X importtime) dan cold start worker sampai request pertama'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            default=settings.WSGI_APPLICATION.rsplit('.', 1)[0],
+            help='Modul yang diimport setelah django.setup() (default: modul WSGI_APPLICATION)'
+        )
+        parser.add_argument('--top', type=int, default=20, help='Jumlah baris per tabel (default: 20)')
+        parser.add_argument('--path', default='/', help='Path request pertama untuk cold start (default: /)')
+        parser.add_argument('--repeat', type=int, default=5, help='Jumlah pengukuran cold start (default: 5)')
+        parser.add_argument('--no-cold-start', action='store_true', help='Hanya profil import')
+        parser.add_argument('--json', action='store_true', help='Output JSON')
+
+    def handle(self, *args, **options):
+        try:
+            imports = startup.profile_imports(options['module'])
+        except RuntimeError as exc:
+            raise CommandError(f"Gagal mengimport {options['module']}:\n{exc}")
+
+        packages = defaultdict(int)
+        for row in imports:
+            packages[row.package] += row.self_us
+        top = options['top']
+        report = {
+            'module': options['module'],
+            'modules': len(imports),
+            'total_ms': sum(row.self_us for row in imports) / 1000,
+            'packages': [
+                {'package': name, 'self_ms': us / 1000}
+                for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+            ],
+            'self': [
+                {'module': row.name, 'self_ms': row.self_us / 1000}
+                for row in sorted(imports, key=lambda row: -row.self_us)[:top]
+            ],
+            # Import langsung (depth 0): siapa yang menarik modul berat
+            'cumulative': [
+                {'module': row.name, 'cumulative_ms': row.cumulative_us / 1000}
+                for row in sorted(
+                    (row for row in imports if row.depth == 0), key=lambda row: -row.cumulative_us
+                )[:top]
+            ],
+        }
+
+        if not options['no_cold_start']:
+            report['cold_start'] = {}
+            for label, preload in (('tanpa_preload', False), ('preload', True)):
+                try:
+                    report['cold_start'][label] = startup.cold_start(
+                        options['path'], preload=preload, repeat=options['repeat']
+                    )
+                except (RuntimeError, AttributeError) as exc:
+                    # AttributeError: os.fork tidak tersedia (bukan POSIX)
+                    self.stderr.write(self.style.WARNING(f'Cold start {label} gagal: {exc}'))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.print_report(report)
+
+    def print_report(self, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Import {report['module']}: {report['modules']} modul, {report['total_ms']:.1f} ms (self)"
+        ))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nPer paket (self)'))
+        for row in report['packages']:
+            self.stdout.write(f"  {row['self_ms']:>9.1f} ms  {row['package']}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nModul terlama (self)'))
+        for row in report['self']:
+            self.stdout.write(f"  {row['self_ms']:>9.1f} ms  {row['module']}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nImport langsung (kumulatif)'))
+        for row in report['cumulative']:
+            self.stdout.write(f"  {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+
+        if report.get('cold_start'):
+            self.stdout.write(self.style.MIGRATE_HEADING('\nCold start sampai request pertama'))
+            for label, result in report['cold_start'].items():
+                self.stdout.write(
+                    f"  {label:<14} median {result['median'] * 1000:>8.1f} ms  "
+                    f"min {result['min'] * 1000:>8.1f} ms  max {result['max'] * 1000:>8.1f} ms  "
+                    f"status {result['status']}"
+                )
@@ -0,0 +1,408 @@
+"""
+Metrics per view: query DB, HTTP call keluar, cache hit/miss dan latency
+
+Data per request dikumpulkan di contextvar oleh MetricsMiddleware dan
+diagregasi per view di memori proses. Hasilnya diekspos sebagai header
+Server-Timing dan endpoint /metrics (format teks Prometheus).
+
+Gunicorn menjalankan beberapa worker di belakang satu /metrics, jadi dengan
+cache Redis (REDIS_URL) setiap proses menambahkan selisih angkanya ke satu
+hash bersama paling sering sekali per METRICS_FLUSH_INTERVAL detik, dan
+/metrics merender total hash tersebut. Tanpa Redis /metrics hanya berisi
+angka worker yang menjawab, dengan label pid.
+
+Bila METRICS_ENABLED=False, middleware tidak dipasang dan fungsi record_*
+hanya membaca satu contextvar yang kosong.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# Hash di shared cache berisi total metrics semua proses (lihat Registry.flush)
+SHARED_KEY = 'budget:metrics'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Counter proses di luar statistik per view (lihat inc()): {nama: help}
+COUNTERS = {
+    'budget_admission_total': 'Keputusan rate limit dan admission control per scope (allowed, limited, shed)',
+    'budget_superset_breaker_total': 'Circuit breaker Superset per instance (opened, closed, rejected)',
+    'budget_degraded_total': 'Respons mode degraded saat Superset tidak tersedia per view dan mode',
+}
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+@dataclass
+class RequestMetrics:
+    db_count: int = 0
+    db_time: float = 0.0
+    http_count: int = 0
+    http_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    view: str = 'unknown'
+    total: float = 0.0
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+            f'http;dur={self.http_time * 1000:.1f};desc="{self.http_count} calls"',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+_current = contextvars.ContextVar('budget_request_metrics', default=None)
+
+
+def current():
+    return _current.get()
+
+
+def record_http(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.http_count += 1
+        metrics.http_time += duration
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+class _QueryTimer:
+    """execute_wrapper yang menambahkan jumlah dan durasi query ke RequestMetrics"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.db_count += 1
+            self.metrics.db_time += time.perf_counter() - start
+
+
+def _session_class():
+    import requests
+
+    class Session(requests.Session):
+        """requests.Session yang mencatat jumlah dan durasi HTTP call keluar"""
+
+        def request(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super().request(*args, **kwargs)
+            finally:
+                record_http(time.perf_counter() - start)
+
+    Session.__module__ = __name__
+    Session.__qualname__ = 'Session'
+    return Session
+
+
+def __getattr__(name):
+    # metrics.Session dibuat saat pertama dipakai: requests (dan urllib3)
+    # tidak ikut diimport oleh setiap modul yang hanya mencatat metrics
+    if name == 'Session':
+        globals()['Session'] = session = _session_class()
+        return session
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _ViewStats:
+    __slots__ = ('requests', 'duration', 'buckets', 'db_count', 'db_time',
+                 'http_count', 'http_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.db_count = 0
+        self.db_time = 0.0
+        self.http_count = 0
+        self.http_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class Registry:
+    """Agregat metrics per view untuk proses ini"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._counters = {}
+        # Nilai per field yang sudah dikirim ke shared cache (lihat flush())
+        self._flushed = {}
+        self._flushed_at = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, view, metrics, duration):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = _ViewStats()
+            stats.requests += 1
+            stats.duration += duration
+            stats.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.db_count += metrics.db_count
+            stats.db_time += metrics.db_time
+            stats.http_count += metrics.http_count
+            stats.http_time += metrics.http_time
+            stats.cache_hits += metrics.cache_hits
+            stats.cache_misses += metrics.cache_misses
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._flushed_at < settings.METRICS_FLUSH_INTERVAL or not enabled():
+            return
+        client = _shared_client()
+        if client is not None:
+            self.flush(client)
+
+    def flush(self, client):
+        """
+        Tambahkan selisih sejak flush terakhir ke hash shared cache. Hanya
+        selisih yang dikirim, sehingga total tidak turun saat worker di-recycle.
+        """
+        with self._lock:
+            self._flushed_at = time.monotonic()
+            fields = _encode(self._views, self._counters)
+            deltas = {
+                field: value - self._flushed.get(field, 0)
+                for field, value in fields.items()
+                if value != self._flushed.get(field, 0)
+            }
+            self._flushed = fields
+        if not deltas:
+            return
+        try:
+            key = caches['default'].make_and_validate_key(SHARED_KEY)
+            pipeline = client.pipeline(transaction=False)
+            for field, delta in deltas.items():
+                if isinstance(delta, float):
+                    pipeline.hincrbyfloat(key, field, delta)
+                else:
+                    pipeline.hincrby(key, field, delta)
+            pipeline.execute()
+        except Exception:
+            logger.warning('Metrics tidak bisa dikirim ke shared cache', exc_info=True)
+            # Kirim ulang pada flush berikutnya
+            with self._lock:
+                for field, delta in deltas.items():
+                    self._flushed[field] -= delta
+
+    def render(self, pid=False):
+        """Format teks Prometheus untuk proses ini (label pid bila diminta)"""
+        with self._lock:
+            views = {view: _copy(stats) for view, stats in self._views.items()}
+            counters = dict(self._counters)
+        return _render(views, counters, f'pid="{os.getpid()}"' if pid else '')
+
+
+def _copy(stats):
+    copy = _ViewStats()
+    for attr in _ViewStats.__slots__:
+        value = getattr(stats, attr)
+        setattr(copy, attr, list(value) if attr == 'buckets' else value)
+    return copy
+
+
+# Field hash shared cache: "v|view|atribut", "b|view|indeks bucket",
+# "c|nama counter|label" (view dan label tidak berisi "|")
+_VIEW_ATTRS = [attr for attr in _ViewStats.__slots__ if attr != 'buckets']
+_FLOAT_ATTRS = {'duration', 'db_time', 'http_time'}
+
+
+def _encode(views, counters):
+    fields = {}
+    for view, stats in views.items():
+        for attr in _VIEW_ATTRS:
+            fields[f'v|{view}|{attr}'] = getattr(stats, attr)
+        for i, count in enumerate(stats.buckets):
+            fields[f'b|{view}|{i}'] = count
+    for (name, labels), value in counters.items():
+        fields[f'c|{name}|{_labels(labels)}'] = value
+    return fields
+
+
+def _decode(fields):
+    views, counters = {}, {}
+    for field, value in fields.items():
+        if isinstance(field, bytes):
+            field = field.decode()
+        kind, name, rest = field.split('|', 2)
+        if kind == 'c':
+            counters[(name, rest)] = _number(value)
+            continue
+        stats = views.get(name)
+        if stats is None:
+            stats = views[name] = _ViewStats()
+        if kind == 'b':
+            stats.buckets[int(rest)] = int(_number(value))
+        elif rest in _FLOAT_ATTRS:
+            setattr(stats, rest, float(value))
+        else:
+            setattr(stats, rest, int(_number(value)))
+    return views, counters
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _render(views, counters, extra_label=''):
+    """Format teks Prometheus (exposition format 0.0.4)"""
+    lines = []
+    views = sorted(views.items())
+    counters = sorted(
+        (name, labels if isinstance(labels, str) else _labels(labels), value)
+        for (name, labels), value in counters.items()
+    )
+
+    def family(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+
+    view_label = f',{extra_label}' if extra_label else ''
+    family('budget_request_duration_seconds', 'histogram', 'Total latency per view', [
+        sample
+        for view, stats in views
+        for sample in _histogram_samples('budget_request_duration_seconds', f'view="{view}"{view_label}', stats)
+    ])
+    for attr, name, help_text in [
+        ('db_count', 'budget_db_queries_total', 'Jumlah query database per view'),
+        ('db_time', 'budget_db_query_seconds_total', 'Durasi query database per view'),
+        ('http_count', 'budget_http_calls_total', 'Jumlah HTTP call keluar per view'),
+        ('http_time', 'budget_http_call_seconds_total', 'Durasi HTTP call keluar per view'),
+        ('cache_hits', 'budget_cache_hits_total', 'Cache hit per view'),
+        ('cache_misses', 'budget_cache_misses_total', 'Cache miss per view'),
+    ]:
+        family(name, 'counter', help_text, [
+            f'{name}{{view="{view}"{view_label}}} {getattr(stats, attr)}' for view, stats in views
+        ])
+    for name, help_text in COUNTERS.items():
+        family(name, 'counter', help_text, [
+            f'{name}{{{",".join(filter(None, [labels, extra_label]))}}} {value}'
+            for counter, labels, value in counters
+            if counter == name
+        ])
+
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels)
+
+
+def _histogram_samples(name, labels, stats):
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+        cumulative += count
+        yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+    yield f'{name}_bucket{{{labels},le="+Inf"}} {stats.requests}'
+    yield f'{name}_sum{{{labels}}} {stats.duration:.6f}'
+    yield f'{name}_count{{{labels}}} {stats.requests}'
+
+
+def _shared_client():
+    """Client Redis dari cache default, None bila cache bukan Redis"""
+    from django.core.cache.backends.redis import RedisCache
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        return backend._cache.get_client(write=True)
+    return None
+
+
+def render():
+    """
+    Teks /metrics. Dengan cache Redis: total semua proses (proses ini flush
+    dulu, proses lain paling lambat METRICS_FLUSH_INTERVAL detik tertinggal).
+    Tanpa shared cache: angka proses yang menjawab saja, dengan label pid.
+    """
+    client = _shared_client()
+    if client is None:
+        return registry.render(pid=True)
+    registry.flush(client)
+    fields = client.hgetall(caches['default'].make_and_validate_key(SHARED_KEY))
+    views, counters = _decode(fields)
+    return _render(views, counters)
+
+
+registry = Registry()
+
+
+def inc(name, value=1, **labels):
+    """Tambah counter proses (nama terdaftar di COUNTERS), dicatat walau METRICS_ENABLED=False"""
+    registry.inc(name, labels, value)
+
+
+@contextmanager
+def track(view='unknown'):
+    """
+    Kumpulkan metrics untuk satu unit kerja (request atau management command)
+    dan catat ke registry saat selesai. Nama view boleh diganti selama
+    unit kerja berjalan lewat metrics.view.
+    """
+    metrics = RequestMetrics(view=view)
+    token = _current.set(metrics)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            timer = _QueryTimer(metrics)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            yield metrics
+    finally:
+        metrics.total = time.perf_counter() - start
+        _current.reset(token)
+        registry.observe(metrics.view, metrics, metrics.total)
+
+
+class TrackedCommandMixin:
+    """
+    Mixin untuk BaseCommand: catat query DB dan HTTP call selama command
+    berjalan; ringkasannya ditampilkan dengan --verbosity 2.
+    """
+
+    def execute(self, *args, **options):
+        name = self.__module__.rsplit('.', 1)[-1]
+        with track(f'command:{name}') as command_metrics:
+            result = super().execute(*args, **options)
+        if options.get('verbosity', 1) >= 2:
+            self.stderr.write(
+                f'[metrics] {command_metrics.db_count} queries ({command_metrics.db_time * 1000:.1f} ms), '
+                f'{command_metrics.http_count} HTTP calls ({command_metrics.http_time * 1000:.1f} ms), '
+                f'total {command_metrics.total * 1000:.1f} ms'
+            )
+        return result
@@ -0,0 +1,70 @@
+"""
+Middleware untuk app budget
+"""
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, routers
+
+
+class MetricsMiddleware:
+    """
+    Catat query DB, HTTP call keluar, cache hit/miss dan latency per view.
+    Hasil per request dikirim sebagai header Server-Timing.
+    Tidak dipasang sama sekali bila METRICS_ENABLED=False.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with metrics.track() as request_metrics:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None:
+                request_metrics.view = match.view_name
+            response['Server-Timing'] = request_metrics.server_timing(time.perf_counter() - start)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Read-your-writes untuk budget.routers.ReplicaRouter: request yang
+    menulis ke database mendapat cookie sticky, dan selama cookie itu masih
+    berlaku semua bacaan browser tersebut diarahkan ke primary.
+    Tidak dipasang bila tidak ada replica.
+    """
+    COOKIE = 'db_primary_until'
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not routers.replica_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _sticky(self, request):
+        try:
+            return float(request.COOKIES.get(self.COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in self.SAFE_METHODS
+            or request.path.startswith(tuple(settings.REPLICA_PRIMARY_PATHS))
+            or self._sticky(request)
+        )
+        with routers.scope(pinned=pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                self.COOKIE, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+MONTHLY_COLUMNS = ',\n'.join(
+    f"    COALESCE(SUM(CASE WHEN rb.bulan = {bulan} THEN rb.jumlah_realisasi END), 0) AS realisasi_{bulan:02d}"
+    for bulan in range(1, 13)
+)
+
+SNAPSHOT_MONTHLY_COLUMNS = ', '.join(f's.realisasi_{bulan:02d}' for bulan in range(1, 13))
+
+# Dataset Superset: tahun yang dibekukan dibaca dari snapshot, sisanya live
+CREATE_VIEW = f"""
+CREATE VIEW v_anggaran_daerah AS
+SELECT
+    a.id AS anggaran_id, a.tahun_anggaran,
+    p.kode_provinsi, p.nama_provinsi,
+    k.kode_kabkota, k.nama_kabkota, k.jenis AS jenis_kabkota,
+    pk.kode_program, pk.nama_program,
+    j.kode_jenis, j.nama_jenis, j.kategori,
+    a.pagu_anggaran, a.realisasi_anggaran, a.sisa_anggaran,
+    a.persentase_realisasi, a.status,
+{MONTHLY_COLUMNS},
+    'live' AS sumber
+FROM anggaran_daerah a
+JOIN kabupaten_kota k ON k.id = a.kabupaten_kota_id
+JOIN provinsi p ON p.id = k.provinsi_id
+JOIN program_kegiatan pk ON pk.id = a.program_id
+JOIN jenis_anggaran j ON j.id = a.jenis_anggaran_id
+LEFT JOIN realisasi_bulanan rb ON rb.anggaran_id = a.id
+WHERE a.tahun_anggaran NOT IN (SELECT tahun FROM snapshot_tahun)
+GROUP BY a.id, k.id, p.id, pk.id, j.id
+UNION ALL
+SELECT
+    s.anggaran_id, s.tahun_anggaran,
+    s.kode_provinsi, s.nama_provinsi,
+    s.kode_kabkota, s.nama_kabkota, s.jenis_kabkota,
+    s.kode_program, s.nama_program,
+    s.kode_jenis, s.nama_jenis, s.kategori,
+    s.pagu_anggaran, s.realisasi_anggaran, s.sisa_anggaran,
+    s.persentase_realisasi, s.status,
+    {SNAPSHOT_MONTHLY_COLUMNS},
+    'snapshot' AS sumber
+FROM anggaran_snapshot s
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotTahun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tahun', models.IntegerField(unique=True)),
+                ('jumlah_anggaran', models.IntegerField(default=0)),
+                ('total_pagu', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_realisasi', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('archived', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Snapshot Tahun',
+                'db_table': 'snapshot_tahun',
+                'ordering': ['-tahun'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotAnggaran',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anggaran_id', models.BigIntegerField()),
+                ('tahun_anggaran', models.IntegerField()),
+                ('kode_provinsi', models.CharField(max_length=2)),
+                ('nama_provinsi', models.CharField(max_length=100)),
+                ('kode_kabkota', models.CharField(max_length=4)),
+                ('nama_kabkota', models.CharField(max_length=100)),
+                ('jenis_kabkota', models.CharField(max_length=10)),
+                ('kode_program', models.CharField(max_length=20)),
+                ('nama_program', models.CharField(max_length=255)),
+                ('kode_jenis', models.CharField(max_length=20)),
+                ('nama_jenis', models.CharField(max_length=100)),
+                ('kategori', models.CharField(max_length=30)),
+                ('pagu_anggaran', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('realisasi_anggaran', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('sisa_anggaran', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('persentase_realisasi', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('status', models.CharField(max_length=20)),
+                ('realisasi_01', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_02', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_03', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_04', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_05', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_06', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_07', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_08', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_09', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_10', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_11', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('realisasi_12', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anggaran', to='budget.snapshottahun')),
+            ],
+            options={
+                'verbose_name_plural': 'Snapshot Anggaran',
+                'db_table': 'anggaran_snapshot',
+                'indexes': [models.Index(fields=['tahun_anggaran', 'kode_provinsi'], name='anggaran_snapshot_thn_prov')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotAgregat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tahun_anggaran', models.IntegerField()),
+                ('kode_provinsi', models.CharField(max_length=2)),
+                ('nama_provinsi', models.CharField(max_length=100)),
+                ('kategori', models.CharField(max_length=30)),
+                ('jumlah_anggaran', models.IntegerField()),
+                ('total_pagu', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('total_realisasi', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agregat', to='budget.snapshottahun')),
+            ],
+            options={
+                'verbose_name_plural': 'Snapshot Agregat',
+                'db_table': 'snapshot_agregat',
+                'unique_together': {('tahun_anggaran', 'kode_provinsi', 'kategori')},
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, 'DROP VIEW IF EXISTS v_anggaran_daerah'),
+    ]
@@ -0,0 +1,112 @@
+from django.db import migrations, models
+
+
+MONTHS = '\n    UNION ALL '.join(f'SELECT {bulan} AS bulan' for bulan in range(1, 13))
+
+REALISASI_BULAN = '\n'.join(
+    f'            WHEN {bulan} THEN v.realisasi_{bulan:02d}' for bulan in range(1, 13)
+)
+
+TANGGAL = {
+    'postgresql': 'make_date(v.tahun_anggaran, m.bulan, 1)',
+    'sqlite': "date(printf('%04d-%02d-01', v.tahun_anggaran, m.bulan))",
+}
+
+# Relasi pelaporan satu baris per (anggaran, bulan), dibangun dari
+# v_anggaran_daerah sehingga ikut membaca snapshot untuk tahun yang dibekukan.
+# Bila v_anggaran_daerah diubah, relasi ini harus di-drop dan dibuat ulang.
+SELECT_LAPORAN = """
+SELECT
+    b.*,
+    SUM(b.realisasi_bulan) OVER (PARTITION BY b.anggaran_id ORDER BY b.bulan) AS realisasi_kumulatif
+FROM (
+    SELECT
+        v.anggaran_id * 100 + m.bulan AS id,
+        v.anggaran_id, v.tahun_anggaran, m.bulan,
+        {tanggal} AS tanggal,
+        v.kode_provinsi, v.nama_provinsi,
+        v.kode_kabkota, v.nama_kabkota, v.jenis_kabkota,
+        v.kode_program, v.nama_program,
+        v.kode_jenis, v.nama_jenis, v.kategori,
+        v.status, v.pagu_anggaran, v.realisasi_anggaran,
+        CASE m.bulan
+{realisasi_bulan}
+        END AS realisasi_bulan,
+        v.sumber
+    FROM v_anggaran_daerah v
+    CROSS JOIN (
+    {months}
+    ) m
+) b
+"""
+
+
+def create_laporan(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    select = SELECT_LAPORAN.format(
+        tanggal=TANGGAL.get(vendor, TANGGAL['postgresql']),
+        realisasi_bulan=REALISASI_BULAN,
+        months=MONTHS,
+    )
+    if vendor != 'postgresql':
+        # Tanpa materialized view (mis. SQLite untuk development) cukup view biasa
+        schema_editor.execute(f'CREATE VIEW mv_laporan_anggaran AS {select}')
+        return
+
+    schema_editor.execute(f'CREATE MATERIALIZED VIEW mv_laporan_anggaran AS {select} WITH DATA')
+    # Unique index wajib untuk REFRESH MATERIALIZED VIEW CONCURRENTLY
+    schema_editor.execute('CREATE UNIQUE INDEX mv_laporan_anggaran_id ON mv_laporan_anggaran (id)')
+    schema_editor.execute(
+        'CREATE INDEX mv_laporan_anggaran_thn_prov ON mv_laporan_anggaran (tahun_anggaran, kode_provinsi)'
+    )
+    schema_editor.execute('CREATE INDEX mv_laporan_anggaran_tanggal ON mv_laporan_anggaran (tanggal)')
+
+
+def drop_laporan(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP MATERIALIZED VIEW IF EXISTS mv_laporan_anggaran')
+    else:
+        schema_editor.execute('DROP VIEW IF EXISTS mv_laporan_anggaran')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0002_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_laporan, drop_laporan),
+        migrations.CreateModel(
+            name='LaporanAnggaran',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('anggaran_id', models.BigIntegerField()),
+                ('tahun_anggaran', models.IntegerField()),
+                ('bulan', models.IntegerField()),
+                ('tanggal', models.DateField()),
+                ('kode_provinsi', models.CharField(max_length=2)),
+                ('nama_provinsi', models.CharField(max_length=100)),
+                ('kode_kabkota', models.CharField(max_length=4)),
+                ('nama_kabkota', models.CharField(max_length=100)),
+                ('jenis_kabkota', models.CharField(max_length=10)),
+                ('kode_program', models.CharField(max_length=20)),
+                ('nama_program', models.CharField(max_length=255)),
+                ('kode_jenis', models.CharField(max_length=20)),
+                ('nama_jenis', models.CharField(max_length=100)),
+                ('kategori', models.CharField(max_length=30)),
+                ('status', models.CharField(max_length=20)),
+                ('pagu_anggaran', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('realisasi_anggaran', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('realisasi_bulan', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('realisasi_kumulatif', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('sumber', models.CharField(max_length=10)),
+            ],
+            options={
+                'verbose_name_plural': 'Laporan Anggaran',
+                'db_table': 'mv_laporan_anggaran',
+                'ordering': ['tahun_anggaran', 'anggaran_id', 'bulan'],
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEN_COLUMNS = ', '.join(f'sen_{bulan:02d}' for bulan in range(1, 13))
+
+SEN_VALUES = ',\n'.join(
+    f"    CAST(ROUND(COALESCE(SUM(CASE WHEN rb.bulan = {bulan} THEN rb.jumlah_realisasi END), 0) * 100) AS BIGINT)"
+    for bulan in range(1, 13)
+)
+
+# Isi awal dari data realisasi_bulanan yang sudah ada
+POPULATE = f"""
+INSERT INTO realisasi_seri (anggaran_id, tahun, {SEN_COLUMNS})
+SELECT
+    a.id, a.tahun_anggaran,
+{SEN_VALUES}
+FROM anggaran_daerah a
+LEFT JOIN realisasi_bulanan rb ON rb.anggaran_id = a.id
+GROUP BY a.id, a.tahun_anggaran
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0003_laporan_anggaran'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RealisasiSeri',
+            fields=[
+                ('anggaran', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='realisasi_seri', serialize=False, to='budget.anggarandaerah')),
+                ('tahun', models.IntegerField()),
+                ('sen_01', models.BigIntegerField(default=0)),
+                ('sen_02', models.BigIntegerField(default=0)),
+                ('sen_03', models.BigIntegerField(default=0)),
+                ('sen_04', models.BigIntegerField(default=0)),
+                ('sen_05', models.BigIntegerField(default=0)),
+                ('sen_06', models.BigIntegerField(default=0)),
+                ('sen_07', models.BigIntegerField(default=0)),
+                ('sen_08', models.BigIntegerField(default=0)),
+                ('sen_09', models.BigIntegerField(default=0)),
+                ('sen_10', models.BigIntegerField(default=0)),
+                ('sen_11', models.BigIntegerField(default=0)),
+                ('sen_12', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Realisasi Seri',
+                'db_table': 'realisasi_seri',
+                'indexes': [models.Index(fields=['tahun'], name='realisasi_seri_tahun')],
+            },
+        ),
+        migrations.RunSQL(POPULATE, migrations.RunSQL.noop),
+    ]
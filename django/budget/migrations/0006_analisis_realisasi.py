@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0005_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalisisRealisasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tahun', models.IntegerField()),
+                ('bulan', models.IntegerField(choices=[(1, 'Januari'), (2, 'Februari'), (3, 'Maret'), (4, 'April'), (5, 'Mei'), (6, 'Juni'), (7, 'Juli'), (8, 'Agustus'), (9, 'September'), (10, 'Oktober'), (11, 'November'), (12, 'Desember')])),
+                ('kode_provinsi', models.CharField(max_length=2)),
+                ('nama_provinsi', models.CharField(max_length=100)),
+                ('kode_kabkota', models.CharField(max_length=4)),
+                ('nama_kabkota', models.CharField(max_length=100)),
+                ('kode_program', models.CharField(max_length=20)),
+                ('nama_program', models.CharField(max_length=255)),
+                ('jumlah_anggaran', models.IntegerField()),
+                ('pagu_anggaran', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('realisasi_bulan', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('realisasi_kumulatif', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('persentase_serapan', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('target_serapan', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('proyeksi_akhir_tahun', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('persentase_proyeksi', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('peringatan', models.CharField(blank=True, choices=[('', 'Normal'), ('WASPADA', 'Waspada'), ('KRITIS', 'Kritis')], max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kabupaten_kota', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budget.kabupatenkota')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budget.programkegiatan')),
+            ],
+            options={
+                'verbose_name_plural': 'Analisis Realisasi',
+                'db_table': 'analisis_realisasi',
+                'ordering': ['tahun', 'kode_kabkota', 'kode_program', 'bulan'],
+                'indexes': [models.Index(fields=['tahun', 'bulan', 'peringatan'], name='analisis_realisasi_peringatan')],
+                'unique_together': {('tahun', 'kabupaten_kota', 'program', 'bulan')},
+            },
+        ),
+    ]
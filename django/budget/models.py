@@ -1,4 +1,8 @@
+from itertools import accumulate
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Provinsi(models.Model):
@@ -99,7 +103,11 @@ class AnggaranDaerah(models.Model):
         ordering = ['-tahun_anggaran', '-pagu_anggaran']
 
     def __str__(self):
-        return f"{self.kabupaten_kota} - {self.program} ({self.tahun_anggaran})"
+        # Nama dari cache referensi, tanpa query kabupaten_kota/program per baris
+        from . import referensi
+        kabupaten_kota = referensi.kabupaten_kota(self.kabupaten_kota_id) or self.kabupaten_kota
+        program = referensi.program(self.program_id) or self.program
+        return f"{kabupaten_kota} - {program} ({self.tahun_anggaran})"
 
     def save(self, *args, **kwargs):
         # Hitung sisa anggaran
@@ -136,3 +144,330 @@ class RealisasiBulanan(models.Model):
 
     def __str__(self):
         return f"{self.anggaran} - {self.get_bulan_display()} {self.tahun}"
+
+
+class RealisasiSeriQuerySet(models.QuerySet):
+    def tahun(self, tahun):
+        return self.filter(tahun=tahun)
+
+    def series(self):
+        """
+        (anggaran_id, (sen_01, ..., sen_12)) untuk setiap baris, satu fetch
+        tanpa membuat objek model
+        """
+        for row in self.values_list('anggaran_id', *RealisasiSeri.KOLOM_BULAN):
+            yield row[0], row[1:]
+
+    def total_bulanan(self):
+        """Total realisasi per bulan (dalam sen) atas seluruh baris, dihitung di database"""
+        totals = self.aggregate(**{kolom: models.Sum(kolom) for kolom in RealisasiSeri.KOLOM_BULAN})
+        return [totals[kolom] or 0 for kolom in RealisasiSeri.KOLOM_BULAN]
+
+    def kumulatif(self):
+        """Realisasi kumulatif per bulan (dalam sen) atas seluruh baris"""
+        return list(accumulate(self.total_bulanan()))
+
+
+class RealisasiSeri(models.Model):
+    """
+    Realisasi bulanan satu anggaran dalam satu baris: 12 nilai integer sen.
+    Diturunkan dari RealisasiBulanan (lihat budget.realisasi_seri), dipakai
+    untuk membaca deret setahun penuh tanpa scan per bulan.
+    """
+    KOLOM_BULAN = tuple(f'sen_{bulan:02d}' for bulan in range(1, 13))
+
+    anggaran = models.OneToOneField(
+        AnggaranDaerah, on_delete=models.CASCADE, primary_key=True, related_name='realisasi_seri'
+    )
+    tahun = models.IntegerField()
+
+    sen_01 = models.BigIntegerField(default=0)
+    sen_02 = models.BigIntegerField(default=0)
+    sen_03 = models.BigIntegerField(default=0)
+    sen_04 = models.BigIntegerField(default=0)
+    sen_05 = models.BigIntegerField(default=0)
+    sen_06 = models.BigIntegerField(default=0)
+    sen_07 = models.BigIntegerField(default=0)
+    sen_08 = models.BigIntegerField(default=0)
+    sen_09 = models.BigIntegerField(default=0)
+    sen_10 = models.BigIntegerField(default=0)
+    sen_11 = models.BigIntegerField(default=0)
+    sen_12 = models.BigIntegerField(default=0)
+
+    objects = RealisasiSeriQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'realisasi_seri'
+        verbose_name_plural = 'Realisasi Seri'
+        indexes = [
+            models.Index(fields=['tahun'], name='realisasi_seri_tahun'),
+        ]
+
+    def __str__(self):
+        return f"{self.anggaran_id} ({self.tahun})"
+
+    @property
+    def nilai(self):
+        """12 nilai realisasi bulanan dalam sen"""
+        return tuple(getattr(self, kolom) for kolom in self.KOLOM_BULAN)
+
+    def kumulatif(self):
+        return list(accumulate(self.nilai))
+
+
+class AnalisisRealisasi(models.Model):
+    """
+    Kurva serapan, proyeksi realisasi akhir tahun dan peringatan
+    under-spending per (tahun, kabupaten/kota, program, bulan). Dihitung dari
+    realisasi_seri oleh budget.analisis; dipakai sebagai dataset Superset.
+    Baris hanya ada sampai bulan realisasi terakhir tahun tersebut.
+    """
+    PERINGATAN_CHOICES = [
+        ('', 'Normal'),
+        ('WASPADA', 'Waspada'),
+        ('KRITIS', 'Kritis'),
+    ]
+
+    tahun = models.IntegerField()
+    bulan = models.IntegerField(choices=RealisasiBulanan.BULAN_CHOICES)
+    kabupaten_kota = models.ForeignKey(KabupatenKota, on_delete=models.CASCADE, related_name='+')
+    program = models.ForeignKey(ProgramKegiatan, on_delete=models.CASCADE, related_name='+')
+
+    kode_provinsi = models.CharField(max_length=2)
+    nama_provinsi = models.CharField(max_length=100)
+    kode_kabkota = models.CharField(max_length=4)
+    nama_kabkota = models.CharField(max_length=100)
+    kode_program = models.CharField(max_length=20)
+    nama_program = models.CharField(max_length=255)
+
+    jumlah_anggaran = models.IntegerField()
+    pagu_anggaran = models.DecimalField(max_digits=20, decimal_places=2)
+    realisasi_bulan = models.DecimalField(max_digits=20, decimal_places=2)
+    realisasi_kumulatif = models.DecimalField(max_digits=20, decimal_places=2)
+    persentase_serapan = models.DecimalField(max_digits=7, decimal_places=2)
+    target_serapan = models.DecimalField(max_digits=5, decimal_places=2)
+    proyeksi_akhir_tahun = models.DecimalField(max_digits=20, decimal_places=2)
+    persentase_proyeksi = models.DecimalField(max_digits=7, decimal_places=2)
+    peringatan = models.CharField(max_length=10, choices=PERINGATAN_CHOICES, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analisis_realisasi'
+        verbose_name_plural = 'Analisis Realisasi'
+        unique_together = ['tahun', 'kabupaten_kota', 'program', 'bulan']
+        ordering = ['tahun', 'kode_kabkota', 'kode_program', 'bulan']
+        indexes = [
+            models.Index(fields=['tahun', 'bulan', 'peringatan'], name='analisis_realisasi_peringatan'),
+        ]
+
+    def __str__(self):
+        return f"{self.nama_kabkota} - {self.nama_program} ({self.tahun}/{self.bulan:02d})"
+
+
+class SnapshotTahun(models.Model):
+    """
+    Tahun anggaran yang sudah dibekukan ke tabel snapshot.
+    Bila archived=True, baris live untuk tahun ini sudah dihapus dari
+    anggaran_daerah/realisasi_bulanan dan snapshot menjadi sumber data tunggal.
+    """
+    tahun = models.IntegerField(unique=True)
+    jumlah_anggaran = models.IntegerField(default=0)
+    total_pagu = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_realisasi = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    archived = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'snapshot_tahun'
+        verbose_name_plural = 'Snapshot Tahun'
+        ordering = ['-tahun']
+
+    def __str__(self):
+        return f"Snapshot {self.tahun}"
+
+
+class SnapshotAnggaran(models.Model):
+    """Baris anggaran yang sudah didenormalisasi, beserta realisasi 12 bulan"""
+    snapshot = models.ForeignKey(SnapshotTahun, on_delete=models.CASCADE, related_name='anggaran')
+    anggaran_id = models.BigIntegerField()
+    tahun_anggaran = models.IntegerField()
+
+    kode_provinsi = models.CharField(max_length=2)
+    nama_provinsi = models.CharField(max_length=100)
+    kode_kabkota = models.CharField(max_length=4)
+    nama_kabkota = models.CharField(max_length=100)
+    jenis_kabkota = models.CharField(max_length=10)
+    kode_program = models.CharField(max_length=20)
+    nama_program = models.CharField(max_length=255)
+    kode_jenis = models.CharField(max_length=20)
+    nama_jenis = models.CharField(max_length=100)
+    kategori = models.CharField(max_length=30)
+
+    pagu_anggaran = models.DecimalField(max_digits=15, decimal_places=2)
+    realisasi_anggaran = models.DecimalField(max_digits=15, decimal_places=2)
+    sisa_anggaran = models.DecimalField(max_digits=15, decimal_places=2)
+    persentase_realisasi = models.DecimalField(max_digits=5, decimal_places=2)
+    status = models.CharField(max_length=20)
+
+    realisasi_01 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_02 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_03 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_04 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_05 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_06 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_07 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_08 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_09 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_10 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_11 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    realisasi_12 = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'anggaran_snapshot'
+        verbose_name_plural = 'Snapshot Anggaran'
+        indexes = [
+            models.Index(fields=['tahun_anggaran', 'kode_provinsi'], name='anggaran_snapshot_thn_prov'),
+        ]
+
+    def __str__(self):
+        return f"{self.jenis_kabkota} {self.nama_kabkota} - {self.nama_program} ({self.tahun_anggaran})"
+
+
+class SnapshotAgregat(models.Model):
+    """Agregat precomputed per (tahun, provinsi, kategori) dari snapshot"""
+    snapshot = models.ForeignKey(SnapshotTahun, on_delete=models.CASCADE, related_name='agregat')
+    tahun_anggaran = models.IntegerField()
+    kode_provinsi = models.CharField(max_length=2)
+    nama_provinsi = models.CharField(max_length=100)
+    kategori = models.CharField(max_length=30)
+    jumlah_anggaran = models.IntegerField()
+    total_pagu = models.DecimalField(max_digits=20, decimal_places=2)
+    total_realisasi = models.DecimalField(max_digits=20, decimal_places=2)
+
+    class Meta:
+        db_table = 'snapshot_agregat'
+        verbose_name_plural = 'Snapshot Agregat'
+        unique_together = ['tahun_anggaran', 'kode_provinsi', 'kategori']
+
+
+class LaporanAnggaran(models.Model):
+    """
+    Baris pelaporan per (anggaran, bulan), sudah didenormalisasi.
+    Materialized view mv_laporan_anggaran (dibuat di migration, diperbarui
+    dengan `manage.py refresh_laporan`); dipakai sebagai dataset Superset.
+    pagu_anggaran berulang di setiap bulan, gunakan filter bulan = 12 atau
+    MAX per anggaran_id untuk menjumlahkan pagu.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    anggaran_id = models.BigIntegerField()
+    tahun_anggaran = models.IntegerField()
+    bulan = models.IntegerField()
+    tanggal = models.DateField()
+
+    kode_provinsi = models.CharField(max_length=2)
+    nama_provinsi = models.CharField(max_length=100)
+    kode_kabkota = models.CharField(max_length=4)
+    nama_kabkota = models.CharField(max_length=100)
+    jenis_kabkota = models.CharField(max_length=10)
+    kode_program = models.CharField(max_length=20)
+    nama_program = models.CharField(max_length=255)
+    kode_jenis = models.CharField(max_length=20)
+    nama_jenis = models.CharField(max_length=100)
+    kategori = models.CharField(max_length=30)
+    status = models.CharField(max_length=20)
+
+    pagu_anggaran = models.DecimalField(max_digits=15, decimal_places=2)
+    realisasi_anggaran = models.DecimalField(max_digits=15, decimal_places=2)
+    realisasi_bulan = models.DecimalField(max_digits=15, decimal_places=2)
+    realisasi_kumulatif = models.DecimalField(max_digits=20, decimal_places=2)
+    sumber = models.CharField(max_length=10)
+
+    class Meta:
+        managed = False
+        db_table = 'mv_laporan_anggaran'
+        verbose_name_plural = 'Laporan Anggaran'
+        ordering = ['tahun_anggaran', 'anggaran_id', 'bulan']
+
+    def __str__(self):
+        return f"{self.nama_kabkota} - {self.nama_program} ({self.tahun_anggaran}/{self.bulan:02d})"
+
+
+class Job(models.Model):
+    """
+    Antrian job latar belakang (import, export, recompute, cache warming,
+    setup Superset). Diambil oleh `manage.py jobworker`, lihat budget/jobs.py.
+    """
+    STATUS_CHOICES = [
+        ('ANTRI', 'Antri'),
+        ('BERJALAN', 'Berjalan'),
+        ('SELESAI', 'Selesai'),
+        ('GAGAL', 'Gagal'),
+        ('DIBATALKAN', 'Dibatalkan'),
+    ]
+
+    task = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ANTRI')
+
+    progress = models.PositiveSmallIntegerField(default=0)
+    progress_message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'job_queue'
+        verbose_name_plural = 'Job'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_queue_status_run_after'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.task} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('SELESAI', 'GAGAL', 'DIBATALKAN')
+
+    def set_progress(self, progress, message=''):
+        """Update progress tanpa menimpa field lain (dipanggil dari dalam task)"""
+        self.progress = max(0, min(100, int(progress)))
+        self.progress_message = message[:255]
+        self.heartbeat_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress,
+            progress_message=self.progress_message,
+            heartbeat_at=self.heartbeat_at,
+        )
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'task': self.task,
+            'status': self.status,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'result': self.result,
+            'error': self.error.strip().splitlines()[-1] if self.error else '',
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,348 @@
+"""
+Provisioning akses publik Superset (role, permission, dashboard)
+
+Idempotent: state Superset dibaca dulu dengan sesedikit mungkin request
+(list dashboard sudah memuat roles dan status published), lalu hanya objek
+yang berbeda dari target yang di-update. Update dashboard dikirim paralel
+dengan ThreadPoolExecutor berukuran tetap, memakai satu session login.
+
+Role/permission memakai security API Flask-AppBuilder, sehingga
+superset_config.py harus mengaktifkan FAB_ADD_SECURITY_API. Database
+connection ke data anggaran juga diprovision di sini (budget_database()).
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from . import registry
+from .superset_api import SupersetAPIError, SupersetClient
+
+
+# Permission minimum untuk melihat dashboard tanpa login
+PUBLIC_PERMISSIONS = [
+    ('can_read', 'Dashboard'),
+    ('can_read', 'Chart'),
+    ('can_read', 'Dataset'),
+    ('can_read', 'Database'),
+    ('can_read', 'Query'),
+    ('can_explore', 'Superset'),
+    ('can_dashboard', 'Superset'),
+    ('can_explore_json', 'Superset'),
+    ('can_slice', 'Superset'),
+    ('can_this_form_get', 'DashboardModelView'),
+    ('can_this_form_post', 'DashboardModelView'),
+    ('menu_access', 'Dashboard'),
+    ('menu_access', 'Dashboards'),
+]
+
+PAGE_SIZE = 100
+
+DASHBOARD_COLUMNS = 'id,dashboard_title,published,roles.id,roles.name'
+
+
+@dataclass
+class ProvisionResult:
+    role_name: str = 'Public'
+    role_id: int = None
+    role_created: bool = False
+    permissions_synced: bool = False
+    permissions_added: list = field(default_factory=list)
+    permissions_missing: list = field(default_factory=list)
+    dashboards_synced: bool = False
+    dashboards_updated: list = field(default_factory=list)
+    dashboards_unchanged: int = 0
+    database_name: str = ''
+    database_id: int = None
+    database_action: str = ''
+    errors: list = field(default_factory=list)
+    requests: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def lines(self):
+        lines = []
+        if self.database_id is not None:
+            lines.append(f'Database {self.database_name} {self.database_action} (id={self.database_id})')
+        if self.role_id is not None:
+            lines.append(f"Role {self.role_name} {'dibuat' if self.role_created else 'sudah ada'} (id={self.role_id})")
+        if self.permissions_synced:
+            lines.append(f'Permission ditambahkan: {len(self.permissions_added)}')
+            lines += [f'  + {perm} on {view}' for perm, view in self.permissions_added]
+            lines += [f'  ! tidak ada di Superset: {perm} on {view}' for perm, view in self.permissions_missing]
+        if self.dashboards_synced:
+            lines.append(
+                f'Dashboard diperbarui: {len(self.dashboards_updated)}, tidak berubah: {self.dashboards_unchanged}'
+            )
+            lines += [f'  ~ #{dashboard_id} {title}' for dashboard_id, title in self.dashboards_updated]
+        lines += [f'  x {error}' for error in self.errors]
+        lines.append(f'{self.requests} request API dalam {self.seconds:.2f}s')
+        return lines
+
+
+class Provisioner:
+    """
+    client: SupersetClient yang sudah login.
+    workers: batas request paralel (pool koneksi client sebaiknya >= workers).
+    """
+
+    def __init__(self, client, role_name='Public', permissions=PUBLIC_PERMISSIONS, workers=8):
+        self.client = client
+        self.role_name = role_name
+        self.permissions = list(permissions)
+        self.workers = workers
+        self.result = ProvisionResult(role_name=role_name)
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.result.requests += 1
+
+    def _get(self, path, **kwargs):
+        self._count()
+        return self.client.get(path, **kwargs)
+
+    def _send(self, method, path, **kwargs):
+        self._count()
+        return self.client.request(method, path, **kwargs)
+
+    def _list_all(self, path, columns=None):
+        """Semua halaman list endpoint; halaman kedua dst. diambil paralel"""
+        def page(number):
+            q = f'(page:{number},page_size:{PAGE_SIZE})'
+            if columns:
+                q = f'(columns:!({columns}),page:{number},page_size:{PAGE_SIZE})'
+            return self._get(path, params={'q': q})
+
+        first = page(0)
+        rows = list(first['result'])
+        pages = -(-first.get('count', len(rows)) // PAGE_SIZE)
+        if pages > 1:
+            with ThreadPoolExecutor(self.workers) as executor:
+                for data in executor.map(page, range(1, pages)):
+                    rows.extend(data['result'])
+        return rows
+
+    # Role & permission -----------------------------------------------------
+
+    def ensure_role(self):
+        for role in self._list_all('/api/v1/security/roles/'):
+            if role['name'] == self.role_name:
+                self.result.role_id = role['id']
+                return role['id']
+        created = self._send('POST', '/api/v1/security/roles/', json={'name': self.role_name})
+        self.result.role_id = created['id']
+        self.result.role_created = True
+        return created['id']
+
+    def sync_permissions(self, role_id):
+        """Tambahkan permission yang belum ada; permission lain di role tidak dihapus"""
+        current = {
+            (perm['permission_name'], perm['view_menu_name']): perm['id']
+            for perm in self._get(f'/api/v1/security/roles/{role_id}/permissions/')['result']
+        }
+        self.result.permissions_synced = True
+        wanted = [perm for perm in self.permissions if perm not in current]
+        if not wanted:
+            return
+
+        available = {
+            (pvm['permission']['name'], pvm['view_menu']['name']): pvm['id']
+            for pvm in self._list_all('/api/v1/security/permissions-resources/')
+        }
+        added = [perm for perm in wanted if perm in available]
+        self.result.permissions_missing = [perm for perm in wanted if perm not in available]
+        if added:
+            # Endpoint ini mengganti seluruh permission role, jadi kirim gabungannya
+            ids = sorted(set(current.values()) | {available[perm] for perm in added})
+            self._send(
+                'POST', f'/api/v1/security/roles/{role_id}/permissions',
+                json={'permission_view_menu_ids': ids},
+            )
+        self.result.permissions_added = added
+
+    # Dashboard -------------------------------------------------------------
+
+    def sync_dashboards(self, role_id, dashboard_ids=None):
+        """Publish dashboard dan tambahkan role ke dashboard (semua, atau dashboard_ids saja)"""
+        self.result.dashboards_synced = True
+        dashboards = self._list_all('/api/v1/dashboard/', columns=DASHBOARD_COLUMNS)
+        if dashboard_ids:
+            found = {d['id'] for d in dashboards}
+            self.result.errors += [f'Dashboard {i} tidak ditemukan' for i in dashboard_ids if i not in found]
+            dashboards = [d for d in dashboards if d['id'] in set(dashboard_ids)]
+
+        changes = []
+        for dashboard in dashboards:
+            role_ids = [role['id'] for role in dashboard.get('roles') or []]
+            payload = {}
+            if not dashboard.get('published'):
+                payload['published'] = True
+            if role_id not in role_ids:
+                payload['roles'] = role_ids + [role_id]
+            if payload:
+                changes.append((dashboard, payload))
+        self.result.dashboards_unchanged = len(dashboards) - len(changes)
+
+        def update(change):
+            dashboard, payload = change
+            try:
+                self._send('PUT', f"/api/v1/dashboard/{dashboard['id']}", json=payload)
+            except SupersetAPIError as e:
+                return dashboard, f"Dashboard {dashboard['id']}: {e} ({e.status_code}) {e.response_text[:200]}"
+            return dashboard, None
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            for dashboard, error in executor.map(update, changes):
+                if error:
+                    self.result.errors.append(error)
+                else:
+                    self.result.dashboards_updated.append((dashboard['id'], dashboard.get('dashboard_title', '')))
+
+    # Database connection ------------------------------------------------------
+
+    def sync_database(self, name, sqlalchemy_uri, extra):
+        """
+        Buat atau perbarui database connection Superset. Superset menyamarkan
+        password di sqlalchemy_uri, jadi perubahan password saja tidak
+        terdeteksi; yang dibandingkan adalah URI tanpa password dan `extra`.
+        """
+        self.result.database_name = name
+        payload = {
+            'database_name': name,
+            'sqlalchemy_uri': sqlalchemy_uri,
+            'extra': json.dumps(extra),
+            'expose_in_sqllab': True,
+        }
+        database_id = self.client.find_database(name)
+        self._count()
+        if database_id is None:
+            created = self._send('POST', '/api/v1/database/', json=payload)
+            self.result.database_id, self.result.database_action = created['id'], 'dibuat'
+            return
+
+        current = self._get(f'/api/v1/database/{database_id}')['result']
+        current_extra = json.loads(current.get('extra') or '{}')
+        unchanged = (
+            _without_password(current['sqlalchemy_uri']) == _without_password(sqlalchemy_uri)
+            and all(current_extra.get(key) == value for key, value in extra.items())
+        )
+        if not unchanged:
+            self._send('PUT', f'/api/v1/database/{database_id}', json=payload)
+        self.result.database_id = database_id
+        self.result.database_action = 'tidak berubah' if unchanged else 'diperbarui'
+
+    def run(self, dashboard_ids=None, permissions=True, dashboards=True, database=None):
+        """database: dict argumen sync_database (name, sqlalchemy_uri, extra), opsional"""
+        start = time.perf_counter()
+        if database:
+            self.sync_database(**database)
+        if permissions or dashboards:
+            role_id = self.ensure_role()
+            if permissions:
+                self.sync_permissions(role_id)
+            if dashboards:
+                self.sync_dashboards(role_id, dashboard_ids)
+        self.result.seconds = time.perf_counter() - start
+        return self.result
+
+
+def _without_password(uri):
+    parts = urlsplit(uri)
+    netloc = parts.netloc.rpartition('@')[2]
+    if parts.username:
+        netloc = f'{parts.username}@{netloc}'
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def budget_database():
+    """
+    Argumen sync_database untuk koneksi Superset ke data anggaran: role
+    budget_reader (init-db.sql) dengan statement_timeout per koneksi.
+    """
+    return {
+        'name': settings.SUPERSET_REPORTING_DATABASE,
+        'sqlalchemy_uri': settings.SUPERSET_BUDGET_DATABASE_URI,
+        'extra': {
+            'engine_params': {
+                'connect_args': {
+                    'application_name': 'superset',
+                    'options': f'-c statement_timeout={settings.SUPERSET_STATEMENT_TIMEOUT_MS}',
+                },
+            },
+        },
+    }
+
+
+def default_client(url=None, username=None, password=None, **kwargs):
+    """
+    Client ke Superset Instance pertama di admin; fallback ke container
+    superset dengan user admin bawaan (dipakai saat setup awal).
+    """
+    instances = registry.get_registry().instances
+    instance = next(iter(instances.values()), None)
+    return SupersetClient(
+        url or (instance.url if instance else 'http://superset:8088'),
+        username or (instance.username if instance else 'admin'),
+        password or (instance.password if instance else 'admin'),
+        **kwargs,
+    )
+
+
+class ProvisioningCommandMixin:
+    """Argumen dan alur bersama command provisioning Superset"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='URL Superset (default: Superset Instance pertama di admin)')
+        parser.add_argument('--username', help='User Superset')
+        parser.add_argument('--password', help='Password Superset')
+        parser.add_argument('--role', default='Public', help='Nama role publik (default: Public)')
+        parser.add_argument('--workers', type=int, default=8, help='Request API paralel (default: 8)')
+        parser.add_argument(
+            '--wait-timeout', type=int, default=60,
+            help='Batas waktu menunggu Superset siap, dalam detik (default: 60)'
+        )
+
+    def provision(self, options, **run_kwargs):
+        """Jalankan Provisioner; raise CommandError bila ada yang gagal"""
+        client = default_client(
+            options['url'], options['username'], options['password'], pool_size=options['workers'],
+        )
+        with client:
+            try:
+                self.stdout.write(f'Menunggu Superset di {client.base_url}...')
+                waited = client.wait_until_ready(timeout=options['wait_timeout'])
+                self.stdout.write(f'Superset siap ({waited:.1f}s)')
+                client.login()
+                result = Provisioner(client, options['role'], workers=options['workers']).run(**run_kwargs)
+            except SupersetAPIError as e:
+                detail = f' ({e.status_code}): {e.response_text[:200]}' if e.status_code else ''
+                raise CommandError(f'{e}{detail}')
+
+        for line in result.lines():
+            self.stdout.write(line)
+        if not result.ok:
+            raise CommandError(f'Provisioning selesai dengan {len(result.errors)} error')
+        self.stdout.write(self.style.SUCCESS('Provisioning selesai'))
+        return result
+
+
+def columnar_database():
+    """
+    Argumen sync_database untuk salinan Parquet (budget/columnar.py). DuckDB
+    in-memory di Superset; dataset dibuat sebagai virtual dataset, mis.
+    SELECT * FROM read_parquet('/analytics/parquet/anggaran_daerah.parquet')
+    """
+    return {
+        'name': settings.COLUMNAR_SUPERSET_DATABASE,
+        'sqlalchemy_uri': 'duckdb:///:memory:',
+        'extra': {'engine_params': {}},
+    }
@@ -0,0 +1,304 @@
+"""
+Rate limit dan admission control untuk endpoint guest token dan dashboard
+
+Dua lapis, dicek berurutan oleh decorator @rate_limited:
+
+1. Admission control (lokal per proses, tanpa I/O): tolak bila request
+   terlindungi yang sedang diproses proses ini sudah ADMISSION_MAX_INFLIGHT,
+   atau request sudah antri lebih lama dari ADMISSION_MAX_QUEUE_MS di depan
+   worker (header X-Request-Start dari Caddy). Beban dibuang sebelum
+   latency semua request ikut runtuh.
+2. Token bucket di shared cache: per IP, per dashboard dan global. Ketiga
+   bucket dicek dan dikurangi sekaligus; bila satu kosong tidak ada token
+   yang terpakai. Dengan cache Redis (settings REDIS_URL) operasinya satu
+   script Lua yang atomik; backend lain memakai get/set di bawah lock
+   proses (atomik per proses, perkiraan antar proses).
+
+Request yang ditolak mendapat 429 dengan Retry-After. Setiap keputusan
+dicatat di counter budget_admission_total (endpoint /metrics). Bila cache
+tidak bisa dihubungi, request dilewatkan (fail open).
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import cache, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'budget:ratelimit'
+
+# Identitas (IP, dashboard id dari URL) yang aman dipakai langsung di key cache
+SAFE_IDENT = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+# KEYS: bucket; ARGV[1]: ttl, lalu rate dan burst per bucket.
+# State bucket "token:waktu"; waktu dari server Redis agar semua worker
+# memakai jam yang sama. Return {indeks bucket yang kosong (0: lolos), tunggu detik}
+TAKE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local ttl = tonumber(ARGV[1])
+local levels = {}
+local denied = 0
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local level = burst
+    local state = redis.call('GET', key)
+    if state then
+        local sep = string.find(state, ':', 1, true)
+        local last = tonumber(string.sub(state, 1, sep - 1))
+        local updated = tonumber(string.sub(state, sep + 1))
+        level = math.min(burst, last + math.max(0, now - updated) * rate)
+    end
+    levels[i] = level
+    if level < 1 and (1 - level) / rate > wait then
+        wait = (1 - level) / rate
+        denied = i
+    end
+end
+if denied == 0 then
+    for i, key in ipairs(KEYS) do
+        redis.call('SET', key, string.format('%.6f:%.6f', levels[i] - 1, now), 'EX', ttl)
+    end
+end
+return {denied, string.format('%.3f', wait)}
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float
+    burst: int
+
+    @property
+    def refill_seconds(self):
+        return self.burst / self.rate
+
+
+@cache
+def parse_limit(value):
+    """'rate:burst' (rate per detik) -> Limit; kosong atau rate 0 -> None"""
+    if not value:
+        return None
+    rate, _, burst = value.partition(':')
+    rate = float(rate)
+    if rate <= 0:
+        return None
+    return Limit(rate=rate, burst=max(int(burst or math.ceil(rate)), 1))
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    reason: str = ''
+    retry_after: int = 0
+
+
+def client_ip(request):
+    """
+    IP client: entri X-Forwarded-For ke-RATE_LIMIT_PROXY_COUNT dari kanan
+    (entri yang ditambahkan proxy tepercaya), atau REMOTE_ADDR tanpa proxy
+    """
+    count = settings.RATE_LIMIT_PROXY_COUNT
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if count and forwarded:
+        parts = [part.strip() for part in forwarded.split(',') if part.strip()]
+        if parts:
+            return parts[-min(count, len(parts))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _ident(value):
+    value = str(value)
+    return value if SAFE_IDENT.match(value) else hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def buckets(request, dashboard=None):
+    """[(alasan, key cache, Limit)] untuk request ini"""
+    result = []
+    for reason, limit, ident in (
+        ('ip', settings.RATE_LIMIT_IP, client_ip(request)),
+        ('dashboard', settings.RATE_LIMIT_DASHBOARD, dashboard),
+        ('global', settings.RATE_LIMIT_GLOBAL, 'all'),
+    ):
+        limit = parse_limit(limit)
+        if limit is not None and ident is not None:
+            result.append((reason, f'{KEY_PREFIX}:{reason}:{_ident(ident)}', limit))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Token bucket
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_script = None
+
+
+def _redis_client(backend):
+    from django.core.cache.backends.redis import RedisCache
+    if isinstance(backend, RedisCache):
+        return backend._cache.get_client(write=True)
+    return None
+
+
+def _take_redis(client, backend, items, ttl):
+    global _script
+    if _script is None:
+        _script = client.register_script(TAKE_SCRIPT)
+    args = [ttl]
+    for _, _, limit in items:
+        args.extend([limit.rate, limit.burst])
+    denied, wait = _script(keys=[backend.make_and_validate_key(key) for _, key, _ in items], args=args, client=client)
+    return int(denied), float(wait)
+
+
+def _take_local(backend, items, ttl):
+    with _lock:
+        now = time.time()
+        states = backend.get_many([key for _, key, _ in items])
+        levels = []
+        denied, wait = 0, 0.0
+        for i, (_, key, limit) in enumerate(items, 1):
+            level = limit.burst
+            if key in states:
+                last, updated = states[key]
+                level = min(limit.burst, last + max(0.0, now - updated) * limit.rate)
+            levels.append(level)
+            if level < 1 and (1 - level) / limit.rate > wait:
+                denied, wait = i, (1 - level) / limit.rate
+        if not denied:
+            backend.set_many(
+                {key: (level - 1, now) for (_, key, _), level in zip(items, levels)}, timeout=ttl
+            )
+    return denied, wait
+
+
+def take(items):
+    """Ambil satu token dari semua bucket sekaligus. Return Decision."""
+    if not items:
+        return Decision(True)
+    backend = caches['default']
+    ttl = math.ceil(max(limit.refill_seconds for _, _, limit in items)) + 1
+    client = _redis_client(backend)
+    if client is not None:
+        denied, wait = _take_redis(client, backend, items, ttl)
+    else:
+        denied, wait = _take_local(backend, items, ttl)
+    if not denied:
+        return Decision(True)
+    return Decision(False, items[denied - 1][0], max(math.ceil(wait), 1))
+
+
+# ---------------------------------------------------------------------------
+# Admission control
+# ---------------------------------------------------------------------------
+
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+
+def queue_seconds(request):
+    """
+    Lama request antri sebelum sampai di view, dari header X-Request-Start
+    ("t=<epoch>" dalam detik, milidetik atau mikrodetik). None bila tidak ada.
+    """
+    value = request.META.get('HTTP_X_REQUEST_START', '')
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(time.time() - started, 0.0)
+
+
+def _admit(request):
+    """Decision admission; bila lolos, slot inflight sudah diambil"""
+    global _inflight
+    queued = queue_seconds(request)
+    if queued is not None and queued * 1000 > settings.ADMISSION_MAX_QUEUE_MS:
+        return Decision(False, 'queue', max(math.ceil(queued), 1))
+    with _inflight_lock:
+        if settings.ADMISSION_MAX_INFLIGHT and _inflight >= settings.ADMISSION_MAX_INFLIGHT:
+            return Decision(False, 'inflight', 1)
+        _inflight += 1
+    return Decision(True)
+
+
+def _release():
+    global _inflight
+    with _inflight_lock:
+        _inflight -= 1
+
+
+def inflight():
+    return _inflight
+
+
+# ---------------------------------------------------------------------------
+# Decorator view
+# ---------------------------------------------------------------------------
+
+def too_many_requests(decision):
+    response = JsonResponse(
+        {'error': 'Terlalu banyak permintaan, coba lagi nanti', 'retry_after': decision.retry_after},
+        status=429,
+    )
+    response['Retry-After'] = str(decision.retry_after)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def rate_limited(scope, dashboard_kwarg=None):
+    """
+    Decorator view: admission control lalu token bucket. dashboard_kwarg
+    adalah nama argumen URL berisi id/slug dashboard (None di URL = dashboard
+    default).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not settings.RATE_LIMIT_ENABLED:
+                return view_func(request, *args, **kwargs)
+
+            decision = _admit(request)
+            if not decision.allowed:
+                metrics.inc('budget_admission_total', scope=scope, decision='shed', reason=decision.reason)
+                return too_many_requests(decision)
+            try:
+                dashboard = None
+                if dashboard_kwarg:
+                    dashboard = kwargs.get(dashboard_kwarg) or 'default'
+                try:
+                    decision = take(buckets(request, dashboard))
+                except Exception:
+                    logger.warning('Rate limit dilewati: shared cache tidak bisa dipakai', exc_info=True)
+                    metrics.inc('budget_admission_total', scope=scope, decision='allowed', reason='error')
+                    return view_func(request, *args, **kwargs)
+
+                if not decision.allowed:
+                    metrics.inc('budget_admission_total', scope=scope, decision='limited', reason=decision.reason)
+                    return too_many_requests(decision)
+                metrics.inc('budget_admission_total', scope=scope, decision='allowed', reason='')
+                return view_func(request, *args, **kwargs)
+            finally:
+                _release()
+        return wrapper
+    return decorator
@@ -0,0 +1,99 @@
+"""
+Pemeliharaan tabel realisasi_seri (12 nilai realisasi per anggaran, dalam sen)
+
+RealisasiBulanan tetap menjadi sumber data. Baris seri dihitung ulang
+secara set-based: satu query agregat (pivot 12 bulan) lalu bulk upsert.
+Perubahan lewat ORM dijadwalkan dari signal dan diproses sekali per
+transaksi, sehingga load massal tidak menghitung ulang per baris. Setiap
+rebuild menjadwalkan refresh analisis_realisasi untuk tahun yang tersentuh.
+"""
+import threading
+
+from django.db.models import BigIntegerField, Q, Sum
+from django.db.models.functions import Cast, Round
+
+from . import analisis, routers
+from .models import AnggaranDaerah, RealisasiSeri
+from .transaksi import on_commit_once
+
+
+BULAN = range(1, 13)
+
+_pending = threading.local()
+
+
+def _seri_rows(anggaran):
+    """Pivot realisasi_bulanan per anggaran ke 12 kolom sen dalam satu query"""
+    monthly = {
+        f'sen_{bulan:02d}': Cast(
+            Round(Sum(
+                'realisasi_bulanan__jumlah_realisasi',
+                filter=Q(realisasi_bulanan__bulan=bulan),
+                default=0,
+            ) * 100),
+            BigIntegerField(),
+        )
+        for bulan in BULAN
+    }
+    return (
+        anggaran
+        .values('id', 'tahun_anggaran')
+        .annotate(**monthly)
+        .order_by('id')
+    )
+
+
+def rebuild(anggaran_ids=None, tahun=None, batch_size=2000):
+    """
+    Hitung ulang baris seri untuk anggaran tertentu, satu tahun, atau semuanya.
+    Return jumlah baris yang ditulis.
+    """
+    anggaran = AnggaranDaerah.objects.all()
+    if anggaran_ids is not None:
+        anggaran = anggaran.filter(id__in=anggaran_ids)
+    if tahun is not None:
+        anggaran = anggaran.filter(tahun_anggaran=tahun)
+
+    written = 0
+    batch = []
+    tahun_list = set()
+    # Dipanggil tepat setelah commit: replica mungkin belum menerima perubahannya
+    with routers.use_primary():
+        for row in _seri_rows(anggaran).iterator(chunk_size=batch_size):
+            anggaran_id = row.pop('id')
+            tahun_list.add(row['tahun_anggaran'])
+            batch.append(RealisasiSeri(anggaran_id=anggaran_id, tahun=row.pop('tahun_anggaran'), **row))
+            if len(batch) >= batch_size:
+                written += _upsert(batch)
+                batch = []
+        if batch:
+            written += _upsert(batch)
+    analisis.schedule(tahun_list)
+    return written
+
+
+def _upsert(batch):
+    RealisasiSeri.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['anggaran'],
+        update_fields=['tahun', *RealisasiSeri.KOLOM_BULAN],
+    )
+    return len(batch)
+
+
+def schedule(anggaran_id):
+    """Jadwalkan rebuild untuk anggaran ini setelah transaksi commit"""
+    pending = getattr(_pending, 'ids', None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.add(anggaran_id)
+
+    on_commit_once(_flush)
+
+
+def _flush():
+    ids = getattr(_pending, 'ids', None) or set()
+    _pending.ids = None
+    if ids:
+        rebuild(anggaran_ids=sorted(ids))
@@ -0,0 +1,110 @@
+"""
+Cache in-process data referensi: Provinsi, KabupatenKota, ProgramKegiatan, JenisAnggaran
+
+Keempat tabel kecil dan hampir tidak pernah berubah, sehingga dimuat
+sekali (empat query) ke map id -> objek dan kode -> id. __str__ anggaran,
+kolom admin, filter dan analisis membaca map ini alih-alih join atau query
+tambahan per baris.
+
+Objek di cache dipakai bersama oleh semua thread: perlakukan sebagai
+read-only, jangan diubah atau di-save. KabupatenKota.provinsi sudah terisi
+dari cache yang sama (tanpa query).
+
+Invalidation sama dengan budget.registry (budget.cache_proses): signal
+post_save/post_delete (lihat budget/signals.py) memanggil invalidate()
+setelah transaksi commit, proses lain memeriksa versinya paling sering
+sekali per REFERENSI_VERSION_CHECK_INTERVAL detik.
+QuerySet.update()/bulk_create() pada tabel referensi tidak memanggil
+signal; panggil invalidate() setelah transaksinya commit.
+"""
+from django.conf import settings
+
+from .cache_proses import VersionedCache
+from .models import Provinsi, KabupatenKota, ProgramKegiatan, JenisAnggaran
+
+
+VERSION_CACHE_KEY = 'budget:referensi:version'
+REFERENSI_VERSION_CHECK_INTERVAL = getattr(settings, 'REFERENSI_VERSION_CHECK_INTERVAL', 5)
+
+
+class Referensi:
+    def __init__(self, provinsi, kabupaten_kota, program, jenis_anggaran):
+        self.provinsi = {obj.id: obj for obj in provinsi}
+        self.kabupaten_kota = {obj.id: obj for obj in kabupaten_kota}
+        self.program = {obj.id: obj for obj in program}
+        self.jenis_anggaran = {obj.id: obj for obj in jenis_anggaran}
+
+        self.provinsi_by_kode = {obj.kode_provinsi: obj.id for obj in provinsi}
+        self.kabupaten_kota_by_kode = {obj.kode_kabkota: obj.id for obj in kabupaten_kota}
+        self.program_by_kode = {obj.kode_program: obj.id for obj in program}
+        self.jenis_anggaran_by_kode = {obj.kode_jenis: obj.id for obj in jenis_anggaran}
+
+        self.kabupaten_kota_by_provinsi = {}
+        for obj in kabupaten_kota:
+            self.kabupaten_kota_by_provinsi.setdefault(obj.provinsi_id, []).append(obj.id)
+
+
+def _load():
+    provinsi = list(Provinsi.objects.order_by('kode_provinsi'))
+    provinsi_map = {obj.id: obj for obj in provinsi}
+    kabupaten_kota = list(KabupatenKota.objects.order_by('kode_kabkota'))
+    for obj in kabupaten_kota:
+        obj.provinsi = provinsi_map[obj.provinsi_id]
+    return Referensi(
+        provinsi,
+        kabupaten_kota,
+        list(ProgramKegiatan.objects.order_by('kode_program')),
+        list(JenisAnggaran.objects.order_by('kode_jenis')),
+    )
+
+
+_cache = VersionedCache(VERSION_CACHE_KEY, _load, REFERENSI_VERSION_CHECK_INTERVAL)
+
+
+def get_referensi():
+    """Data referensi saat ini; dimuat ulang bila kosong atau versinya berubah"""
+    return _cache.get()
+
+
+def reload():
+    """Muat ulang cache lokal saja, mis. saat menemukan id yang belum dikenal"""
+    _cache.clear()
+    return _cache.get()
+
+
+def invalidate():
+    """Kosongkan cache lokal dan beri tahu proses lain lewat shared cache"""
+    _cache.invalidate()
+
+
+def provinsi(provinsi_id):
+    return get_referensi().provinsi.get(provinsi_id)
+
+
+def kabupaten_kota(kabupaten_kota_id):
+    return get_referensi().kabupaten_kota.get(kabupaten_kota_id)
+
+
+def program(program_id):
+    return get_referensi().program.get(program_id)
+
+
+def jenis_anggaran(jenis_anggaran_id):
+    return get_referensi().jenis_anggaran.get(jenis_anggaran_id)
+
+
+def kabupaten_kota_id(kode_kabkota):
+    """kode_kabkota -> id, None bila tidak dikenal"""
+    return get_referensi().kabupaten_kota_by_kode.get(kode_kabkota)
+
+
+def program_id(kode_program):
+    return get_referensi().program_by_kode.get(kode_program)
+
+
+def jenis_anggaran_id(kode_jenis):
+    return get_referensi().jenis_anggaran_by_kode.get(kode_jenis)
+
+
+def provinsi_id(kode_provinsi):
+    return get_referensi().provinsi_by_kode.get(kode_provinsi)
@@ -0,0 +1,177 @@
+"""
+Registry dashboard Superset berbasis SupersetInstance/SupersetDashboard
+
+Semua metadata instance dan dashboard dimuat sekali ke cache in-process.
+Lookup di hot path hanya membaca dict, tanpa query database. Password
+instance disimpan terenkripsi dan baru didekripsi (sekali per instance)
+saat jalur Superset API membutuhkannya, sehingga key Fernet yang salah atau
+password rusak tidak menggagalkan halaman /dashboard/ publik.
+
+Slug dashboard selalu berbentuk "<nama>-<id>" sehingga URL publik satu
+dashboard tidak bergeser bila dashboard lain dihapus atau diganti nama;
+URL lama setelah rename tetap ditemukan lewat id di akhir slug.
+
+Invalidation lewat budget.cache_proses: signal post_save/post_delete (lihat
+budget/signals.py) memanggil invalidate() setelah transaksi commit, proses
+lain memeriksa versinya paling sering sekali per
+REGISTRY_VERSION_CHECK_INTERVAL detik.
+"""
+import re
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from django_superset_integration.models import SupersetInstance, SupersetDashboard
+
+from .cache_proses import VersionedCache
+
+
+VERSION_CACHE_KEY = 'budget:superset_registry:version'
+REGISTRY_VERSION_CHECK_INTERVAL = getattr(settings, 'SUPERSET_REGISTRY_VERSION_CHECK_INTERVAL', 5)
+
+
+@dataclass(frozen=True)
+class InstanceInfo:
+    id: int
+    address: str
+    username: str
+    encrypted_password: str = field(repr=False)
+
+    @property
+    def url(self):
+        return f"http://{self.address}"
+
+    @cached_property
+    def password(self):
+        return decrypt_password(self.encrypted_password)
+
+
+@dataclass(frozen=True)
+class DashboardInfo:
+    id: int
+    slug: str
+    name: str
+    integration_id: str
+    superset_link: str
+    instance: InstanceInfo
+
+    @property
+    def domain(self):
+        return self.instance.address
+
+    @property
+    def standalone_url(self):
+        return f"{self.instance.url}/superset/dashboard/{self.integration_id}/?standalone=true"
+
+
+class Registry:
+    def __init__(self, instances, dashboards):
+        self.instances = {instance.id: instance for instance in instances}
+        self.dashboards = list(dashboards)
+        self.by_slug = {d.slug: d for d in self.dashboards}
+        self.by_id = {d.id: d for d in self.dashboards}
+        self.by_integration_id = {d.integration_id: d for d in self.dashboards}
+
+
+def decrypt_password(password):
+    """Dekripsi password SupersetInstance (Fernet, lihat SupersetInstance.set_password)"""
+    if not password:
+        return ''
+    from cryptography.fernet import Fernet
+    cipher_suite = Fernet(settings.ENCRYPTION_KEY)
+    return cipher_suite.decrypt(password.encode()).decode()
+
+
+def _load():
+    instances = [
+        InstanceInfo(
+            id=obj.id,
+            address=obj.address,
+            username=obj.username,
+            encrypted_password=obj.password or '',
+        )
+        for obj in SupersetInstance.objects.all()
+    ]
+    instance_map = {instance.id: instance for instance in instances}
+
+    dashboards = []
+    for obj in SupersetDashboard.objects.order_by('id'):
+        dashboards.append(DashboardInfo(
+            id=obj.id,
+            slug=dashboard_slug(obj.id, obj.name),
+            name=obj.name,
+            integration_id=obj.integration_id,
+            superset_link=obj.superset_link or '',
+            instance=instance_map[obj.domain_id],
+        ))
+
+    return Registry(instances, dashboards)
+
+
+def dashboard_slug(dashboard_id, name):
+    """Slug stabil: hanya bergantung pada nama dan id dashboard itu sendiri"""
+    base = slugify(name)
+    return f"{base}-{dashboard_id}" if base else str(dashboard_id)
+
+
+_cache = VersionedCache(VERSION_CACHE_KEY, _load, REGISTRY_VERSION_CHECK_INTERVAL)
+
+
+def get_registry():
+    """Registry saat ini; dimuat ulang bila kosong atau versinya berubah"""
+    return _cache.get()
+
+
+def invalidate():
+    """Kosongkan registry lokal dan beri tahu proses lain lewat shared cache"""
+    _cache.invalidate()
+
+
+def all_dashboards():
+    return get_registry().dashboards
+
+
+_SLUG_ID_RE = re.compile(r'(?:^|-)(\d+)$')
+
+
+def get_dashboard(slug):
+    """
+    Lookup berdasarkan slug. Slug lama (nama sebelum rename) atau id saja
+    tetap ditemukan lewat id di akhir slug; bandingkan dengan .slug untuk
+    redirect ke URL kanonik.
+    """
+    registry = get_registry()
+    dashboard = registry.by_slug.get(slug)
+    if dashboard is None:
+        match = _SLUG_ID_RE.search(slug)
+        if match:
+            dashboard = registry.by_id.get(int(match.group(1)))
+    return dashboard
+
+
+def get_dashboard_by_id(dashboard_id):
+    """Lookup berdasarkan primary key SupersetDashboard atau integration ID Superset"""
+    registry = get_registry()
+    if str(dashboard_id).isdigit() and int(dashboard_id) in registry.by_id:
+        return registry.by_id[int(dashboard_id)]
+    return registry.by_integration_id.get(str(dashboard_id))
+
+
+def get_default_dashboard():
+    """
+    Dashboard pertama di registry.
+    Fallback ke settings bila belum ada dashboard yang dikonfigurasi di admin.
+    """
+    dashboards = all_dashboards()
+    if dashboards:
+        return dashboards[0]
+    return DashboardInfo(
+        id=None,
+        slug='default',
+        name='Dashboard',
+        integration_id=settings.SUPERSET_DASHBOARD_ID,
+        superset_link='',
+        instance=InstanceInfo(id=None, address=settings.SUPERSET_DOMAIN, username='', encrypted_password=''),
+    )
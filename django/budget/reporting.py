@@ -0,0 +1,52 @@
+"""
+Relasi pelaporan mv_laporan_anggaran untuk dataset Superset
+
+Chart Superset membaca satu tabel lebar (nama, kode, kategori, tahun,
+bulan, nilai) tanpa join. Di PostgreSQL relasi ini materialized view yang
+di-refresh CONCURRENTLY, sehingga pembaca tidak pernah diblokir selama
+refresh berjalan.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import LaporanAnggaran
+
+
+TABLE = LaporanAnggaran._meta.db_table
+SCHEMA = 'public'
+
+
+def is_materialized():
+    return connection.vendor == 'postgresql'
+
+
+def refresh(concurrently=True):
+    """
+    Refresh mv_laporan_anggaran. Return durasi dalam detik, atau None bila
+    relasinya view biasa (selalu up to date).
+    """
+    if not is_materialized():
+        return None
+
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{TABLE}"
+        )
+    return time.perf_counter() - start
+
+
+def register_dataset(client, database_name=None):
+    """
+    Daftarkan mv_laporan_anggaran sebagai dataset Superset.
+    client: SupersetClient yang sudah login. Return (dataset_id, created).
+    """
+    from .superset_api import SupersetAPIError
+
+    database_name = database_name or settings.SUPERSET_REPORTING_DATABASE
+    database_id = client.find_database(database_name)
+    if database_id is None:
+        raise SupersetAPIError(f"Database '{database_name}' tidak ditemukan di Superset")
+    return client.ensure_dataset(database_id, SCHEMA, TABLE)
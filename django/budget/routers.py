@@ -0,0 +1,99 @@
+"""
+Database router: baca data app budget dari read replica
+
+Aktif bila DATABASES punya alias REPLICA (DB_REPLICA_HOST diset). Query
+baca model budget diarahkan ke replica, kecuali:
+- request sedang "dipin" ke primary: request non-GET, path di
+  REPLICA_PRIMARY_PATHS (admin), atau browser yang baru saja menulis
+  (cookie sticky selama REPLICA_STICKY_SECONDS, read-your-writes)
+- query berjalan di dalam transaksi pada primary
+- model di PRIMARY_MODELS (antrian job harus konsisten)
+- kode yang butuh data terbaru memakai `with use_primary():`
+
+Semua tulis dan migrasi tetap ke primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA = 'replica'
+
+APP_LABELS = {'budget'}
+
+PRIMARY_MODELS = {'job'}
+
+
+@dataclass
+class _State:
+    pinned: bool = False
+    wrote: bool = False
+
+
+_state = ContextVar('budget_db_state', default=None)
+
+
+def replica_enabled():
+    return REPLICA in connections.databases
+
+
+@contextmanager
+def scope(pinned=False):
+    """State routing untuk satu request/unit kerja; state.wrote = ada query tulis"""
+    state = _State(pinned=pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Paksa query baca di blok ini ke primary"""
+    state = _state.get()
+    with scope(pinned=True) as inner:
+        yield inner
+    if state is not None and inner.wrote:
+        state.wrote = True
+
+
+class ReplicaRouter:
+    def _routed(self, model):
+        return (
+            model._meta.app_label in APP_LABELS
+            and model._meta.model_name not in PRIMARY_MODELS
+        )
+
+    def db_for_read(self, model, **hints):
+        if not replica_enabled() or not self._routed(model):
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _state.get()
+        if state is not None and state.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Setelah menulis, sisa unit kerja ini membaca dari primary
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        dbs = {DEFAULT_DB_ALIAS, REPLICA}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -0,0 +1,96 @@
+"""
+Signal handlers untuk menjaga cache in-process tetap konsisten
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from django_superset_integration.models import SupersetInstance, SupersetDashboard
+
+from . import analisis, columnar, edge_cache, events, realisasi_seri, referensi, registry
+from .models import (
+    Provinsi, KabupatenKota, ProgramKegiatan,
+    JenisAnggaran, AnggaranDaerah, RealisasiBulanan, AnalisisRealisasi
+)
+from .transaksi import on_commit_once
+
+
+@receiver(post_save, sender=SupersetInstance)
+@receiver(post_delete, sender=SupersetInstance)
+@receiver(post_save, sender=SupersetDashboard)
+@receiver(post_delete, sender=SupersetDashboard)
+def invalidate_superset_registry(sender, **kwargs):
+    # Invalidation sebelum commit membuat proses lain memuat ulang baris lama
+    # dan menyimpannya di bawah versi baru
+    on_commit_once(registry.invalidate)
+    edge_cache.purge('dashboard')
+
+
+@receiver(post_save, sender=Provinsi)
+@receiver(post_delete, sender=Provinsi)
+@receiver(post_save, sender=KabupatenKota)
+@receiver(post_delete, sender=KabupatenKota)
+@receiver(post_save, sender=ProgramKegiatan)
+@receiver(post_delete, sender=ProgramKegiatan)
+@receiver(post_save, sender=JenisAnggaran)
+@receiver(post_delete, sender=JenisAnggaran)
+def invalidate_referensi(sender, **kwargs):
+    on_commit_once(referensi.invalidate)
+
+
+@receiver(post_save, sender=Provinsi)
+@receiver(post_delete, sender=Provinsi)
+@receiver(post_save, sender=KabupatenKota)
+@receiver(post_delete, sender=KabupatenKota)
+@receiver(post_save, sender=ProgramKegiatan)
+@receiver(post_delete, sender=ProgramKegiatan)
+@receiver(post_save, sender=JenisAnggaran)
+@receiver(post_delete, sender=JenisAnggaran)
+@receiver(post_save, sender=AnggaranDaerah)
+@receiver(post_delete, sender=AnggaranDaerah)
+@receiver(post_save, sender=RealisasiBulanan)
+@receiver(post_delete, sender=RealisasiBulanan)
+def purge_budget_pages(sender, **kwargs):
+    edge_cache.purge('anggaran')
+    columnar.schedule()
+
+
+@receiver(post_save, sender=RealisasiBulanan)
+@receiver(post_delete, sender=RealisasiBulanan)
+def schedule_realisasi_seri(sender, instance, **kwargs):
+    realisasi_seri.schedule(instance.anggaran_id)
+
+
+@receiver(post_save, sender=AnggaranDaerah)
+def schedule_realisasi_seri_tahun(sender, instance, created, **kwargs):
+    # Anggaran baru mendapat baris seri kosong; perubahan tahun ikut tersalin
+    realisasi_seri.schedule(instance.pk)
+
+
+@receiver(post_delete, sender=AnggaranDaerah)
+def schedule_analisis_tahun(sender, instance, **kwargs):
+    # Baris seri ikut terhapus (cascade) tanpa rebuild; grupnya perlu dihitung ulang
+    analisis.schedule([instance.tahun_anggaran])
+
+
+@receiver(post_save, sender=KabupatenKota)
+@receiver(post_save, sender=ProgramKegiatan)
+def schedule_analisis_nama(sender, instance, created, **kwargs):
+    # Nama/kode didenormalisasi di analisis_realisasi
+    if created:
+        return
+    field = 'kabupaten_kota' if sender is KabupatenKota else 'program'
+    analisis.schedule(
+        AnalisisRealisasi.objects.filter(**{field: instance}).values_list('tahun', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=AnggaranDaerah)
+@receiver(post_delete, sender=AnggaranDaerah)
+def notify_anggaran_changed(sender, instance, **kwargs):
+    events.notify(instance.tahun_anggaran, instance.kabupaten_kota_id)
+
+
+@receiver(post_save, sender=RealisasiBulanan)
+@receiver(post_delete, sender=RealisasiBulanan)
+def notify_realisasi_changed(sender, instance, **kwargs):
+    events.notify_anggaran(instance.anggaran_id)
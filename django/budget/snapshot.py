@@ -0,0 +1,203 @@
+"""
+Snapshot dan arsip tahun anggaran yang sudah ditutup
+
+Data tahun yang sudah SELESAI tidak berubah lagi, sehingga bisa dibekukan
+ke tabel anggaran_snapshot (satu baris per anggaran, sudah didenormalisasi,
+dengan realisasi 12 bulan sebagai kolom) plus agregat precomputed di
+snapshot_agregat dan snapshot_tahun. View SQL v_anggaran_daerah dan
+endpoint ringkasan membaca snapshot untuk tahun yang dibekukan dan tabel
+live untuk tahun lainnya.
+
+Arsip (archive=True) menghapus baris live tahun tersebut tanpa signal per
+baris: satu tahun nasional berarti ratusan ribu baris realisasi, dan signal
+post_delete memuat setiap baris lalu menjadwalkan purge, sinkronisasi
+kolumnar dan notifikasi satu per satu. Efek sampingnya dijadwalkan sekali
+secara eksplisit di _archive_live().
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import columnar, edge_cache, events
+from .models import (
+    AnggaranDaerah, RealisasiBulanan, RealisasiSeri,
+    SnapshotTahun, SnapshotAnggaran, SnapshotAgregat,
+)
+
+
+BULAN = range(1, 13)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _snapshot_rows(tahun):
+    """Baris anggaran tahun ini, sudah di-join dan di-pivot per bulan, dalam satu query"""
+    monthly = {
+        f'realisasi_{bulan:02d}': Sum(
+            'realisasi_bulanan__jumlah_realisasi',
+            filter=Q(realisasi_bulanan__bulan=bulan),
+            default=0,
+        )
+        for bulan in BULAN
+    }
+    return (
+        AnggaranDaerah.objects
+        .filter(tahun_anggaran=tahun)
+        .values(
+            'tahun_anggaran', 'pagu_anggaran', 'realisasi_anggaran',
+            'sisa_anggaran', 'persentase_realisasi', 'status',
+            anggaran_id=F('id'),
+            kode_provinsi=F('kabupaten_kota__provinsi__kode_provinsi'),
+            nama_provinsi=F('kabupaten_kota__provinsi__nama_provinsi'),
+            kode_kabkota=F('kabupaten_kota__kode_kabkota'),
+            nama_kabkota=F('kabupaten_kota__nama_kabkota'),
+            jenis_kabkota=F('kabupaten_kota__jenis'),
+            kode_program=F('program__kode_program'),
+            nama_program=F('program__nama_program'),
+            kode_jenis=F('jenis_anggaran__kode_jenis'),
+            nama_jenis=F('jenis_anggaran__nama_jenis'),
+            kategori=F('jenis_anggaran__kategori'),
+        )
+        .annotate(**monthly)
+        .order_by('anggaran_id')
+    )
+
+
+@transaction.atomic
+def create_snapshot(tahun, archive=False, force=False, batch_size=2000):
+    """
+    Bekukan tahun anggaran ke tabel snapshot.
+    - force: izinkan tahun yang masih punya anggaran dengan status selain SELESAI
+    - archive: hapus baris live setelah snapshot dibuat
+    Return SnapshotTahun.
+    """
+    live = AnggaranDaerah.objects.filter(tahun_anggaran=tahun)
+    existing = SnapshotTahun.objects.filter(tahun=tahun).first()
+
+    if not live.exists():
+        if existing and existing.archived:
+            raise SnapshotError(f"Tahun {tahun} sudah diarsipkan, snapshot tidak bisa dibuat ulang")
+        raise SnapshotError(f"Tidak ada data anggaran untuk tahun {tahun}")
+
+    open_count = live.exclude(status='SELESAI').count()
+    if open_count and not force:
+        raise SnapshotError(
+            f"Tahun {tahun} masih punya {open_count} anggaran yang belum SELESAI (gunakan --force)"
+        )
+
+    if existing:
+        existing.delete()
+    snapshot = SnapshotTahun.objects.create(tahun=tahun)
+
+    batch = []
+    for row in _snapshot_rows(tahun).iterator(chunk_size=batch_size):
+        batch.append(SnapshotAnggaran(snapshot=snapshot, **row))
+        if len(batch) >= batch_size:
+            SnapshotAnggaran.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SnapshotAnggaran.objects.bulk_create(batch)
+
+    agregat = (
+        SnapshotAnggaran.objects
+        .filter(snapshot=snapshot)
+        .values('tahun_anggaran', 'kode_provinsi', 'nama_provinsi', 'kategori')
+        .annotate(
+            jumlah_anggaran=Count('id'),
+            total_pagu=Sum('pagu_anggaran'),
+            total_realisasi=Sum('realisasi_anggaran'),
+        )
+        .order_by()
+    )
+    SnapshotAgregat.objects.bulk_create([SnapshotAgregat(snapshot=snapshot, **row) for row in agregat])
+
+    totals = snapshot.agregat.aggregate(
+        jumlah=Sum('jumlah_anggaran'),
+        pagu=Sum('total_pagu'),
+        realisasi=Sum('total_realisasi'),
+    )
+    snapshot.jumlah_anggaran = totals['jumlah'] or 0
+    snapshot.total_pagu = totals['pagu'] or 0
+    snapshot.total_realisasi = totals['realisasi'] or 0
+
+    if archive:
+        _archive_live(tahun, batch_size)
+        snapshot.archived = True
+
+    snapshot.save()
+    edge_cache.purge('anggaran')
+    return snapshot
+
+
+def _raw_delete_batches(queryset, batch_size):
+    """DELETE per batch primary key, tanpa memuat objek dan tanpa signal"""
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks)._raw_delete(queryset.db)
+
+
+def _archive_live(tahun, batch_size):
+    """
+    Hapus anggaran live satu tahun beserta realisasi dan baris serinya.
+    _raw_delete tidak melewati Collector, jadi tabel anak dihapus lebih dulu;
+    signal yang biasanya dipicu per baris diganti satu jadwal per tahun:
+    purge edge cache, sinkronisasi kolumnar dan notifikasi dashboard per
+    kabupaten/kota. realisasi_seri tidak perlu dibangun ulang (barisnya ikut
+    dihapus) dan analisis_realisasi tahun yang diarsipkan dibiarkan apa adanya.
+    """
+    live = AnggaranDaerah.objects.filter(tahun_anggaran=tahun)
+    kabkota_ids = list(live.values_list('kabupaten_kota_id', flat=True).distinct().order_by())
+
+    _raw_delete_batches(RealisasiBulanan.objects.filter(anggaran__tahun_anggaran=tahun), batch_size)
+    _raw_delete_batches(RealisasiSeri.objects.filter(anggaran__tahun_anggaran=tahun), batch_size)
+    _raw_delete_batches(live, batch_size)
+
+    edge_cache.purge('anggaran')
+    columnar.schedule()
+    for kabkota_id in kabkota_ids:
+        events.notify(tahun, kabkota_id)
+
+
+def ringkasan_per_tahun():
+    """
+    Total anggaran per tahun. Tahun yang dibekukan dibaca dari snapshot_tahun
+    (satu baris per tahun), tahun lainnya diagregasi dari tabel live.
+    """
+    snapshots = list(SnapshotTahun.objects.all())
+    rows = [
+        {
+            'tahun': snapshot.tahun,
+            'jumlah_anggaran': snapshot.jumlah_anggaran,
+            'pagu_anggaran': snapshot.total_pagu,
+            'realisasi_anggaran': snapshot.total_realisasi,
+            'sumber': 'snapshot',
+        }
+        for snapshot in snapshots
+    ]
+
+    live = (
+        AnggaranDaerah.objects
+        .exclude(tahun_anggaran__in=[snapshot.tahun for snapshot in snapshots])
+        .values('tahun_anggaran')
+        .annotate(
+            jumlah=Count('id'),
+            pagu=Sum('pagu_anggaran'),
+            realisasi=Sum('realisasi_anggaran'),
+        )
+        .order_by()
+    )
+    rows.extend(
+        {
+            'tahun': row['tahun_anggaran'],
+            'jumlah_anggaran': row['jumlah'],
+            'pagu_anggaran': row['pagu'] or 0,
+            'realisasi_anggaran': row['realisasi'] or 0,
+            'sumber': 'live',
+        }
+        for row in live
+    )
+    return sorted(rows, key=lambda row: row['tahun'])
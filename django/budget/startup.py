@@ -0,0 +1,249 @@
+"""
+Startup worker: warmup aplikasi dan profil import
+
+Modul berat (requests, cryptography, numpy, duckdb) diimport saat
+pertama dipakai, bukan saat modul budget dimuat, sehingga jobworker dan
+management command tidak ikut membayarnya. Proses web memanggil warm()
+sekali sebelum melayani request: URLconf (semua view dan admin), template,
+katalog terjemahan dan modul jalur Superset dimuat di depan.
+
+Dengan gunicorn preload_app (lihat gunicorn.conf.py) warm() berjalan di
+master, sehingga setiap worker hasil fork - termasuk pengganti setelah
+max_requests - langsung melayani request pertama tanpa import apa pun.
+
+Modul ini sengaja hanya mengimport stdlib di top level: dipakai juga oleh
+proses anak `manage.py startup_profile` sebelum Django di-setup.
+"""
+import importlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+# Modul jalur request Superset/guest token yang diimport lazy oleh kode budget
+WARM_MODULES = [
+    'requests',
+    'cryptography.fernet',
+]
+
+# Template admin yang di-extend halaman admin (selain template di DIRS)
+WARM_TEMPLATES = [
+    'admin/base.html',
+    'admin/base_site.html',
+    'admin/index.html',
+    'admin/login.html',
+    'admin/change_list.html',
+    'admin/change_form.html',
+]
+
+IMPORT_TIME_PREFIX = 'import time:'
+
+
+def _templates():
+    from django.conf import settings
+
+    names = []
+    for engine in settings.TEMPLATES:
+        for directory in engine.get('DIRS', []):
+            directory = Path(directory)
+            names.extend(path.relative_to(directory).as_posix() for path in sorted(directory.rglob('*.html')))
+    return [*names, *WARM_TEMPLATES]
+
+
+def warm():
+    """
+    Muat semua yang dibutuhkan request pertama, tanpa query database dan
+    tanpa memulai thread (aman sebelum fork). Return durasi dalam detik.
+    """
+    from django.conf import settings
+    from django.template import TemplateDoesNotExist, loader
+    from django.urls import get_resolver
+    from django.utils import translation
+
+    from . import metrics, tokens
+
+    start = time.perf_counter()
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    # Kelas metrics.Session dibuat saat pertama diakses
+    metrics.Session
+    # Kunci guest token (baca file PEM, siapkan HMAC/kunci privat)
+    tokens.get_keyring()
+
+    # Import URLconf beserta semua view, lalu bangun tabel reverse()
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+    with translation.override(settings.LANGUAGE_CODE):
+        for name in _templates():
+            try:
+                loader.get_template(name)
+            except TemplateDoesNotExist:
+                pass
+    return time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Profil (manage.py startup_profile)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ImportTime:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def package(self):
+        return self.name.split('.')[0]
+
+
+def _child_env():
+    from django.conf import settings
+
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+    env['PYTHONPATH'] = os.pathsep.join(path for path in sys.path if path)
+    return env
+
+
+def _run_child(code, *args, importtime=False):
+    from django.conf import settings
+
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', code, *args]
+    result = subprocess.run(
+        command, cwd=settings.BASE_DIR, env=_child_env(), capture_output=True, text=True,
+    )
+    if result.returncode:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith(IMPORT_TIME_PREFIX)]
+        raise RuntimeError('\n'.join(errors[-20:]) or f'Proses anak gagal (exit {result.returncode})')
+    return result
+
+
+def parse_importtime(output):
+    """Baris `import time: self | cumulative | nama` dari stderr -> list ImportTime"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        parts = line[len(IMPORT_TIME_PREFIX):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append(ImportTime(
+            name=stripped,
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            depth=(len(name) - len(stripped) - 1) // 2,
+        ))
+    return rows
+
+
+def profile_imports(module='config.wsgi'):
+    """
+    Import module (setelah django.setup()) di interpreter baru dengan
+    `-X importtime`. Return list ImportTime sesuai urutan import.
+    """
+    code = 'import importlib, sys, django; django.setup(); importlib.import_module(sys.argv[1])'
+    return parse_importtime(_run_child(code, module, importtime=True).stderr)
+
+
+def _request(application, path):
+    """Satu request GET langsung ke aplikasi WSGI, return status"""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8000',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    status = []
+
+    def start_response(value, headers, exc_info=None):
+        status.append(value)
+        return lambda data: None
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status[0] if status else ''
+
+
+def _serve_first(path, preload, start):
+    """
+    Dijalankan di proses anak. Tanpa preload: waktu dari awal proses sampai
+    request pertama selesai (worker yang memuat aplikasi sendiri). Dengan
+    preload: aplikasi dimuat dan di-warm dulu, lalu fork; yang diukur waktu
+    worker hasil fork sampai request pertamanya selesai.
+    """
+    import django
+    django.setup()
+    from django.core.servers.basehttp import get_internal_wsgi_application
+
+    application = get_internal_wsgi_application()
+    if not preload:
+        status = _request(application, path)
+        print(json.dumps({'seconds': time.perf_counter() - start, 'status': status}))
+        return
+
+    from django.db import connections
+    warm()
+    connections.close_all()
+    sys.stdout.flush()
+    pid = os.fork()
+    if pid == 0:
+        start = time.perf_counter()
+        status = _request(application, path)
+        print(json.dumps({'seconds': time.perf_counter() - start, 'status': status}))
+        sys.stdout.flush()
+        os._exit(0)
+    _, code = os.waitpid(pid, 0)
+    sys.exit(os.waitstatus_to_exitcode(code))
+
+
+def cold_start(path='/', preload=False, repeat=5):
+    """
+    Ukur cold start sampai request pertama selesai, repeat kali di proses
+    baru. Return {'median', 'min', 'max'} (detik) dan status HTTP.
+    """
+    code = (
+        'import sys, time; start = time.perf_counter(); '
+        'from budget import startup; startup._serve_first(sys.argv[1], sys.argv[2] == "1", start)'
+    )
+    runs = []
+    for _ in range(repeat):
+        result = _run_child(code, path, '1' if preload else '0')
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    seconds = [run['seconds'] for run in runs]
+    return {
+        'median': statistics.median(seconds),
+        'min': min(seconds),
+        'max': max(seconds),
+        'status': runs[-1]['status'],
+    }
@@ -0,0 +1,140 @@
+"""
+Client minimal untuk REST API Superset (login, CSRF, request JSON)
+"""
+import time
+
+from . import metrics
+
+
+class SupersetAPIError(Exception):
+    def __init__(self, message, status_code=None, response_text=''):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_text = response_text
+
+
+class SupersetClient:
+    """
+    Session terautentikasi ke Superset.
+    base_url tanpa trailing slash, mis. http://superset:8088
+    """
+
+    def __init__(self, base_url, username, password, timeout=10, pool_size=10):
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.session = metrics.Session()
+        # pool_size = jumlah koneksi keep-alive; samakan dengan jumlah thread
+        # bila session dipakai paralel
+        self.session.mount(self.base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    @classmethod
+    def for_instance(cls, instance, **kwargs):
+        """Client dari registry.InstanceInfo (password sudah didekripsi)"""
+        return cls(instance.url, instance.username, instance.password, **kwargs)
+
+    def wait_until_ready(self, timeout=60, initial_delay=0.5, max_delay=8):
+        """
+        Tunggu /health menjawab 200 dengan exponential backoff.
+        Return jumlah detik menunggu, raise SupersetAPIError bila timeout.
+        """
+        start = time.monotonic()
+        delay = initial_delay
+        last_error = ''
+        while True:
+            try:
+                response = self.session.get(f'{self.base_url}/health', timeout=min(self.timeout, 5))
+                if response.status_code == 200:
+                    return time.monotonic() - start
+                last_error = f'HTTP {response.status_code}'
+            except OSError as e:
+                last_error = str(e)
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                raise SupersetAPIError(f'Superset tidak merespons setelah {timeout}s: {last_error}')
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+    def login(self):
+        response = self.session.post(
+            f'{self.base_url}/api/v1/security/login',
+            json={
+                'username': self.username,
+                'password': self.password,
+                'provider': 'db',
+                'refresh': True,
+            },
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise SupersetAPIError('Login failed', response.status_code, response.text)
+        self.session.headers.update({'Authorization': f"Bearer {response.json()['access_token']}"})
+
+        response = self.session.get(f'{self.base_url}/api/v1/security/csrf_token/', timeout=self.timeout)
+        if response.status_code != 200:
+            raise SupersetAPIError('Failed to get CSRF token', response.status_code, response.text)
+        self.session.headers.update({
+            'X-CSRFToken': response.json()['result'],
+            'Referer': self.base_url,
+        })
+        return self
+
+    def request(self, method, path, expected=(200, 201), **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        if response.status_code not in expected:
+            raise SupersetAPIError(
+                f'{method} {path} failed', response.status_code, response.text
+            )
+        return response.json() if response.content else {}
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Helpers -----------------------------------------------------------
+
+    def find_database(self, name):
+        """ID database connection Superset berdasarkan database_name"""
+        q = f"(filters:!((col:database_name,opr:eq,value:'{name}')))"
+        result = self.get('/api/v1/database/', params={'q': q})['result']
+        return result[0]['id'] if result else None
+
+    def find_dataset(self, database_id, schema, table_name):
+        q = f"(filters:!((col:table_name,opr:eq,value:'{table_name}')))"
+        for dataset in self.get('/api/v1/dataset/', params={'q': q})['result']:
+            if dataset['database']['id'] == database_id and dataset.get('schema') == schema:
+                return dataset['id']
+        return None
+
+    def ensure_dataset(self, database_id, schema, table_name):
+        """
+        Daftarkan tabel/view sebagai dataset bila belum ada.
+        Return (dataset_id, created).
+        """
+        dataset_id = self.find_dataset(database_id, schema, table_name)
+        if dataset_id:
+            return dataset_id, False
+        result = self.post('/api/v1/dataset/', json={
+            'database': database_id,
+            'schema': schema,
+            'table_name': table_name,
+        })
+        return result['id'], True
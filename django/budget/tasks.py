@@ -0,0 +1,150 @@
+"""
+Task bawaan untuk antrian job (lihat budget/jobs.py)
+"""
+import csv
+import io
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+
+from . import analisis, columnar, kolom, metrics, realisasi_seri, registry, reporting
+from .jobs import JobError, task
+from .models import AnggaranDaerah, LaporanAnggaran
+from .snapshot import create_snapshot
+
+
+def _call_command(name, **options):
+    """Jalankan management command, kembalikan beberapa baris terakhir output-nya"""
+    stdout = io.StringIO()
+    call_command(name, stdout=stdout, **options)
+    return {'output': stdout.getvalue().strip().splitlines()[-20:]}
+
+
+@task('load_dummy_data', label='Import data dummy', concurrency=1, max_attempts=1)
+def load_dummy_data(job, scale=1):
+    job.set_progress(0, f'Memuat data dummy (scale {scale})')
+    result = _call_command('load_dummy_data', scale=scale)
+    result['anggaran'] = AnggaranDaerah.objects.count()
+    return result
+
+
+@task('snapshot_tahun', label='Snapshot tahun anggaran', concurrency=1, max_attempts=1)
+def snapshot_tahun(job, tahun, archive=False, force=False):
+    tahun_list = tahun if isinstance(tahun, list) else [tahun]
+    result = {}
+    for i, item in enumerate(tahun_list):
+        job.set_progress(i * 100 / len(tahun_list), f'Snapshot tahun {item}')
+        snapshot = create_snapshot(int(item), archive=archive, force=force)
+        result[str(item)] = {'jumlah_anggaran': snapshot.jumlah_anggaran, 'archived': snapshot.archived}
+    job.set_progress(95, 'Refresh mv_laporan_anggaran')
+    reporting.refresh()
+    return result
+
+
+@task('rebuild_realisasi_seri', label='Hitung ulang realisasi seri', concurrency=1)
+def rebuild_realisasi_seri(job, tahun=None):
+    tahun_list = [tahun] if tahun else sorted(set(
+        AnggaranDaerah.objects.values_list('tahun_anggaran', flat=True).order_by()
+    ))
+    written = 0
+    for i, item in enumerate(tahun_list):
+        job.set_progress(i * 100 / max(len(tahun_list), 1), f'Tahun {item}')
+        written += realisasi_seri.rebuild(tahun=item)
+    return {'rows': written}
+
+
+@task('analisis_realisasi', label='Analisis realisasi (serapan, proyeksi, peringatan)', concurrency=1)
+def analisis_realisasi(job, tahun=None):
+    tahun_list = [tahun] if tahun else sorted(set(
+        AnggaranDaerah.objects.values_list('tahun_anggaran', flat=True).order_by()
+    ))
+    result = {}
+    for i, item in enumerate(tahun_list):
+        job.set_progress(i * 100 / max(len(tahun_list), 1), f'Tahun {item}')
+        result[str(item)] = analisis.refresh(int(item))
+    return result
+
+
+@task('refresh_laporan', label='Refresh laporan (mv_laporan_anggaran)', concurrency=1)
+def refresh_laporan(job, concurrently=True):
+    elapsed = reporting.refresh(concurrently=concurrently)
+    return {'seconds': round(elapsed, 3) if elapsed is not None else None}
+
+
+@task('columnar_sync', label='Sinkronisasi store kolumnar (DuckDB/Parquet)', concurrency=1, max_attempts=2)
+def columnar_sync(job, full=False):
+    return columnar.sync(full=full, progress=job.set_progress)
+
+
+EXPORT_FIELDS = [
+    'tahun_anggaran', 'bulan', 'kode_provinsi', 'nama_provinsi', 'kode_kabkota', 'nama_kabkota',
+    'kode_program', 'nama_program', 'kode_jenis', 'nama_jenis', 'kategori', 'status',
+    'pagu_anggaran', 'realisasi_bulan', 'realisasi_kumulatif', 'sumber',
+]
+
+# Kolom uang diambil sebagai int sen (kolom.sen) dan ditulis lewat
+# kolom.teks_rupiah, tanpa objek Decimal per nilai
+EXPORT_UANG = {'pagu_anggaran', 'realisasi_bulan', 'realisasi_kumulatif'}
+
+
+@task('export_anggaran', label='Export anggaran (CSV)', concurrency=2)
+def export_anggaran(job, tahun=None):
+    rows = LaporanAnggaran.objects.order_by('tahun_anggaran', 'anggaran_id', 'bulan')
+    if tahun:
+        rows = rows.filter(tahun_anggaran=tahun)
+    total = rows.count()
+
+    export_dir = Path(settings.JOB_EXPORT_DIR)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    path = export_dir / f"anggaran-{tahun or 'semua'}-{job.pk}.csv"
+
+    columns = [kolom.sen(name) if name in EXPORT_UANG else F(name) for name in EXPORT_FIELDS]
+    uang = [i for i, name in enumerate(EXPORT_FIELDS) if name in EXPORT_UANG]
+
+    written = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_FIELDS)
+        for row in rows.values_list(*columns).iterator(chunk_size=5000):
+            row = list(row)
+            for i in uang:
+                row[i] = kolom.teks_rupiah(row[i])
+            writer.writerow(row)
+            written += 1
+            if written % 5000 == 0:
+                job.set_progress(written * 100 / total, f'{written}/{total} baris')
+    return {'file': path.name, 'rows': written}
+
+
+@task('warm_cache', label='Warm edge cache', concurrency=1, max_attempts=2)
+def warm_cache(job, base_url=None):
+    """Request halaman publik lewat Caddy supaya edge cache sudah terisi"""
+    base_url = (base_url or settings.CACHE_WARM_BASE_URL).rstrip('/')
+    if not base_url:
+        raise JobError('CACHE_WARM_BASE_URL belum diset')
+    paths = ['/', '/ringkasan/', '/dashboard/']
+    paths += [f'/dashboard/{dashboard.slug}/' for dashboard in registry.all_dashboards()]
+
+    result = {}
+    with metrics.Session() as session:
+        for i, path in enumerate(paths):
+            job.set_progress(i * 100 / len(paths), path)
+            response = session.get(f'{base_url}{path}', timeout=10)
+            result[path] = response.status_code
+    return result
+
+
+@task('configure_public_dashboard', label='Superset: konfigurasi dashboard publik', concurrency=1)
+def configure_public_dashboard(job, dashboard_id=None):
+    """dashboard_id: satu ID atau list ID; kosong = semua dashboard"""
+    options = {}
+    if dashboard_id:
+        options['dashboard_id'] = dashboard_id if isinstance(dashboard_id, list) else [dashboard_id]
+    return _call_command('configure_public_dashboard', **options)
+
+
+@task('setup_public_superset', label='Superset: setup akses publik', concurrency=1)
+def setup_public_superset(job):
+    return _call_command('setup_public_superset')
@@ -0,0 +1,455 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature,
+)
+from django.utils import timezone
+
+from . import circuit, edge_cache, jobs, ratelimit, registry, tokens
+from .models import Job
+
+
+@override_settings(GUEST_TOKEN_AUDIENCE='superset', GUEST_TOKEN_INTROSPECT_SECRET='introspect-secret')
+class GuestTokenVerifyTests(SimpleTestCase):
+    def setUp(self):
+        self.keyring = tokens.KeyRing(tokens.load_key('test-secret', 'HS256'))
+
+    def claims(self, **overrides):
+        return {**tokens.guest_claims('dashboard-1', int(time.time())), **overrides}
+
+    def test_guest_token_verifies(self):
+        claims, key = tokens.verify(tokens.sign(self.claims(), self.keyring), self.keyring)
+        self.assertEqual(claims['type'], 'guest')
+        self.assertIs(key, self.keyring.signing_key)
+
+    def test_mismatched_type_is_rejected(self):
+        token = tokens.sign(self.claims(type='access'), self.keyring)
+        with self.assertRaisesMessage(tokens.TokenError, 'bukan guest token'):
+            tokens.verify(token, self.keyring)
+
+    def test_missing_type_is_rejected(self):
+        claims = self.claims()
+        del claims['type']
+        with self.assertRaises(tokens.TokenError):
+            tokens.verify(tokens.sign(claims, self.keyring), self.keyring)
+
+    def test_mismatched_audience_is_rejected(self):
+        token = tokens.sign(self.claims(aud='other-service'), self.keyring)
+        with self.assertRaisesMessage(tokens.TokenError, 'Audience'):
+            tokens.verify(token, self.keyring)
+
+    def test_audience_list_is_accepted(self):
+        token = tokens.sign(self.claims(aud=['other-service', 'superset']), self.keyring)
+        tokens.verify(token, self.keyring)
+
+
+def _public_pem(private):
+    return private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+def _private_pem(private):
+    return private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+@override_settings(GUEST_TOKEN_AUDIENCE='superset')
+class GuestTokenKeyTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rsa = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.ed25519 = ed25519.Ed25519PrivateKey.generate()
+
+    def claims(self):
+        return tokens.guest_claims('dashboard-1', int(time.time()))
+
+    def test_rs256_sign_verify(self):
+        keyring = tokens.KeyRing(tokens.load_key(_private_pem(self.rsa), 'RS256'))
+        token = tokens.sign(self.claims(), keyring)
+        self.assertEqual(tokens.decode_header(token)['alg'], 'RS256')
+        claims, key = tokens.verify(token, keyring)
+        self.assertEqual(claims['resources'], [{'type': 'dashboard', 'id': 'dashboard-1'}])
+        self.assertIs(key, keyring.signing_key)
+
+    def test_eddsa_sign_verify(self):
+        keyring = tokens.KeyRing(tokens.load_key(self.ed25519, 'EdDSA'))
+        token = tokens.sign(self.claims(), keyring)
+        self.assertEqual(tokens.decode_header(token)['alg'], 'EdDSA')
+        tokens.verify(token, keyring)
+
+    def test_tampered_payload_is_rejected(self):
+        keyring = tokens.KeyRing(tokens.load_key(self.ed25519, 'EdDSA'))
+        header, _, signature = tokens.sign(self.claims(), keyring).split('.')
+        payload = tokens.sign({**self.claims(), 'rls': [{'clause': '1=1'}]}, keyring).split('.')[1]
+        with self.assertRaisesMessage(tokens.TokenError, 'Signature'):
+            tokens.verify(f'{header}.{payload}.{signature}', keyring)
+
+    def test_public_key_is_verify_only(self):
+        key = tokens.load_key(_public_pem(self.rsa), 'RS256')
+        self.assertFalse(key.can_sign)
+        with self.assertRaisesMessage(ValueError, 'kunci privat'):
+            tokens.KeyRing(key)
+
+        signer = tokens.KeyRing(tokens.load_key(self.rsa, 'RS256'))
+        keyring = tokens.KeyRing(tokens.load_key('new-secret', 'HS256'), [key])
+        _, found = tokens.verify(tokens.sign(self.claims(), signer), keyring)
+        self.assertIs(found, key)
+
+    def test_wrong_key_type_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'bukan kunci RS256'):
+            tokens.load_key(self.ed25519, 'RS256')
+
+    def test_rotation_by_kid_from_settings(self):
+        old = tokens.KeyRing(tokens.load_key(self.rsa, 'RS256', kid='lama'))
+        old_token = tokens.sign(self.claims(), old)
+        other = tokens.KeyRing(tokens.load_key(rsa.generate_private_key(65537, 2048), 'RS256', kid='lain'))
+
+        with override_settings(
+            GUEST_TOKEN_ALGORITHM='EdDSA', GUEST_TOKEN_SIGNING_KEY=_private_pem(self.ed25519),
+            GUEST_TOKEN_KID='baru', GUEST_TOKEN_VERIFY_KEYS=['RS256:' + _public_pem(self.rsa)],
+        ):
+            keyring = tokens.KeyRing.from_settings()
+
+        old_kid = tokens.load_key(_public_pem(self.rsa), 'RS256').kid
+        self.assertEqual(sorted(keyring.keys), sorted(['baru', old_kid]))
+        new_token = tokens.sign(self.claims(), keyring)
+        self.assertEqual(tokens.decode_header(new_token)['kid'], 'baru')
+        self.assertEqual(tokens.verify(new_token, keyring)[1].kid, 'baru')
+        # kid 'lama' tidak dikenal: dicoba dengan kunci ber-algoritma sama
+        self.assertEqual(tokens.verify(old_token, keyring)[1].kid, old_kid)
+        with self.assertRaises(tokens.TokenError):
+            tokens.verify(tokens.sign(self.claims(), other), keyring)
+
+    def test_hs256_signed_with_public_key_is_rejected(self):
+        # Alg confusion: kunci publik RSA dipakai sebagai secret HMAC
+        key = tokens.load_key(self.rsa, 'RS256')
+        keyring = tokens.KeyRing(key)
+        message = b'.'.join([
+            tokens._b64encode(json.dumps({'alg': 'HS256', 'typ': 'JWT', 'kid': key.kid}).encode()),
+            tokens._b64encode(json.dumps(self.claims()).encode()),
+        ])
+        signature = hmac.new(_public_pem(self.rsa).encode(), message, hashlib.sha256).digest()
+        token = (message + b'.' + tokens._b64encode(signature)).decode()
+        with self.assertRaisesMessage(tokens.TokenError, 'Signature'):
+            tokens.verify(token, keyring)
+
+    def test_jwks_lists_public_keys_only(self):
+        rs256 = tokens.load_key(self.rsa, 'RS256')
+        eddsa = tokens.load_key(_public_pem(self.ed25519), 'EdDSA')
+        keyring = tokens.KeyRing(rs256, [eddsa, tokens.load_key('old-secret', 'HS256')])
+
+        keys = {jwk['kid']: jwk for jwk in tokens.jwks(keyring)['keys']}
+        self.assertEqual(set(keys), {rs256.kid, eddsa.kid})
+
+        numbers = self.rsa.public_key().public_numbers()
+        self.assertEqual(keys[rs256.kid]['kty'], 'RSA')
+        self.assertEqual(keys[rs256.kid]['alg'], 'RS256')
+        self.assertEqual(int.from_bytes(tokens._b64decode(keys[rs256.kid]['n']), 'big'), numbers.n)
+        self.assertEqual(int.from_bytes(tokens._b64decode(keys[rs256.kid]['e']), 'big'), numbers.e)
+
+        raw = self.ed25519.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        self.assertEqual(keys[eddsa.kid], {
+            'kty': 'OKP', 'use': 'sig', 'alg': 'EdDSA', 'kid': eddsa.kid, 'crv': 'Ed25519',
+            'x': tokens._b64encode(raw).decode(),
+        })
+        # Secret HS256 tidak pernah dipublikasikan
+        self.assertNotIn('old-secret', json.dumps(keys))
+
+
+@override_settings(
+    GUEST_TOKEN_ALGORITHM='HS256', GUEST_TOKEN_SIGNING_KEY='test-secret', GUEST_TOKEN_KID='',
+    GUEST_TOKEN_VERIFY_KEYS=[], GUEST_TOKEN_AUDIENCE='superset',
+    GUEST_TOKEN_INTROSPECT_SECRET='introspect-secret',
+)
+class IntrospectGuestTokenTests(SimpleTestCase):
+    def setUp(self):
+        tokens.reset()
+        self.addCleanup(tokens.reset)
+        self.token, self.exp = tokens.issue('dashboard-1')
+
+    def test_without_secret_only_active_and_exp(self):
+        response = self.client.post('/token/introspect/', {'token': self.token})
+        self.assertEqual(response.json(), {'active': True, 'exp': self.exp})
+
+    def test_with_secret_returns_claims(self):
+        response = self.client.post(
+            '/token/introspect/', {'token': self.token}, HTTP_X_INTROSPECT_SECRET='introspect-secret'
+        )
+        data = response.json()
+        self.assertTrue(data['active'])
+        self.assertEqual(data['resources'], [{'type': 'dashboard', 'id': 'dashboard-1'}])
+
+    def test_other_jwt_is_inactive(self):
+        token = tokens.sign({**tokens.guest_claims('dashboard-1', int(time.time())), 'type': 'access'})
+        response = self.client.post('/token/introspect/', {'token': token})
+        self.assertEqual(response.json(), {'active': False})
+
+
+def _task_ok(job, **params):
+    return {'params': params}
+
+
+def _task_gagal(job, **params):
+    raise ValueError('gagal')
+
+
+class JobQueueTests(TransactionTestCase):
+    def setUp(self):
+        jobs.registered_tasks()
+        patcher = mock.patch.dict(jobs.TASKS, {
+            'uji': jobs.Task('uji', _task_ok, 'Uji', concurrency=1, max_attempts=3, retry_delay=30),
+            'uji_paralel': jobs.Task('uji_paralel', _task_ok, 'Uji paralel', concurrency=2, max_attempts=3, retry_delay=30),
+            'uji_gagal': jobs.Task('uji_gagal', _task_gagal, 'Uji gagal', concurrency=1, max_attempts=3, retry_delay=30),
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim_takes_oldest_ready_job(self):
+        now = timezone.now()
+        jobs.enqueue('uji', {'n': 1}, run_after=now + timedelta(hours=1))
+        oldest = jobs.enqueue('uji', {'n': 2}, run_after=now - timedelta(minutes=1))
+        jobs.enqueue('uji', {'n': 3})
+
+        job = jobs.claim('w1')
+        self.assertEqual(job.pk, oldest.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), ('BERJALAN', 'w1', 1))
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_claim_respects_concurrency_per_task(self):
+        tunggal = [jobs.enqueue('uji', {'n': n}) for n in range(2)]
+        paralel = [jobs.enqueue('uji_paralel', {'n': n}) for n in range(3)]
+
+        claimed = [jobs.claim('w1') for _ in range(4)]
+        self.assertEqual(
+            [job and job.pk for job in claimed],
+            [tunggal[0].pk, paralel[0].pk, paralel[1].pk, None],
+        )
+        self.assertEqual(Job.objects.get(pk=tunggal[1].pk).status, 'ANTRI')
+        self.assertEqual(Job.objects.get(pk=paralel[2].pk).status, 'ANTRI')
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_claim_skips_locked_job(self):
+        locked_job = jobs.enqueue('uji_paralel', {'n': 1})
+        next_job = jobs.enqueue('uji_paralel', {'n': 2})
+        locked, release = threading.Event(), threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    Job.objects.select_for_update().get(pk=locked_job.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(jobs.claim('w1').pk, next_job.pk)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_execute_records_result(self):
+        jobs.enqueue('uji', {'n': 1})
+        jobs.execute(jobs.claim('w1'))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.progress, job.result), ('SELESAI', 100, {'params': {'n': 1}}))
+
+    def test_failed_job_retries_with_backoff(self):
+        job = jobs.enqueue('uji_gagal')
+        for delay in (30, 60):
+            before = timezone.now()
+            jobs.execute(jobs.claim('w1'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'ANTRI')
+            self.assertIn('ValueError', job.error)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+            self.assertLess(job.run_after, timezone.now() + timedelta(seconds=delay + 1))
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        jobs.execute(jobs.claim('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('GAGAL', 3))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_requeue_stale(self):
+        now = timezone.now()
+        lama = now - timedelta(seconds=120)
+        ulang = Job.objects.create(task='uji', status='BERJALAN', worker='mati', attempts=1, heartbeat_at=lama)
+        habis = Job.objects.create(task='uji', status='BERJALAN', worker='mati', attempts=3, heartbeat_at=lama)
+        hidup = Job.objects.create(task='uji', status='BERJALAN', worker='hidup', attempts=1, heartbeat_at=now)
+
+        self.assertEqual(jobs.requeue_stale(stale_seconds=60), 2)
+        self.assertEqual(Job.objects.get(pk=ulang.pk).status, 'ANTRI')
+        self.assertEqual(Job.objects.get(pk=habis.pk).status, 'GAGAL')
+        self.assertEqual(Job.objects.get(pk=hidup.pk).status, 'BERJALAN')
+
+    def test_enqueue_unique_dedupes_queued_job(self):
+        first = jobs.enqueue_unique('uji', {'tahun': 2024})
+        self.assertEqual(jobs.enqueue_unique('uji', {'tahun': 2024}).pk, first.pk)
+        self.assertNotEqual(jobs.enqueue_unique('uji', {'tahun': 2025}).pk, first.pk)
+
+        # Job yang sudah berjalan tidak menampung perubahan baru
+        Job.objects.filter(pk=first.pk).update(status='BERJALAN')
+        self.assertNotEqual(jobs.enqueue_unique('uji', {'tahun': 2024}).pk, first.pk)
+
+    @skipUnless(connection.vendor == 'postgresql', 'advisory lock hanya di PostgreSQL')
+    def test_concurrent_enqueue_unique_creates_one_job(self):
+        barrier = threading.Barrier(8)
+
+        def enqueue():
+            try:
+                barrier.wait(10)
+                jobs.enqueue_unique('uji', {'tahun': 2024})
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=enqueue) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(Job.objects.filter(task='uji', status='ANTRI').count(), 1)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ratelimit-tests'}},
+    RATE_LIMIT_ENABLED=True, RATE_LIMIT_IP='1:2', RATE_LIMIT_DASHBOARD='', RATE_LIMIT_GLOBAL='',
+    RATE_LIMIT_PROXY_COUNT=0, ADMISSION_MAX_INFLIGHT=2, ADMISSION_MAX_QUEUE_MS=1000,
+)
+class RateLimitTests(SimpleTestCase):
+    NOW = 1_700_000_000.0
+
+    def setUp(self):
+        caches['default'].clear()
+        patcher = mock.patch.object(ratelimit, 'time', wraps=time)
+        self.clock = patcher.start()
+        self.clock.time.return_value = self.NOW
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def request(self, **headers):
+        return self.factory.get('/guest-token/1/', **headers)
+
+    def take(self, dashboard=None):
+        return ratelimit.take(ratelimit.buckets(self.request(), dashboard))
+
+    def test_local_bucket_allows_burst_then_refills(self):
+        self.assertTrue(self.take().allowed)
+        self.assertTrue(self.take().allowed)
+        self.assertEqual(self.take(), ratelimit.Decision(False, 'ip', 1))
+
+        self.clock.time.return_value = self.NOW + 1
+        self.assertTrue(self.take().allowed)
+        self.assertFalse(self.take().allowed)
+
+    @override_settings(RATE_LIMIT_IP='1:5', RATE_LIMIT_DASHBOARD='0.5:1')
+    def test_denied_request_takes_no_token(self):
+        self.assertTrue(self.take('a').allowed)
+        decision = self.take('a')
+        self.assertEqual((decision.reason, decision.retry_after), ('dashboard', 2))
+        # Bucket IP tidak berkurang oleh request yang ditolak bucket dashboard
+        for i in range(4):
+            self.assertTrue(self.take(f'b{i}').allowed)
+        self.assertEqual(self.take('c').reason, 'ip')
+
+    @override_settings(RATE_LIMIT_IP='1:1')
+    def test_limited_response_is_429_with_retry_after(self):
+        view = ratelimit.rate_limited('guest_token')(lambda request: HttpResponse('ok'))
+        self.assertEqual(view(self.request()).status_code, 200)
+
+        response = view(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertEqual(json.loads(response.content)['retry_after'], 1)
+        self.assertEqual(ratelimit.inflight(), 0)
+
+    @override_settings(RATE_LIMIT_IP='')
+    def test_inflight_released_when_view_raises(self):
+        def view(request):
+            self.assertEqual(ratelimit.inflight(), 1)
+            raise ValueError('gagal')
+
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                ratelimit.rate_limited('guest_token')(view)(self.request())
+        self.assertEqual(ratelimit.inflight(), 0)
+
+    def test_inflight_limit_sheds(self):
+        # View terlindungi di dalam view terlindungi: slot kedua melebihi batas 1
+        def view(request):
+            return inner(request)
+
+        inner = ratelimit.rate_limited('guest_token')(lambda request: HttpResponse('ok'))
+        outer = ratelimit.rate_limited('guest_token')(view)
+        with override_settings(ADMISSION_MAX_INFLIGHT=1):
+            response = outer(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(ratelimit.inflight(), 0)
+
+    def test_queue_seconds_parsing(self):
+        cases = [
+            ('t=1699999999.5', 0.5),
+            ('1699999999500', 0.5),
+            ('t=1699999999500000', 0.5),
+            ('t=1700000010', 0.0),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertAlmostEqual(
+                    ratelimit.queue_seconds(self.request(HTTP_X_REQUEST_START=header)), expected, places=3
+                )
+        self.assertIsNone(ratelimit.queue_seconds(self.request()))
+        self.assertIsNone(ratelimit.queue_seconds(self.request(HTTP_X_REQUEST_START='t=abc')))
+
+    def test_long_queue_is_shed(self):
+        view = ratelimit.rate_limited('guest_token')(lambda request: HttpResponse('ok'))
+        response = view(self.request(HTTP_X_REQUEST_START=f't={self.NOW - 2.5:.3f}'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertEqual(ratelimit.inflight(), 0)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class DegradedDashboardTests(TestCase):
+    def setUp(self):
+        circuit.reset()
+        self.addCleanup(circuit.reset)
+        self.breaker = circuit.get_breaker(registry.get_default_dashboard().instance)
+
+    def open_breaker(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.breaker.record_failure()
+
+    def test_degraded_page_is_not_cacheable(self):
+        self.open_breaker()
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertEqual(response['Retry-After'], str(self.breaker.retry_after()))
+        self.assertNotIn('Surrogate-Key', response)
+
+    def test_closing_breaker_purges_dashboard_pages(self):
+        self.open_breaker()
+        with mock.patch.object(edge_cache, 'purge') as purge:
+            self.breaker.record_success()
+            self.breaker.record_success()
+        purge.assert_called_once_with('dashboard')
@@ -0,0 +1,356 @@
+"""
+Token service guest token Superset: tanda tangan, verifikasi dan JWKS
+
+Kunci disiapkan sekali per proses (KeyRing): secret HS256 menjadi objek
+HMAC yang tinggal di-copy, kunci PEM RS256/EdDSA di-parse sekali ke objek
+cryptography, dan header JWT (alg, typ, kid) sudah di-encode base64url.
+Menandatangani satu token hanya json.dumps payload plus satu operasi
+HMAC/RSA/Ed25519, tanpa PyJWT. Token guest untuk dashboard yang sama
+dipakai ulang selama GUEST_TOKEN_REUSE_SECONDS, sehingga biaya tanda
+tangan (terutama RSA) tidak naik dengan jumlah embed per detik.
+
+Rotasi kunci: GUEST_TOKEN_SIGNING_KEY menandatangani token baru, kunci di
+GUEST_TOKEN_VERIFY_KEYS tetap diterima verify() sampai token lamanya
+kedaluwarsa. kid default adalah sidik jari SHA-256 secret/kunci publik.
+Kunci dibaca dari settings sekali; perubahan berlaku setelah worker
+di-restart (atau reset()).
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+
+ALGORITHMS = ('HS256', 'RS256', 'EdDSA')
+
+# Batas jumlah token yang dipakai ulang (dashboard_id berasal dari URL publik)
+MAX_REUSED_TOKENS = 1024
+
+
+class TokenError(Exception):
+    """Token tidak valid: format, kid/algoritma, signature atau kedaluwarsa"""
+
+
+class TokenExpired(TokenError):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    if isinstance(data, str):
+        data = data.encode('ascii')
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def _b64int(value):
+    return _b64encode(value.to_bytes((value.bit_length() + 7) // 8, 'big')).decode('ascii')
+
+
+@dataclass(frozen=True)
+class Key:
+    kid: str
+    algorithm: str
+    # Fungsi sign(message) (None untuk kunci verify-only) dan
+    # verify(message, signature), disiapkan sekali oleh load_key()
+    signer: object
+    verifier: object
+    # Kunci publik cryptography (RS256/EdDSA) untuk JWKS
+    public: object
+    header: bytes
+
+    @property
+    def can_sign(self):
+        return self.signer is not None
+
+    def sign(self, message):
+        return self.signer(message)
+
+    def verify(self, message, signature):
+        return self.verifier(message, signature)
+
+    def jwk(self):
+        """JWK kunci publik (None untuk HS256, secret tidak pernah dipublikasikan)"""
+        if self.algorithm == 'RS256':
+            numbers = self.public.public_numbers()
+            return {'kty': 'RSA', 'use': 'sig', 'alg': 'RS256', 'kid': self.kid,
+                    'n': _b64int(numbers.n), 'e': _b64int(numbers.e)}
+        if self.algorithm == 'EdDSA':
+            from cryptography.hazmat.primitives import serialization
+            raw = self.public.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            return {'kty': 'OKP', 'use': 'sig', 'alg': 'EdDSA', 'kid': self.kid,
+                    'crv': 'Ed25519', 'x': _b64encode(raw).decode('ascii')}
+        return None
+
+
+def _hmac_functions(secret):
+    # Objek HMAC dengan key sudah di-pad; per token cukup copy()
+    prepared = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def signer(message):
+        mac = prepared.copy()
+        mac.update(message)
+        return mac.digest()
+
+    def verifier(message, signature):
+        return hmac.compare_digest(signer(message), signature)
+
+    return signer, verifier
+
+
+def _asymmetric_functions(private, public, algorithm):
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    args = (padding.PKCS1v15(), hashes.SHA256()) if algorithm == 'RS256' else ()
+
+    def verifier(message, signature):
+        try:
+            public.verify(signature, message, *args)
+        except InvalidSignature:
+            return False
+        return True
+
+    signer = (lambda message: private.sign(message, *args)) if private is not None else None
+    return signer, verifier
+
+
+def _read_pem(spec):
+    """Isi PEM langsung, atau path file PEM"""
+    if isinstance(spec, bytes):
+        return spec
+    if spec.lstrip().startswith('-----BEGIN'):
+        return spec.encode()
+    return Path(spec).read_bytes()
+
+
+def _asymmetric(spec, algorithm):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    private = public = None
+    if isinstance(spec, (rsa.RSAPrivateKey, ed25519.Ed25519PrivateKey)):
+        private = spec
+    elif isinstance(spec, (rsa.RSAPublicKey, ed25519.Ed25519PublicKey)):
+        public = spec
+    else:
+        pem = _read_pem(spec)
+        try:
+            private = serialization.load_pem_private_key(pem, password=None)
+        except ValueError:
+            public = serialization.load_pem_public_key(pem)
+    if private is not None:
+        public = private.public_key()
+
+    expected = rsa.RSAPublicKey if algorithm == 'RS256' else ed25519.Ed25519PublicKey
+    if not isinstance(public, expected):
+        raise ValueError(f'Kunci bukan kunci {algorithm}')
+    fingerprint = public.public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private, public, fingerprint
+
+
+def load_key(spec, algorithm='HS256', kid=None):
+    """
+    Siapkan satu Key. spec: secret (HS256), atau isi/path PEM maupun objek
+    kunci cryptography (RS256/EdDSA). Kunci publik saja = verify-only.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritma {algorithm} tidak didukung ({', '.join(ALGORITHMS)})")
+    if algorithm == 'HS256':
+        secret = spec.encode() if isinstance(spec, str) else spec
+        if not secret:
+            raise ValueError('Secret HS256 kosong')
+        signer, verifier = _hmac_functions(secret)
+        public, fingerprint = None, secret
+    else:
+        private, public, fingerprint = _asymmetric(spec, algorithm)
+        signer, verifier = _asymmetric_functions(private, public, algorithm)
+
+    kid = kid or hashlib.sha256(fingerprint).hexdigest()[:16]
+    header = _b64encode(json.dumps({'alg': algorithm, 'typ': 'JWT', 'kid': kid}, separators=(',', ':')).encode())
+    return Key(kid=kid, algorithm=algorithm, signer=signer, verifier=verifier, public=public, header=header)
+
+
+def parse_key_spec(spec, default_algorithm):
+    """'ALG:kunci' atau 'kunci' (algoritma default) -> (kunci, algoritma)"""
+    prefix, sep, rest = spec.partition(':')
+    if sep and prefix in ALGORITHMS:
+        return rest, prefix
+    return spec, default_algorithm
+
+
+class KeyRing:
+    """Kunci penanda tangan aktif plus kunci lama yang masih diterima verify()"""
+
+    def __init__(self, signing_key, verify_keys=()):
+        if not signing_key.can_sign:
+            raise ValueError('Kunci penanda tangan butuh kunci privat')
+        self.signing_key = signing_key
+        self.keys = {key.kid: key for key in (*verify_keys, signing_key)}
+
+    def find(self, kid, algorithm):
+        """Kunci kandidat untuk header token; algoritma harus sama persis"""
+        key = self.keys.get(kid) if isinstance(kid, str) else None
+        if key is not None:
+            return [key] if key.algorithm == algorithm else []
+        # Token tanpa kid atau kid yang sudah di-override: coba kunci dengan algoritma sama
+        return [key for key in self.keys.values() if key.algorithm == algorithm]
+
+    @classmethod
+    def from_settings(cls):
+        algorithm = settings.GUEST_TOKEN_ALGORITHM
+        spec = settings.GUEST_TOKEN_SIGNING_KEY
+        if not spec and algorithm == 'HS256':
+            spec = settings.SUPERSET_SECRET_KEY
+        signing_key = load_key(spec, algorithm, kid=settings.GUEST_TOKEN_KID or None)
+        verify_keys = [
+            load_key(*parse_key_spec(item, algorithm))
+            for item in settings.GUEST_TOKEN_VERIFY_KEYS
+        ]
+        return cls(signing_key, verify_keys)
+
+
+_keyring = None
+_lock = threading.Lock()
+_issued = {}
+
+
+def get_keyring():
+    global _keyring
+    if _keyring is None:
+        with _lock:
+            if _keyring is None:
+                _keyring = KeyRing.from_settings()
+    return _keyring
+
+
+def reset():
+    """Muat ulang kunci dari settings pada pemanggilan berikutnya"""
+    global _keyring
+    with _lock:
+        _keyring = None
+        _issued.clear()
+
+
+def sign(claims, keyring=None):
+    """Tanda tangani claims dengan kunci aktif, return token JWT (str)"""
+    key = (keyring or get_keyring()).signing_key
+    message = key.header + b'.' + _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return (message + b'.' + _b64encode(key.sign(message))).decode('ascii')
+
+
+def guest_claims(dashboard_id, now):
+    return {
+        'user': {'username': 'guest_user', 'first_name': 'Guest', 'last_name': 'User'},
+        'resources': [{'type': 'dashboard', 'id': dashboard_id}],
+        'rls': [],  # Row Level Security rules (empty for public access)
+        'iat': now,
+        'exp': now + settings.SUPERSET_GUEST_TOKEN_EXP_SECONDS,
+        'type': 'guest',
+        'aud': settings.GUEST_TOKEN_AUDIENCE,
+    }
+
+
+def issue(dashboard_id, keyring=None):
+    """
+    Guest token untuk dashboard, return (token, exp). Token yang diterbitkan
+    kurang dari GUEST_TOKEN_REUSE_SECONDS lalu dengan kunci yang sama dipakai ulang.
+    """
+    keyring = keyring or get_keyring()
+    now = int(time.time())
+    cached = _issued.get(dashboard_id)
+    if cached is not None:
+        key, iat, token, exp = cached
+        if key is keyring.signing_key and 0 <= now - iat < settings.GUEST_TOKEN_REUSE_SECONDS:
+            return token, exp
+
+    claims = guest_claims(dashboard_id, now)
+    token = sign(claims, keyring)
+    if len(_issued) >= MAX_REUSED_TOKENS:
+        _issued.clear()
+    _issued[dashboard_id] = (keyring.signing_key, now, token, claims['exp'])
+    return token, claims['exp']
+
+
+def decode_header(token):
+    """Header token tanpa verifikasi"""
+    try:
+        header = json.loads(_b64decode(token.split('.', 1)[0]))
+    except (ValueError, binascii.Error, UnicodeError) as exc:
+        raise TokenError('Header token tidak valid') from exc
+    if not isinstance(header, dict):
+        raise TokenError('Header token tidak valid')
+    return header
+
+
+def unverified_claims(token):
+    """Payload token tanpa verifikasi signature (mis. exp token dari Superset)"""
+    try:
+        claims = json.loads(_b64decode(token.split('.')[1]))
+    except (IndexError, ValueError, binascii.Error, UnicodeError) as exc:
+        raise TokenError('Payload token tidak valid') from exc
+    if not isinstance(claims, dict):
+        raise TokenError('Payload token tidak valid')
+    return claims
+
+
+def verify(token, keyring=None, leeway=0):
+    """
+    Verifikasi signature (kid dan alg harus cocok dengan kunci di KeyRing),
+    type guest, aud (GUEST_TOKEN_AUDIENCE) dan exp. JWT lain yang kebetulan
+    ditandatangani kunci yang sama ditolak. Return (claims, key); raise
+    TokenError/TokenExpired.
+    """
+    keyring = keyring or get_keyring()
+    if not isinstance(token, str) or token.count('.') != 2:
+        raise TokenError('Format token tidak valid')
+    header = decode_header(token)
+    message, _, signature = token.rpartition('.')
+    try:
+        signature = _b64decode(signature)
+        message = message.encode('ascii')
+    except (ValueError, binascii.Error, UnicodeError) as exc:
+        raise TokenError('Signature tidak valid') from exc
+
+    key = next(
+        (key for key in keyring.find(header.get('kid'), header.get('alg')) if key.verify(message, signature)),
+        None,
+    )
+    if key is None:
+        raise TokenError('Signature tidak valid atau kunci tidak dikenal')
+
+    try:
+        claims = json.loads(_b64decode(message.rsplit(b'.', 1)[1]))
+    except (ValueError, binascii.Error, UnicodeError) as exc:
+        raise TokenError('Payload token tidak valid') from exc
+    if not isinstance(claims, dict) or claims.get('type') != 'guest':
+        raise TokenError('Token bukan guest token')
+    audience = settings.GUEST_TOKEN_AUDIENCE
+    if audience:
+        aud = claims.get('aud')
+        if aud != audience and not (isinstance(aud, list) and audience in aud):
+            raise TokenError('Audience token tidak cocok')
+    exp = claims.get('exp')
+    if not isinstance(exp, (int, float)):
+        raise TokenError('Claim exp tidak ada')
+    if exp + leeway < time.time():
+        raise TokenExpired('Token sudah kedaluwarsa')
+    return claims, key
+
+
+def jwks(keyring=None):
+    """JSON Web Key Set kunci publik RS256/EdDSA (aktif dan lama)"""
+    keyring = keyring or get_keyring()
+    return {'keys': [jwk for jwk in (key.jwk() for key in keyring.keys.values()) if jwk]}
@@ -0,0 +1,17 @@
+"""
+Helper transaksi database
+"""
+from django.db import transaction
+
+
+def on_commit_once(func):
+    """
+    Jadwalkan func setelah transaksi commit, sekali per transaksi walaupun
+    dipanggil berkali-kali (mis. dari signal per baris). run_on_commit
+    dikosongkan saat commit/rollback, jadi cukup cek apakah func sudah
+    terjadwal untuk transaksi yang sedang berjalan. Di luar atomic() func
+    langsung dijalankan.
+    """
+    connection = transaction.get_connection()
+    if not any(entry[1] is func for entry in connection.run_on_commit):
+        transaction.on_commit(func)
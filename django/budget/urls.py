@@ -1,12 +1,25 @@
 from django.urls import path
 from . import views
-from .views_guest_token import generate_guest_token_direct
+from .views_guest_token import (
+    generate_guest_token_direct, guest_token_jwks, introspect_guest_token, verify_guest_token,
+)
+from .views_jobs import job_download, job_status
 
 app_name = 'budget'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('ringkasan/', views.ringkasan, name='ringkasan'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/<slug:slug>/', views.dashboard, name='dashboard-detail'),
+    path('dashboard/<slug:dashboard_id>/standalone/', views.superset_proxy, name='dashboard-standalone'),
     # Alternative guest token endpoint (direct JWT generation)
     path('guest-token/<str:dashboard_id>/', generate_guest_token_direct, name='guest-token-direct'),
+    # Verifikasi/introspeksi guest token untuk Superset atau proxy
+    path('token/verify/', verify_guest_token, name='token-verify'),
+    path('token/introspect/', introspect_guest_token, name='token-introspect'),
+    path('token/jwks.json', guest_token_jwks, name='token-jwks'),
+    # Job latar belakang (staff only)
+    path('jobs/<int:job_id>/', job_status, name='job-status'),
+    path('jobs/<int:job_id>/download/', job_download, name='job-download'),
 ]
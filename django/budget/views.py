@@ -1,13 +1,24 @@
+import hmac
+
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
-from .models import AnggaranDaerah, Provinsi, KabupatenKota
+from django.http import Http404, HttpResponse, HttpResponsePermanentRedirect, JsonResponse
+from django.views.decorators.http import require_safe
+from .models import AnggaranDaerah
+from .views_guest_token import create_guest_token
+from .edge_cache import cache_public
+from .ratelimit import rate_limited
+from .snapshot import ringkasan_per_tahun
+from . import circuit, columnar, kolom, metrics, referensi, registry
 
 
+@cache_public(s_maxage=60, stale_while_revalidate=300, keys=['anggaran'])
 def index(request):
     """Home page"""
     total_anggaran = AnggaranDaerah.objects.count()
-    total_provinsi = Provinsi.objects.count()
-    total_kabkota = KabupatenKota.objects.count()
+    data_referensi = referensi.get_referensi()
+    total_provinsi = len(data_referensi.provinsi)
+    total_kabkota = len(data_referensi.kabupaten_kota)
 
     context = {
         'total_anggaran': total_anggaran,
@@ -18,21 +29,122 @@ def index(request):
     return render(request, 'budget/index.html', context)
 
 
-def dashboard(request):
+# Halaman berisi guest token (exp 5 menit): simpan di edge jauh lebih singkat
+# dari umur token, dan jangan di browser
+@rate_limited('dashboard', dashboard_kwarg='slug')
+@cache_public(max_age=0, s_maxage=30, stale_while_revalidate=30, keys=['dashboard'])
+def dashboard(request, slug=None):
     """Dashboard page with Superset integration using Embedded SDK"""
-    # Dashboard ID dari Superset (UUID format untuk Superset 3.0+)
-    superset_dashboard_id = 'bd3a437e-a613-4fe2-ac77-937ae03e5e94'
+    if slug is None:
+        superset_dashboard = registry.get_default_dashboard()
+    else:
+        superset_dashboard = registry.get_dashboard(slug)
+        if superset_dashboard is None:
+            raise Http404(f"Dashboard '{slug}' tidak ditemukan")
+        if superset_dashboard.slug != slug:
+            # Slug lama (sebelum rename) atau id saja: arahkan ke URL kanonik
+            # di prefix yang sama (/ atau /api/)
+            url = request.path[:-len(slug) - 1] + f'{superset_dashboard.slug}/'
+            query = request.META.get('QUERY_STRING')
+            return HttpResponsePermanentRedirect(f'{url}?{query}' if query else url)
+
+    # Guest token halaman ini ditandatangani lokal: status Superset diketahui
+    # dari probe /health berkala (paling lama SUPERSET_HEALTH_TIMEOUT)
+    breaker = circuit.get_breaker(superset_dashboard.instance)
+    circuit.probe_health(superset_dashboard.instance, breaker)
+    if breaker.degraded():
+        # Superset sedang tidak tersedia: ringkasan data anggaran tanpa embed
+        metrics.inc('budget_degraded_total', view='dashboard', mode='ringkasan')
+        retry_after = breaker.retry_after()
+        response = render(request, 'budget/dashboard_degraded.html', {
+            'dashboard': superset_dashboard,
+            'dashboards': registry.all_dashboards(),
+            'ringkasan': ringkasan_rows(),
+            'retry_after': retry_after,
+        }, status=503)
+        # Bukan 200, jadi cache_public tidak menandainya public: edge cache
+        # tidak boleh terus menyajikan halaman ini setelah Superset pulih
+        response['Retry-After'] = str(retry_after)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    # Guest token awal dirender bersama halaman, sehingga browser tidak perlu
+    # round trip tambahan sebelum Superset mulai loading
+    guest_token, guest_token_exp = create_guest_token(superset_dashboard.integration_id)
 
     context = {
-        'dashboard_id': 1,  # ID untuk guest token endpoint (dari django_superset_integration)
-        'superset_dashboard_id': superset_dashboard_id,  # ID dashboard di Superset
-        'superset_domain': 'localhost:8088',  # Domain Superset
+        'dashboard_id': superset_dashboard.id,  # ID untuk guest token endpoint (dari django_superset_integration)
+        'superset_dashboard_id': superset_dashboard.integration_id,  # ID dashboard di Superset
+        'superset_domain': superset_dashboard.domain,  # Domain Superset
+        'guest_token': {'token': guest_token, 'exp': guest_token_exp},
+        'dashboard': superset_dashboard,
+        'dashboards': registry.all_dashboards(),
+        # ?tahun=&kabkota= membatasi notifikasi embed ulang (SSE) dan diteruskan
+        # ke Superset sebagai url_param untuk dataset/filter
+        'dashboard_filters': {
+            name: request.GET[name] for name in ('tahun', 'kabkota') if request.GET.get(name, '').isdigit()
+        },
     }
     return render(request, 'budget/dashboard.html', context)
 
 
+@require_safe
+@cache_public(s_maxage=60, stale_while_revalidate=300, keys=['anggaran'])
+def ringkasan(request):
+    """Ringkasan anggaran per tahun (read-only, boleh di-cache di edge)"""
+    return JsonResponse({'results': ringkasan_rows()})
+
+
+def ringkasan_rows():
+    """Baris ringkasan per tahun (juga ditampilkan dashboard saat Superset tidak tersedia)"""
+    rows = columnar.ringkasan_per_tahun() if columnar.enabled() else ringkasan_per_tahun()
+    data = []
+    for row in rows:
+        pagu = row['pagu_anggaran']
+        realisasi = row['realisasi_anggaran']
+        data.append({
+            'tahun': row['tahun'],
+            'jumlah_anggaran': row['jumlah_anggaran'],
+            'pagu_anggaran': str(pagu),
+            'realisasi_anggaran': str(realisasi),
+            # Eksak di integer sen (ROUND_HALF_UP), float hanya untuk JSON
+            'persentase_realisasi': float(kolom.persen(kolom.ke_sen(realisasi), kolom.ke_sen(pagu))),
+            'sumber': row['sumber'],
+        })
+    return data
+
+
+@rate_limited('dashboard', dashboard_kwarg='dashboard_id')
 def superset_proxy(request, dashboard_id):
     """Proxy to Superset dashboard for iframe embedding"""
+    superset_dashboard = registry.get_dashboard(dashboard_id) or registry.get_dashboard_by_id(dashboard_id)
+    if superset_dashboard is None:
+        raise Http404(f"Dashboard '{dashboard_id}' tidak ditemukan")
+
+    # Superset sedang tidak tersedia: tampilkan ringkasan di halaman dashboard
+    breaker = circuit.get_breaker(superset_dashboard.instance)
+    circuit.probe_health(superset_dashboard.instance, breaker)
+    if breaker.degraded():
+        return redirect('budget:dashboard-detail', superset_dashboard.slug)
+
     # Redirect ke Superset dengan standalone mode
-    superset_url = f"http://localhost:8088/superset/dashboard/{dashboard_id}/?standalone=true"
-    return redirect(superset_url)
+    return redirect(superset_dashboard.standalone_url)
+
+
+def _metrics_allowed(request):
+    """User staff, atau header Authorization: Bearer METRICS_TOKEN"""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(
+        settings.METRICS_TOKEN and scheme.lower() == 'bearer'
+        and hmac.compare_digest(token.strip().encode(), settings.METRICS_TOKEN.encode())
+    )
+
+
+@require_safe
+def metrics_view(request):
+    """Metrics format Prometheus (total semua worker bila cache-nya Redis)"""
+    if not metrics.enabled() or not _metrics_allowed(request):
+        raise Http404("Metrics tidak diaktifkan")
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
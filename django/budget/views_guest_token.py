@@ -2,54 +2,106 @@
 Alternative guest token generation without Superset API
 Generate guest token directly using JWT for Superset 3.0+
 """
-import time
-import jwt
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_safe
+import hmac
+
 from django.conf import settings
+from django.http import JsonResponse, HttpResponse
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_safe
+
+from . import tokens
+from .ratelimit import rate_limited
+
+
+def create_guest_token(dashboard_id: str):
+    """
+    Build and sign a guest token for a Superset dashboard.
+    Returns (token, exp) so callers can schedule a refresh before expiry.
+    """
+    # Kunci disiapkan sekali per proses, lihat budget/tokens.py
+    return tokens.issue(dashboard_id)
 
 
 @require_safe
+@never_cache
+@rate_limited('guest-token', dashboard_kwarg='dashboard_id')
 def generate_guest_token_direct(request, dashboard_id: str):
     """
     Generate guest token directly without calling Superset API
     This works for Superset 3.0+ when AUTH_ROLE_PUBLIC is configured
     """
     try:
-        # Get Superset secret from environment or settings
-        # This must match GUEST_TOKEN_JWT_SECRET in superset_config.py
-        superset_secret = settings.SUPERSET_SECRET_KEY if hasattr(settings, 'SUPERSET_SECRET_KEY') else 'your_secret_key_change_this_in_production'
-
-        # Prepare guest token payload
-        payload = {
-            "user": {
-                "username": "guest_user",
-                "first_name": "Guest",
-                "last_name": "User"
-            },
-            "resources": [
-                {
-                    "type": "dashboard",
-                    "id": dashboard_id
-                }
-            ],
-            "rls": [],  # Row Level Security rules (empty for public access)
-            "iat": int(time.time()),  # Issued at
-            "exp": int(time.time()) + 300,  # Expires in 5 minutes
-            "type": "guest"
-        }
-
-        # Generate JWT token
-        token = jwt.encode(
-            payload,
-            superset_secret,
-            algorithm='HS256'
-        )
-
-        return HttpResponse(token)
+        token, exp = create_guest_token(dashboard_id)
+
+        response = HttpResponse(token)
+        # Dipakai JS untuk menjadwalkan refresh token sebelum expired
+        response['X-Guest-Token-Exp'] = str(exp)
+        return response
 
     except Exception as e:
         return JsonResponse({
             "error": str(e),
             "message": "Failed to generate guest token"
         }, status=500)
+
+
+def _request_token(request):
+    """Token dari form/query `token`, header X-GuestToken, atau Authorization: Bearer"""
+    token = request.POST.get('token') or request.GET.get('token') or request.headers.get('X-GuestToken')
+    if not token:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer':
+            token = value.strip()
+    return token or ''
+
+
+@require_safe
+@never_cache
+def verify_guest_token(request):
+    """
+    Verifikasi token untuk proxy (mis. forward_auth Caddy): 204 bila valid,
+    dengan header X-Token-*; 401 bila tidak
+    """
+    try:
+        claims, key = tokens.verify(_request_token(request))
+    except tokens.TokenError as exc:
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = f'Bearer error="invalid_token", error_description="{exc}"'
+        return response
+
+    response = HttpResponse(status=204)
+    response['X-Token-Kid'] = key.kid
+    response['X-Token-Exp'] = str(claims['exp'])
+    response['X-Token-Dashboards'] = ','.join(
+        str(resource.get('id')) for resource in claims.get('resources', []) if isinstance(resource, dict)
+    )
+    return response
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'POST'])
+@never_cache
+def introspect_guest_token(request):
+    """
+    Introspeksi token (gaya RFC 7662): selalu 200, {"active": false} bila tidak
+    valid. Claims lengkap (resources, rls) hanya untuk pemanggil dengan header
+    X-Introspect-Secret = GUEST_TOKEN_INTROSPECT_SECRET; selain itu active dan exp.
+    """
+    try:
+        claims, key = tokens.verify(_request_token(request))
+    except tokens.TokenError:
+        return JsonResponse({'active': False})
+    secret = settings.GUEST_TOKEN_INTROSPECT_SECRET
+    if not secret or not hmac.compare_digest(
+        request.headers.get('X-Introspect-Secret', '').encode(), secret.encode()
+    ):
+        return JsonResponse({'active': True, 'exp': claims['exp']})
+    return JsonResponse({**claims, 'active': True, 'kid': key.kid, 'alg': key.algorithm})
+
+
+@require_safe
+@cache_control(public=True, max_age=300)
+def guest_token_jwks(request):
+    """Kunci publik RS256/EdDSA (aktif dan lama) untuk verifikasi mandiri"""
+    return JsonResponse(tokens.jwks())
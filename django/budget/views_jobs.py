@@ -0,0 +1,34 @@
+"""
+Status dan hasil job latar belakang (staff only, dipakai halaman admin Job)
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.cache import never_cache
+
+from .models import Job
+
+
+@staff_member_required
+@never_cache
+def job_status(request, job_id):
+    """Dipoll oleh halaman admin selama job belum selesai"""
+    job = get_object_or_404(Job, pk=job_id)
+    return JsonResponse(job.as_dict())
+
+
+@staff_member_required
+def job_download(request, job_id):
+    """File hasil task export"""
+    job = get_object_or_404(Job, pk=job_id, status='SELESAI')
+    filename = (job.result or {}).get('file')
+    if not filename:
+        raise Http404('Job ini tidak menghasilkan file')
+
+    path = Path(settings.JOB_EXPORT_DIR) / Path(filename).name
+    if not path.is_file():
+        raise Http404('File hasil export sudah tidak ada')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
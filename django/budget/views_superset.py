@@ -1,15 +1,32 @@
 """
 Custom view untuk fix django-superset-integration bug
 Bug: Package hardcode https:// di URL, padahal kita pakai http://
+
+Setiap call ke Superset memakai timeout dan melewati circuit breaker per
+SupersetInstance (budget/circuit.py). Saat Superset tidak tersedia view
+melayani token terakhir yang masih valid, atau 503 dengan Retry-After,
+tanpa menahan thread worker.
 """
-import requests
-from cryptography.fernet import Fernet
+import logging
+import time
 
+from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_safe
-from django.conf import settings
 
-from django_superset_integration.models import SupersetDashboard
+from . import circuit, metrics, registry, tokens
+from .ratelimit import rate_limited
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_PREFIX = 'budget:superset_guest_token'
+
+
+class SupersetUnavailable(Exception):
+    """Superset menjawab 5xx (timeout dan error koneksi: OSError dari requests)"""
 
 
 def create_rls_clause(user):
@@ -21,96 +38,171 @@ def create_rls_clause(user):
     return [{"clause": "1=1"}]
 
 
-@require_safe
-def fetch_superset_guest_token(request, dashboard_id: str):
-    """
-    Get a guest token for integration of a Superset dashboard
-    Fixed version that supports both http and https
-    """
+def _call(session, method, url, **kwargs):
+    response = session.request(
+        method, url, timeout=(settings.SUPERSET_CONNECT_TIMEOUT, settings.SUPERSET_READ_TIMEOUT), **kwargs
+    )
+    if response.status_code >= 500:
+        raise SupersetUnavailable(f"{method} {url}: HTTP {response.status_code}")
+    return response
+
+
+def _token_cache_key(dashboard):
+    return f'{TOKEN_CACHE_PREFIX}:{dashboard.id}'
+
+
+def _remember_token(dashboard, guest_token):
+    """Simpan token terakhir dari Superset untuk mode degraded, selama token masih valid"""
+    now = int(time.time())
     try:
-        with requests.Session() as session:
-            dashboard = SupersetDashboard.objects.get(id=int(dashboard_id))
-            dashboard_integration_id = dashboard.integration_id
-            superset_domain = dashboard.domain.address
-            superset_username = dashboard.domain.username
-
-            # Use http:// instead of hardcoded https://
-            protocol = "http"
-            url = f"{protocol}://{superset_domain}/api/v1/security/login"
-
-            def get_password(password):
-                cipher_suite = Fernet(settings.ENCRYPTION_KEY)
-                decrypted_password = cipher_suite.decrypt(password.encode())
-                return decrypted_password.decode()
-
-            params = {
-                "provider": "db",
-                "refresh": "True",
-                "username": superset_username,
-                "password": get_password(dashboard.domain.password),
+        exp = int(tokens.unverified_claims(guest_token)['exp'])
+    except (tokens.TokenError, KeyError, TypeError, ValueError):
+        exp = now + settings.SUPERSET_GUEST_TOKEN_EXP_SECONDS
+    if exp > now:
+        try:
+            cache.set(_token_cache_key(dashboard), (guest_token, exp), timeout=exp - now)
+        except Exception:
+            logger.warning('Guest token Superset tidak bisa disimpan ke cache', exc_info=True)
+    return exp
+
+
+def _token_response(guest_token, exp):
+    response = HttpResponse(guest_token)
+    # Dipakai JS untuk menjadwalkan refresh token sebelum expired
+    response['X-Guest-Token-Exp'] = str(exp)
+    return response
+
+
+def _degraded(dashboard, breaker):
+    """Token terakhir yang masih valid, atau 503 dengan petunjuk ringkasan data"""
+    try:
+        cached = cache.get(_token_cache_key(dashboard))
+    except Exception:
+        cached = None
+    if cached is not None and cached[1] > time.time():
+        metrics.inc('budget_degraded_total', view='guest-token', mode='cached-token')
+        response = _token_response(*cached)
+        response['X-Degraded'] = 'cached-token'
+        return response
+
+    metrics.inc('budget_degraded_total', view='guest-token', mode='unavailable')
+    retry_after = breaker.retry_after()
+    response = JsonResponse({
+        "error": "Superset sedang tidak tersedia",
+        "degraded": True,
+        "retry_after": retry_after,
+        "ringkasan": reverse('budget:ringkasan'),
+    }, status=503)
+    response['Retry-After'] = str(retry_after)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _guest_token_response(request, dashboard, session):
+    dashboard_integration_id = dashboard.integration_id
+    superset_domain = dashboard.instance.address
+    superset_username = dashboard.instance.username
+
+    # Use http:// instead of hardcoded https://
+    protocol = "http"
+    url = f"{protocol}://{superset_domain}/api/v1/security/login"
+
+    params = {
+        "provider": "db",
+        "refresh": "True",
+        "username": superset_username,
+        "password": dashboard.instance.password,
+    }
+
+    session.headers.update({"Content-Type": "application/json"})
+    response = _call(session, "POST", url, json=params)
+
+    if response.status_code != 200:
+        return JsonResponse({
+            "error": "Failed to login to Superset",
+            "status_code": response.status_code,
+            "response": response.text
+        }, status=500)
+
+    access_token = response.json()["access_token"]
+
+    session.headers.update({"Authorization": f"Bearer {access_token}"})
+    url = f"{protocol}://{superset_domain}/api/v1/security/csrf_token/"
+    response = _call(session, "GET", url)
+
+    if response.status_code != 200:
+        return JsonResponse({
+            "error": "Failed to get CSRF token",
+            "status_code": response.status_code
+        }, status=500)
+
+    csrf_token = response.json()["result"]
+
+    user = request.user
+    rls = create_rls_clause(user)
+
+    session.headers.update(
+        {"X-CSRFToken": csrf_token, "Referer": f"{protocol}://{superset_domain}"}
+    )
+
+    params = {
+        "resources": [
+            {
+                "id": dashboard_integration_id,
+                "type": "dashboard",
             }
+        ],
+        "rls": rls,
+        "user": {
+            "username": "guest",
+            "first_name": "Guest",
+            "last_name": "User",
+        },
+    }
 
-            session.headers.update({"Content-Type": "application/json"})
-            response = session.post(url, json=params)
-
-            if response.status_code != 200:
-                return JsonResponse({
-                    "error": "Failed to login to Superset",
-                    "status_code": response.status_code,
-                    "response": response.text
-                }, status=500)
-
-            access_token = response.json()["access_token"]
-
-            session.headers.update({"Authorization": f"Bearer {access_token}"})
-            url = f"{protocol}://{superset_domain}/api/v1/security/csrf_token/"
-            response = session.get(url)
-
-            if response.status_code != 200:
-                return JsonResponse({
-                    "error": "Failed to get CSRF token",
-                    "status_code": response.status_code
-                }, status=500)
-
-            csrf_token = response.json()["result"]
-
-            user = request.user
-            rls = create_rls_clause(user)
-
-            session.headers.update(
-                {"X-CSRFToken": csrf_token, "Referer": f"{protocol}://{superset_domain}"}
-            )
-
-            params = {
-                "resources": [
-                    {
-                        "id": dashboard_integration_id,
-                        "type": "dashboard",
-                    }
-                ],
-                "rls": rls,
-                "user": {
-                    "username": "guest",
-                    "first_name": "Guest",
-                    "last_name": "User",
-                },
-            }
+    url = f"{protocol}://{superset_domain}/api/v1/security/guest_token/"
+    response = _call(session, "POST", url, json=params)
 
-            url = f"{protocol}://{superset_domain}/api/v1/security/guest_token/"
-            response = session.post(url, json=params)
+    if response.status_code != 200:
+        return JsonResponse({
+            "error": "Failed to get guest token",
+            "status_code": response.status_code,
+            "response": response.text
+        }, status=500)
 
-            if response.status_code != 200:
-                return JsonResponse({
-                    "error": "Failed to get guest token",
-                    "status_code": response.status_code,
-                    "response": response.text
-                }, status=500)
+    guest_token = response.json()["token"]
+    return _token_response(guest_token, _remember_token(dashboard, guest_token))
 
-            guest_token = response.json()["token"]
 
-            return HttpResponse(guest_token)
+@require_safe
+@rate_limited('guest-token', dashboard_kwarg='dashboard_id')
+def fetch_superset_guest_token(request, dashboard_id: str):
+    """
+    Get a guest token for integration of a Superset dashboard
+    Fixed version that supports both http and https
+    """
+    try:
+        # Metadata dan password (sudah didekripsi) diambil dari registry in-process
+        dashboard = registry.get_dashboard_by_id(dashboard_id)
+        if dashboard is None:
+            return JsonResponse({"error": f"Dashboard with id {dashboard_id} not found"}, status=404)
+
+        breaker = circuit.get_breaker(dashboard.instance)
+        if not breaker.allow():
+            return _degraded(dashboard, breaker)
+
+        try:
+            with metrics.Session() as session:
+                response = _guest_token_response(request, dashboard, session)
+        except (OSError, SupersetUnavailable) as e:
+            # Timeout, koneksi ditolak atau 5xx (exception requests turunan OSError)
+            logger.warning('Superset %s tidak tersedia: %s', dashboard.domain, e)
+            breaker.record_failure()
+            return _degraded(dashboard, breaker)
+
+        # Superset menjawab (termasuk 4xx karena konfigurasi): instance hidup
+        breaker.record_success()
+        return response
 
-    except SupersetDashboard.DoesNotExist:
-        return JsonResponse({"error": f"Dashboard with id {dashboard_id} not found"}, status=404)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
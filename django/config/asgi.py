@@ -1,5 +1,9 @@
 """
 ASGI config for superset-django integration project.
+
+Request /events/ (server-sent events, lihat budget/events.py) dilayani
+langsung oleh ASGI app ringan tanpa melewati middleware Django; request
+lainnya diteruskan ke aplikasi Django biasa.
 """
 
 import os
@@ -8,4 +12,27 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Import setelah Django di-setup
+from budget.events import hub, sse_application  # noqa: E402
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            hub.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            hub.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http' and scope['path'].startswith('/events/'):
+        return await sse_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,71 @@
+"""
+Gunicorn config untuk mode production Django
+
+Semua nilai bisa di-override lewat environment variable GUNICORN_*.
+Jalankan: gunicorn -c gunicorn.conf.py config.wsgi
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# gthread: proses x thread; view kita didominasi I/O (DB, Superset API)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = env_int('GUNICORN_WORKERS', cpu_count * 2 + 1 if worker_class == 'sync' else cpu_count + 1)
+threads = env_int('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1)
+
+# Load aplikasi sekali di master lalu fork: startup worker lebih cepat dan
+# memory di-share copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Muat URLconf, view, template dan modul jalur Superset sebelum request
+# pertama (budget/startup.py). Dengan preload dijalankan sekali di master,
+# sehingga worker baru/hasil recycle langsung "hangat"
+warmup = os.environ.get('GUNICORN_WARMUP', 'True') == 'True'
+
+# Recycle worker secara berkala; jitter mencegah semua worker restart bersamaan
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+
+# Harus lebih panjang dari idle timeout upstream Caddy (lihat Caddyfile),
+# supaya Caddy yang menutup koneksi idle lebih dulu, bukan gunicorn
+keepalive = env_int('GUNICORN_KEEPALIVE', 75)
+
+# Heartbeat worker di tmpfs, bukan overlay filesystem container
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+
+# Caddy mengirim X-Forwarded-* dari jaringan docker
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+
+def when_ready(server):
+    if warmup and preload_app:
+        from budget import startup
+        server.log.info('Warmup aplikasi selesai dalam %.3fs', startup.warm())
+
+
+def post_worker_init(worker):
+    if warmup and not preload_app:
+        from budget import startup
+        startup.warm()
+
+
+def post_fork(server, worker):
+    # Koneksi DB yang mungkin dibuka saat preload tidak boleh di-share antar proses
+    from django.db import connections
+    for connection in connections.all(initialized_only=True):
+        connection.close()
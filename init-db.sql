@@ -1,7 +1,30 @@
 -- Script untuk inisialisasi database PostgreSQL
 -- Database akan dibuat otomatis oleh docker-entrypoint
+-- Aman dijalankan ulang pada volume yang sudah ada:
+--   docker compose exec -T postgres psql -U superset_user -d superset_db < init-db.sql
 
 -- Buat extension jika diperlukan
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Role baca untuk database connection Superset ke data anggaran.
+-- statement_timeout memutus query chart yang lari, CONNECTION LIMIT menjadi
+-- pool khusus Superset agar tidak menghabiskan max_connections milik Django.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = 'budget_reader') THEN
+        CREATE ROLE budget_reader LOGIN PASSWORD 'budget_reader_password';
+    END IF;
+END
+$$;
+ALTER ROLE budget_reader CONNECTION LIMIT 20;
+ALTER ROLE budget_reader SET statement_timeout = '30s';
+ALTER ROLE budget_reader SET idle_in_transaction_session_timeout = '60s';
+ALTER ROLE budget_reader SET default_transaction_read_only = on;
+
+GRANT CONNECT ON DATABASE superset_db TO budget_reader;
+GRANT USAGE ON SCHEMA public TO budget_reader;
+GRANT SELECT ON ALL TABLES IN SCHEMA public TO budget_reader;
+-- Tabel/view yang dibuat migrasi Django berikutnya ikut bisa dibaca
+ALTER DEFAULT PRIVILEGES FOR ROLE superset_user IN SCHEMA public GRANT SELECT ON TABLES TO budget_reader;
+
 -- Selesai - Django akan membuat tabel melalui migrasi
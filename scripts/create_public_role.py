@@ -1,6 +1,9 @@
 """
 Script to create Public role in Superset and grant dashboard permissions
 Run this inside the Superset container: docker compose exec superset python /app/scripts/create_public_role.py
+
+Alternatif tanpa masuk ke container: `python manage.py setup_public_superset`
+(lewat REST API, lihat django/budget/provisioning.py)
 """
 from superset.app import create_app
 from superset import db
@@ -46,30 +49,43 @@ with app.app_context():
         ("menu_access", "Dashboards"),
     ]
 
+    # Ambil semua pasangan permission/view yang dibutuhkan dalam satu query,
+    # lalu bandingkan dengan permission role yang sudah ada
+    from sqlalchemy import tuple_
+    from sqlalchemy.orm import contains_eager
+    PermissionView = security_manager.permissionview_model
+    Permission = security_manager.permission_model
+    ViewMenu = security_manager.viewmenu_model
+
+    existing = {
+        (pv.permission.name, pv.view_menu.name): pv
+        for pv in (
+            db.session.query(PermissionView)
+            .join(Permission, PermissionView.permission_id == Permission.id)
+            .join(ViewMenu, PermissionView.view_menu_id == ViewMenu.id)
+            .options(contains_eager(PermissionView.permission), contains_eager(PermissionView.view_menu))
+            .filter(tuple_(Permission.name, ViewMenu.name).in_(permissions_to_add))
+        )
+    }
+    granted = set(public_role.permissions)
+
     added_count = 0
     for permission_name, view_name in permissions_to_add:
-        # Find or create permission
-        perm_view = security_manager.find_permission_view_menu(permission_name, view_name)
-
-        if perm_view:
-            # Check if permission already in role
-            if perm_view not in public_role.permissions:
-                public_role.permissions.append(perm_view)
-                added_count += 1
-                print(f"  + Added: {permission_name} on {view_name}")
-        else:
-            # Try to create the permission
+        perm_view = existing.get((permission_name, view_name))
+        if perm_view is None:
+            # Jarang terjadi: permission belum pernah didaftarkan Superset
             try:
                 perm_view = security_manager.add_permission_view_menu(permission_name, view_name)
-                if perm_view:
-                    public_role.permissions.append(perm_view)
-                    added_count += 1
-                    print(f"  + Created and added: {permission_name} on {view_name}")
             except Exception as e:
                 print(f"  - Could not add {permission_name} on {view_name}: {e}")
+                continue
+        if perm_view and perm_view not in granted:
+            public_role.permissions.append(perm_view)
+            granted.add(perm_view)
+            added_count += 1
+            print(f"  + Added: {permission_name} on {view_name}")
 
     if added_count > 0:
-        db.session.commit()
         print(f"\n✓ Added {added_count} permissions to Public role")
     else:
         print("\n✓ All permissions already present")
@@ -83,8 +99,9 @@ with app.app_context():
 
     # List all dashboards
     print("\n[4/4] Available dashboards:")
+    from sqlalchemy.orm import selectinload
     from superset.models.dashboard import Dashboard
-    dashboards = db.session.query(Dashboard).all()
+    dashboards = db.session.query(Dashboard).options(selectinload(Dashboard.roles)).all()
 
     if dashboards:
         for dashboard in dashboards:
@@ -98,11 +115,12 @@ with app.app_context():
                 print(f"    ✓ Added Public role to this dashboard")
             else:
                 print(f"    ✓ Public role already assigned")
-
-        db.session.commit()
     else:
         print("  No dashboards found. Please create a dashboard first.")
 
+    # Satu commit untuk role, permission dan dashboard
+    db.session.commit()
+
     print("\n" + "=" * 60)
     print("Configuration Complete!")
     print("=" * 60)
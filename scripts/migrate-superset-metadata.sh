@@ -0,0 +1,25 @@
+#!/bin/sh
+# Pindahkan metadata Superset (dashboard, chart, user, log, ...) dari
+# database anggaran (service postgres, superset_db) ke service superset-db.
+# Sekali jalan, untuk instalasi lama yang dibuat sebelum keduanya dipisah:
+#   docker compose up -d postgres superset-db
+#   sh scripts/migrate-superset-metadata.sh
+#   docker compose up -d
+# Tabel lama di superset_db tidak dihapus; setelah diverifikasi bisa di-drop.
+set -e
+
+# Tabel Django/anggaran yang tidak ikut dipindahkan (sama dengan db_table di
+# django/budget/models.py plus view SQL-nya). Pola dikutip agar tidak di-glob
+# oleh shell terhadap isi direktori saat ini
+set -- -T 'django_*' -T 'auth_*' -T 'superset_integration_*' \
+    -T provinsi -T kabupaten_kota -T program_kegiatan -T jenis_anggaran \
+    -T anggaran_daerah -T realisasi_bulanan -T realisasi_seri -T analisis_realisasi \
+    -T snapshot_tahun -T anggaran_snapshot -T snapshot_agregat \
+    -T job_queue -T v_anggaran_daerah -T mv_laporan_anggaran
+
+docker compose stop superset
+docker compose exec -T postgres \
+    pg_dump -U superset_user -d superset_db --no-owner --no-privileges "$@" \
+  | docker compose exec -T superset-db \
+    psql -v ON_ERROR_STOP=1 -U superset_meta -d superset_meta
+echo "Metadata Superset dipindahkan ke superset-db"
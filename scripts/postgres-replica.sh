@@ -0,0 +1,22 @@
+#!/bin/sh
+# Entrypoint hot standby (compose profile "replica"): salin base backup dari
+# primary saat volume masih kosong, lalu jalankan postgres sebagai replica
+# read-only yang mengikuti WAL primary.
+set -e
+
+PRIMARY_HOST="${PRIMARY_HOST:-postgres}"
+REPLICATION_USER="${REPLICATION_USER:-replicator}"
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    until su-exec postgres env PGPASSWORD="$REPLICATION_PASSWORD" \
+        pg_basebackup -h "$PRIMARY_HOST" -U "$REPLICATION_USER" -D "$PGDATA" -R -X stream; do
+        echo "Primary $PRIMARY_HOST belum siap, mencoba lagi..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+fi
+
+exec su-exec postgres postgres -c hot_standby=on -c hot_standby_feedback=on
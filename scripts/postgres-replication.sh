@@ -0,0 +1,26 @@
+#!/bin/sh
+# Siapkan primary untuk streaming replication (compose profile "replica").
+# Dijalankan otomatis saat volume postgres pertama kali dibuat; untuk volume
+# yang sudah ada jalankan manual:
+#   docker compose exec postgres sh /docker-entrypoint-initdb.d/10-replication.sh
+set -e
+
+REPLICATION_USER="${REPLICATION_USER:-replicator}"
+REPLICATION_PASSWORD="${REPLICATION_PASSWORD:-replicator_password}"
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<SQL
+DO \$\$
+BEGIN
+    IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '$REPLICATION_USER') THEN
+        CREATE ROLE $REPLICATION_USER WITH REPLICATION LOGIN PASSWORD '$REPLICATION_PASSWORD';
+    END IF;
+END
+\$\$;
+-- Simpan WAL secukupnya agar replica yang sempat tertinggal bisa menyusul
+ALTER SYSTEM SET wal_keep_size = '256MB';
+SQL
+
+if ! grep -q "^host replication $REPLICATION_USER" "$PGDATA/pg_hba.conf"; then
+    echo "host replication $REPLICATION_USER all scram-sha-256" >> "$PGDATA/pg_hba.conf"
+fi
+psql --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" -c 'SELECT pg_reload_conf()' >/dev/null
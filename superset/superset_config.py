@@ -19,6 +19,15 @@ SQLALCHEMY_DATABASE_URI = 'postgresql://{}:{}@{}:{}/{}'.format(
     os.environ.get('DATABASE_DB', 'superset_db')
 )
 
+# Pool koneksi metadata. Data anggaran dibaca lewat database connection
+# terpisah (role budget_reader, lihat `manage.py configure_superset_database`)
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', '10')),
+    'max_overflow': 5,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
+
 # Flask-WTF flag for CSRF
 WTF_CSRF_ENABLED = True
 
@@ -92,6 +101,10 @@ SESSION_COOKIE_HTTPONLY = False
 # Comment out AUTH_ROLE_PUBLIC to require login for Superset UI
 # AUTH_ROLE_PUBLIC = 'Public'
 
+# Security REST API (roles/permissions), dipakai oleh
+# `manage.py setup_public_superset` untuk provisioning role Public
+FAB_ADD_SECURITY_API = True
+
 # Note: We use guest tokens for embedded dashboards instead of public role
 # This allows login to Superset UI while still supporting embedded access
 
@@ -104,10 +117,18 @@ FEATURE_FLAGS = {
 
 # Guest token configuration
 GUEST_ROLE_NAME = 'Gamma'
-GUEST_TOKEN_JWT_SECRET = os.environ.get('SUPERSET_SECRET_KEY', 'your_secret_key_change_this_in_production')
-GUEST_TOKEN_JWT_ALGO = 'HS256'
+# Harus sama dengan GUEST_TOKEN_ALGORITHM di Django. RS256/EdDSA: Superset hanya
+# memegang kunci publik (PEM) dari kunci privat penanda tangan Django
+GUEST_TOKEN_JWT_ALGO = os.environ.get('GUEST_TOKEN_ALGORITHM', 'HS256')
+if GUEST_TOKEN_JWT_ALGO == 'HS256':
+    GUEST_TOKEN_JWT_SECRET = os.environ.get('SUPERSET_SECRET_KEY', 'your_secret_key_change_this_in_production')
+else:
+    with open(os.environ['GUEST_TOKEN_PUBLIC_KEY_FILE']) as key_file:
+        GUEST_TOKEN_JWT_SECRET = key_file.read()
 GUEST_TOKEN_HEADER_NAME = 'X-GuestToken'
 GUEST_TOKEN_JWT_EXP_SECONDS = 300  # 5 minutes
+# Harus sama dengan GUEST_TOKEN_AUDIENCE di Django (claim aud guest token)
+GUEST_TOKEN_JWT_AUDIENCE = os.environ.get('GUEST_TOKEN_AUDIENCE', 'superset')
 
 # HTTP headers - Allow embedding in iframe
 HTTP_HEADERS = {}